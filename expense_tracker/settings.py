@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracker.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,14 +68,93 @@ WSGI_APPLICATION = 'expense_tracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite is tuned for several concurrent workers. In WAL mode readers keep
+# working while a write is in progress. With synchronous=NORMAL a commit
+# only waits for the WAL write, not a full fsync. IMMEDIATE transactions
+# take the write lock when they begin, so competing writers queue on
+# busy_timeout instead of failing with "database is locked" when they
+# upgrade a read lock. Run `manage.py sqlite_maintenance` periodically to
+# checkpoint the WAL and refresh query planner statistics.
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA temp_store=MEMORY',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Connections close after each request. Under ASGI every request may
+        # run on a different thread and persistent connections pile up per
+        # thread, so only raise DJANGO_CONN_MAX_AGE for WSGI workers.
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Analytics results are cached per user data version. Use a shared backend
+# (Redis/Memcached) in production; MAX_ENTRIES bounds memory via culling.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'expense-tracker',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,
+        },
+    }
+}
+
+TRACKER_ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Per-request query and timing instrumentation (Server-Timing header, slow
+# request and N+1 logging). Off unless TRACKER_INSTRUMENTATION=1 is set.
+TRACKER_INSTRUMENTATION = os.environ.get('TRACKER_INSTRUMENTATION') == '1'
+TRACKER_SLOW_REQUEST_MS = 500
+TRACKER_SLOW_REQUEST_QUERIES_LOGGED = 5
+TRACKER_N_PLUS_ONE_THRESHOLD = 10
+
+# Rendered PDF reports are stored on disk and served from there until the
+# month's data changes. Least recently used reports are evicted past the
+# size limit, and any report unused for MAX_AGE seconds is removed.
+TRACKER_REPORT_CACHE_DIR = BASE_DIR / 'var' / 'reports'
+TRACKER_REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+TRACKER_REPORT_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
+# Monthly statements written by `manage.py generate_statements`, one
+# directory per month and one PDF per user. Unlike the report cache above
+# they are never evicted.
+TRACKER_STATEMENT_DIR = BASE_DIR / 'var' / 'statements'
+
+# Delta sync (/sync/). Changes younger than SETTLE_SECONDS wait for the next
+# sync, so a write still committing cannot slip behind a client's cursor. A
+# save stamps updated_at and may then wait up to busy_timeout for the write
+# lock, so the window must be longer; the tracker.E001 check enforces it.
+# Deletion tombstones are kept for TOMBSTONE_DAYS (`manage.py
+# prune_tombstones`); a client that has not synced for longer starts over.
+TRACKER_SYNC_SETTLE_SECONDS = SQLITE_BUSY_TIMEOUT_MS / 1000 + 2
+TRACKER_SYNC_TOMBSTONE_DAYS = 90
+
+# Currency every total, rollup and budget is kept in. Transactions in other
+# currencies are converted with the ExchangeRate table (`manage.py
+# load_exchange_rates`) at the rate of their date.
+TRACKER_BASE_CURRENCY = 'USD'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Transaction, Budget
+from .models import Category, Transaction, RecurringRule, Budget, SpendForecast
 
 
 @admin.register(Category)
@@ -12,16 +12,31 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ['date', 'category', 'amount', 'user', 'created_at']
-    list_filter = ['date', 'category__type', 'created_at']
+    list_display = ['date', 'category', 'amount', 'currency', 'user', 'created_at']
+    list_filter = ['date', 'type', 'currency', 'created_at']
     search_fields = ['category__name', 'user__username', 'note']
     ordering = ['-date', '-created_at']
     date_hierarchy = 'date'
 
 
+@admin.register(RecurringRule)
+class RecurringRuleAdmin(admin.ModelAdmin):
+    list_display = ['category', 'amount', 'frequency', 'interval', 'next_date', 'end_date', 'is_active', 'user']
+    list_filter = ['frequency', 'is_active']
+    search_fields = ['category__name', 'user__username', 'note']
+    ordering = ['next_date']
+
+
 @admin.register(Budget)
 class BudgetAdmin(admin.ModelAdmin):
     list_display = ['month', 'limit_amount', 'user', 'created_at']
     list_filter = ['created_at']
     search_fields = ['user__username', 'month']
     ordering = ['-month', 'user']
+
+
+@admin.register(SpendForecast)
+class SpendForecastAdmin(admin.ModelAdmin):
+    list_display = ['month', 'as_of', 'spent', 'projected_expense', 'budget_limit', 'breach_probability', 'user']
+    search_fields = ['user__username', 'month']
+    ordering = ['-month', 'user']
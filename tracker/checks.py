@@ -0,0 +1,44 @@
+import re
+from django.conf import settings
+from django.core.checks import Error, register
+from django.db import connections
+
+
+BUSY_TIMEOUT_RE = re.compile(r'busy_timeout\s*=\s*(\d+)', re.IGNORECASE)
+
+
+def busy_timeout_seconds(database):
+    """Longest time an SQLite write can wait for the lock on ``database``."""
+    options = database.get('OPTIONS', {})
+    # Python's sqlite3 waits ``timeout`` seconds (5 by default); a
+    # busy_timeout pragma in init_command replaces it.
+    timeout = float(options.get('timeout', 5))
+    match = BUSY_TIMEOUT_RE.search(options.get('init_command', ''))
+    if match:
+        timeout = int(match.group(1)) / 1000
+    return timeout
+
+
+@register()
+def check_sync_settle_window(app_configs, **kwargs):
+    """
+    The sync settle window must outlast a write's wait for the lock.
+
+    ``updated_at`` is set before the row is written; a write queued on
+    busy_timeout commits up to that long afterwards, and would fall behind
+    a cursor handed out meanwhile if the window were shorter.
+    """
+    errors = []
+    for alias in connections:
+        database = connections.databases[alias]
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            continue
+        timeout = busy_timeout_seconds(database)
+        if settings.TRACKER_SYNC_SETTLE_SECONDS <= timeout:
+            errors.append(Error(
+                f'TRACKER_SYNC_SETTLE_SECONDS ({settings.TRACKER_SYNC_SETTLE_SECONDS}) must be longer '
+                f"than the SQLite busy timeout of database '{alias}' ({timeout:g}s).",
+                hint='Derive it from the busy timeout plus a margin, as settings.py does.',
+                id='tracker.E001',
+            ))
+    return errors
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Category, Transaction, Budget
+from .services.bulk import ACTION_CHOICES, ACTION_RECATEGORIZE, ACTION_SHIFT_DATE
+from .services.currency import known_currencies
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -21,10 +23,19 @@ class CategoryForm(forms.ModelForm):
         }
 
 
+class CategoryMergeForm(forms.Form):
+    target = forms.ModelChoiceField(queryset=Category.objects.none(), label='Move transactions to')
+    delete_source = forms.BooleanField(required=False, initial=True, label='Delete this category afterwards')
+    
+    def __init__(self, user, source, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['target'].queryset = Category.objects.filter(user=user).exclude(pk=source.pk).order_by('type', 'name')
+
+
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transaction
-        fields = ['category', 'amount', 'date', 'note']
+        fields = ['category', 'amount', 'currency', 'date', 'note']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date'}),
             'note': forms.Textarea(attrs={'rows': 3}),
@@ -33,6 +44,52 @@ class TransactionForm(forms.ModelForm):
     def __init__(self, user, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['category'].queryset = Category.objects.filter(user=user)
+        # Only currencies with exchange rates can be converted for the totals.
+        currencies = known_currencies()
+        if self.instance.currency not in currencies:
+            currencies = currencies + [self.instance.currency]
+        self.fields['currency'] = forms.ChoiceField(choices=[(code, code) for code in currencies])
+
+
+class IdListField(forms.Field):
+    widget = forms.MultipleHiddenInput
+    
+    def to_python(self, value):
+        try:
+            return [int(item) for item in value or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError('Invalid transaction id.')
+
+
+class TransactionBulkActionForm(forms.Form):
+    SCOPE_SELECTED = 'selected'
+    SCOPE_FILTERED = 'filtered'
+    SCOPE_CHOICES = [
+        (SCOPE_SELECTED, 'Selected transactions'),
+        (SCOPE_FILTERED, 'All transactions matching the filters'),
+    ]
+    
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    scope = forms.ChoiceField(choices=SCOPE_CHOICES, initial=SCOPE_SELECTED)
+    ids = IdListField(required=False)
+    category = forms.ModelChoiceField(queryset=Category.objects.none(), required=False)
+    days = forms.IntegerField(required=False, min_value=-36500, max_value=36500)
+    dry_run = forms.BooleanField(required=False)
+    
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['category'].queryset = Category.objects.filter(user=user)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if cleaned_data.get('scope') == self.SCOPE_SELECTED and not cleaned_data.get('ids'):
+            raise forms.ValidationError('Select at least one transaction.')
+        if action == ACTION_RECATEGORIZE and not cleaned_data.get('category'):
+            self.add_error('category', 'Choose the category to move the transactions to.')
+        if action == ACTION_SHIFT_DATE and not cleaned_data.get('days'):
+            self.add_error('days', 'Enter a number of days other than zero.')
+        return cleaned_data
 
 
 class BudgetForm(forms.ModelForm):
@@ -42,3 +99,9 @@ class BudgetForm(forms.ModelForm):
         widgets = {
             'month': forms.DateInput(attrs={'type': 'month'}),
         }
+
+
+class TransactionImportForm(forms.Form):
+    file = forms.FileField(
+        help_text='CSV with Date, Category, Type, Amount and Note columns (the CSV export format).'
+    )
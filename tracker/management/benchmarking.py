@@ -0,0 +1,18 @@
+import statistics
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of ``samples`` for ``fraction`` between 0 and 1."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        'runs': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+    }
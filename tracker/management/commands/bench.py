@@ -0,0 +1,209 @@
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from tracker.management.benchmarking import summarize
+from tracker.models import Transaction
+from tracker.services.analytics import (
+    get_category_breakdown,
+    get_monthly_chart_data,
+    get_monthly_summary,
+    get_range_report,
+    year_bounds,
+)
+from tracker.services.seeding import seed_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot paths (dashboard, transaction list, CSV/PDF export and '
+        'the analytics services) against seeded users of the given sizes and '
+        'record p50/p95 latency and query counts as JSON. With --baseline, '
+        'fail when a result regresses past the stored one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000',
+            help='Comma-separated transaction counts; one seeded user per size.',
+        )
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--months', type=int, default=12)
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per hot path.')
+        parser.add_argument('--warm', action='store_true', help='Keep the analytics cache and stored reports between runs.')
+        parser.add_argument('--prefix', default='bench-size')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed p95 slowdown over the baseline as a fraction (default 0.25).',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Ignore p95 slowdowns smaller than this many milliseconds.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+        if not sizes or min(sizes) < 1 or options['runs'] < 1:
+            raise CommandError('--sizes and --runs must be positive.')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+
+        self.options = options
+        self.report_dir = tempfile.mkdtemp(prefix='tracker-bench-reports-')
+        today = date.today()
+        results = {
+            'meta': {
+                'date': today.isoformat(),
+                'runs': options['runs'],
+                'warm': options['warm'],
+                'categories': options['categories'],
+                'months': options['months'],
+                'vendor': connection.vendor,
+            },
+            'results': {},
+        }
+
+        # Lets the test client's 'testserver' host through ALLOWED_HOSTS.
+        setup_test_environment()
+        try:
+            with override_settings(TRACKER_REPORT_CACHE_DIR=self.report_dir):
+                for size in sizes:
+                    user = self.seeded_user(size)
+                    results['results'][str(size)] = self.bench_size(user, today.year, today.month)
+        finally:
+            teardown_test_environment()
+            shutil.rmtree(self.report_dir, ignore_errors=True)
+
+        self.write_table(results)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results)
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(line)
+                raise CommandError(f'{len(regressions)} result(s) regressed past the baseline.')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def seeded_user(self, size):
+        username = f"{self.options['prefix']}-{size}"
+        user = User.objects.filter(username=username).first()
+        if user is not None and Transaction.objects.filter(user=user).count() == size:
+            return user
+        if user is not None:
+            user.delete()
+
+        started = time.perf_counter()
+        user = User.objects.create_user(username)
+        seed_user(
+            user,
+            transactions=size,
+            categories=self.options['categories'],
+            months=self.options['months'],
+            rng=random.Random(self.options['seed'] + size),
+        )
+        self.stdout.write(f'Seeded {username} with {size} transactions in {time.perf_counter() - started:.2f}s.')
+        return user
+
+    def hot_paths(self, user, year, month):
+        client = Client()
+        client.force_login(user)
+
+        def view(name, params=None):
+            def run():
+                response = client.get(reverse(name), params or {})
+                if response.status_code != 200:
+                    raise CommandError(f'{name} returned {response.status_code}.')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            return run
+
+        month_params = {'year': year, 'month': month}
+        start, end = year_bounds(year)
+        return {
+            'dashboard': view('dashboard', month_params),
+            'transaction_list': view('transaction-list'),
+            'export_csv': view('export-csv'),
+            'export_pdf': view('export-pdf', month_params),
+            'get_monthly_summary': lambda: get_monthly_summary(user, year, month),
+            'get_category_breakdown': lambda: get_category_breakdown(user, year, month),
+            'get_monthly_chart_data': lambda: get_monthly_chart_data(user, year, month),
+            'get_range_report': lambda: get_range_report(user, start, end),
+        }
+
+    def reset(self):
+        if not self.options['warm']:
+            cache.clear()
+            shutil.rmtree(self.report_dir, ignore_errors=True)
+
+    def bench_size(self, user, year, month):
+        results = {}
+        for name, run in self.hot_paths(user, year, month).items():
+            # One untimed call so imports and template loading are not measured.
+            self.reset()
+            run()
+            samples = []
+            queries = 0
+            for _ in range(self.options['runs']):
+                self.reset()
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    run()
+                    samples.append(time.perf_counter() - started)
+                queries = max(queries, len(context))
+            results[name] = dict(summarize(samples), queries=queries)
+        return results
+
+    def write_table(self, results):
+        for size, paths in results['results'].items():
+            self.stdout.write(f'{size} transactions:')
+            for name, stats in paths.items():
+                self.stdout.write(
+                    f"  {name:<24} p50 {stats['p50_ms']:>9.2f} ms  "
+                    f"p95 {stats['p95_ms']:>9.2f} ms  {stats['queries']:>3} queries"
+                )
+
+    def compare(self, baseline, results):
+        regressions = []
+        tolerance = self.options['tolerance']
+        min_delta = self.options['min_delta_ms']
+        for size, paths in results['results'].items():
+            for name, stats in paths.items():
+                previous = baseline.get('results', {}).get(size, {}).get(name)
+                if previous is None:
+                    continue
+                limit = previous['p95_ms'] * (1 + tolerance)
+                if stats['p95_ms'] > limit and stats['p95_ms'] - previous['p95_ms'] > min_delta:
+                    regressions.append(
+                        f"{size}/{name}: p95 {stats['p95_ms']:.2f} ms exceeds "
+                        f"baseline {previous['p95_ms']:.2f} ms by more than {tolerance:.0%}"
+                    )
+                if stats['queries'] > previous['queries']:
+                    regressions.append(
+                        f"{size}/{name}: {stats['queries']} queries, baseline {previous['queries']}"
+                    )
+        return regressions
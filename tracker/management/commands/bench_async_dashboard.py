@@ -0,0 +1,136 @@
+import http.client
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from tracker.management.benchmarking import percentile
+from tracker.services.cache import bump_data_version
+
+
+WARMUP_REQUESTS = 5
+STARTUP_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync dashboard with the async dashboard under a real '
+        'ASGI server. Starts uvicorn on this project and sends both paths '
+        'the same number of requests at the same concurrency over HTTP '
+        'keep-alive connections. Needs uvicorn installed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--month', type=int)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help="Bump the user's data version before every request, so each one misses the analytics cache.",
+        )
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('bench_async_dashboard needs uvicorn: pip install uvicorn')
+        try:
+            self.user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        self.options = options
+        params = {}
+        if options['year']:
+            params['year'] = options['year']
+        if options['month']:
+            params['month'] = options['month']
+        query = f'?{urlencode(params)}' if params else ''
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={self.login()}'
+
+        server = self.start_server()
+        try:
+            for label, url in (('sync ', reverse('dashboard')), ('async', reverse('dashboard-async'))):
+                wall, samples = self.bench(url + query)
+                self.report(label, wall, samples)
+        finally:
+            server.terminate()
+            server.wait()
+
+    def login(self):
+        session = SessionStore()
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.create()
+        return session.session_key
+
+    def start_server(self):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'uvicorn', 'expense_tracker.asgi:application',
+                '--host', '127.0.0.1', '--port', str(self.options['port']), '--log-level', 'warning',
+            ],
+            env=env,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'uvicorn exited with status {server.returncode}.')
+            try:
+                socket.create_connection(('127.0.0.1', self.options['port']), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'uvicorn did not start listening within {STARTUP_TIMEOUT}s.')
+
+    def bench(self, url):
+        local = threading.local()
+
+        def one_request(_):
+            if not hasattr(local, 'http'):
+                local.http = http.client.HTTPConnection('127.0.0.1', self.options['port'])
+            if self.options['cold']:
+                # Outside the timed part; the pool's threads keep no
+                # connection open between requests.
+                bump_data_version(self.user.pk)
+                connections.close_all()
+            started = time.perf_counter()
+            local.http.request('GET', url, headers={'Cookie': self.cookie})
+            response = local.http.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - started
+            if response.status != 200:
+                raise CommandError(f'{url} returned {response.status}.')
+            return elapsed
+
+        concurrency = self.options['concurrency']
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one_request, range(WARMUP_REQUESTS * concurrency)))
+            started = time.perf_counter()
+            samples = list(pool.map(one_request, range(self.options['requests'])))
+            wall = time.perf_counter() - started
+        return wall, samples
+
+    def report(self, label, wall, samples):
+        self.stdout.write(
+            f"{label} (uvicorn, concurrency={self.options['concurrency']}): "
+            f'{len(samples) / wall:.1f} req/s, '
+            f'p50 {statistics.median(samples) * 1000:.1f} ms, '
+            f'p95 {percentile(samples, 0.95) * 1000:.1f} ms'
+        )
@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+# Python's sqlite3 waits up to 5 seconds for a lock by default; the default
+# profile keeps that and SQLite's rollback journal, as Django did before.
+DEFAULT_PRAGMAS = ['PRAGMA journal_mode=DELETE', 'PRAGMA synchronous=FULL']
+START_DATE = date(2025, 1, 1)
+USERS = 50
+CATEGORIES = 10
+# The tables a transaction save touches; their indexes and triggers (the
+# search index included) are copied along with them.
+TABLES = (
+    'tracker_category', 'tracker_transaction', 'tracker_transaction_fts',
+    'tracker_dailycategoryrollup', 'tracker_monthlytyperollup',
+)
+
+DAILY_UPSERT = (
+    'INSERT INTO tracker_dailycategoryrollup (user_id, category_id, date, total, count) VALUES (?, ?, ?, ?, 1) '
+    'ON CONFLICT (user_id, date, category_id) DO UPDATE SET '
+    'total = tracker_dailycategoryrollup.total + excluded.total, count = tracker_dailycategoryrollup.count + 1'
+)
+MONTHLY_UPSERT = (
+    "INSERT INTO tracker_monthlytyperollup (user_id, month, type, total, count) VALUES (?, ?, 'EXPENSE', ?, 1) "
+    'ON CONFLICT (user_id, month, type) DO UPDATE SET '
+    'total = tracker_monthlytyperollup.total + excluded.total, count = tracker_monthlytyperollup.count + 1'
+)
+
+
+def _schema():
+    """DDL of the transaction, category and rollup tables in the project database."""
+    placeholders = ', '.join(['%s'] * len(TABLES))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT type, sql FROM sqlite_master WHERE tbl_name IN ({placeholders}) AND sql IS NOT NULL "
+            "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, name",
+            TABLES,
+        )
+        rows = cursor.fetchall()
+    if sum(kind == 'table' for kind, _ in rows) < len(TABLES):
+        raise CommandError('The project database is missing tracker tables; run migrate first.')
+    return [sql for _, sql in rows]
+
+
+def _connect(path, pragmas):
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for pragma in pragmas:
+        db.execute(pragma)
+    return db
+
+
+def _category_id(user_id, rng):
+    return user_id * CATEGORIES + rng.randrange(CATEGORIES) + 1
+
+
+def _setup(path, pragmas, schema, rows):
+    db = _connect(path, pragmas)
+    db.execute('BEGIN')
+    for sql in schema:
+        db.execute(sql)
+    now = f'{START_DATE.isoformat()} 00:00:00'
+    db.executemany(
+        'INSERT INTO tracker_category (id, user_id, name, type, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (user_id * CATEGORIES + index + 1, user_id, f'Category {index}', 'EXPENSE', now, now)
+            for user_id in range(USERS) for index in range(CATEGORIES)
+        ),
+    )
+    rng = random.Random(0)
+    db.executemany(
+        'INSERT INTO tracker_transaction (user_id, category_id, type, amount, currency, date, note, created_at, '
+        "updated_at) VALUES (?, ?, 'EXPENSE', ?, 'USD', ?, ?, ?, ?)",
+        (
+            (user_id, _category_id(user_id, rng),
+             f'{rng.randint(100, 10000) / 100:.2f}',
+             (START_DATE + timedelta(days=rng.randrange(365))).isoformat(), 'seed', now, now)
+            for user_id in (rng.randrange(USERS) for _ in range(rows))
+        ),
+    )
+    db.execute(
+        'INSERT INTO tracker_dailycategoryrollup (user_id, category_id, date, total, count) '
+        'SELECT user_id, category_id, date, SUM(amount), COUNT(*) FROM tracker_transaction '
+        'GROUP BY user_id, category_id, date'
+    )
+    db.execute(
+        'INSERT INTO tracker_monthlytyperollup (user_id, month, type, total, count) '
+        'SELECT user_id, substr(date, 1, 7), type, SUM(amount), COUNT(*) FROM tracker_transaction '
+        'GROUP BY user_id, substr(date, 1, 7), type'
+    )
+    db.execute('COMMIT')
+    db.close()
+
+
+def _worker(path, pragmas, begin, role, seconds, seed, results):
+    rng = random.Random(seed)
+    db = _connect(path, pragmas)
+    ops = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        user_id = rng.randrange(USERS)
+        day = (START_DATE + timedelta(days=rng.randrange(365))).isoformat()
+        started = time.perf_counter()
+        try:
+            if role == 'write':
+                # What saving a transaction does: read its category, insert
+                # it (the trigger indexes it for search) and add it to the
+                # daily and monthly rollups.
+                amount = f'{rng.randint(100, 10000) / 100:.2f}'
+                category_id = _category_id(user_id, rng)
+                now = time.strftime('%Y-%m-%d %H:%M:%S')
+                db.execute(begin)
+                try:
+                    db.execute('SELECT type FROM tracker_category WHERE id = ?', (category_id,)).fetchone()
+                    db.execute(
+                        'INSERT INTO tracker_transaction (user_id, category_id, type, amount, currency, date, note, '
+                        "created_at, updated_at) VALUES (?, ?, 'EXPENSE', ?, 'USD', ?, ?, ?, ?)",
+                        (user_id, category_id, amount, day, 'bench', now, now),
+                    )
+                    db.execute(DAILY_UPSERT, (user_id, category_id, day, amount))
+                    db.execute(MONTHLY_UPSERT, (user_id, day[:7], amount))
+                    db.execute('COMMIT')
+                except BaseException:
+                    db.execute('ROLLBACK')
+                    raise
+            else:
+                # The dashboard's month of daily rollups and the first page
+                # of the transaction list.
+                db.execute(
+                    'SELECT r.date, r.category_id, c.name, c.type, r.total FROM tracker_dailycategoryrollup r '
+                    'JOIN tracker_category c ON c.id = r.category_id '
+                    'WHERE r.user_id = ? AND r.date >= ? AND r.date < ?',
+                    (user_id, day[:8] + '01', day[:8] + '28'),
+                ).fetchall()
+                db.execute(
+                    'SELECT id, amount, date, note FROM tracker_transaction WHERE user_id = ? '
+                    'ORDER BY date DESC, created_at DESC, id DESC LIMIT 25',
+                    (user_id,),
+                ).fetchall()
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+    db.close()
+    results.put((role, ops, errors, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure SQLite read/write throughput under concurrent processes, '
+        'with SQLite defaults and with the pragmas configured in settings. '
+        'Runs against a scratch copy of the transaction, category and rollup '
+        'schema, never the project database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=100000, help='Transactions in the scratch database.')
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES['default']
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The default database is not SQLite.')
+        db_options = database.get('OPTIONS', {})
+        tuned = [pragma for pragma in db_options.get('init_command', '').split(';') if pragma.strip()]
+        tuned_begin = f"BEGIN {db_options.get('transaction_mode', '')}".strip()
+        schema = _schema()
+
+        profiles = [
+            ('default', DEFAULT_PRAGMAS, 'BEGIN'),
+            ('tuned', tuned, tuned_begin),
+        ]
+        for label, pragmas, begin in profiles:
+            with tempfile.TemporaryDirectory(prefix='tracker-bench-sqlite-') as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                _setup(path, pragmas, schema, options['rows'])
+                self.report(label, pragmas, begin, self.run(path, pragmas, begin, options), options['seconds'])
+
+    def run(self, path, pragmas, begin, options):
+        results = multiprocessing.Queue()
+        roles = ['read'] * options['readers'] + ['write'] * options['writers']
+        processes = [
+            multiprocessing.Process(
+                target=_worker, args=(path, pragmas, begin, role, options['seconds'], seed, results)
+            )
+            for seed, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        return collected
+
+    def report(self, label, pragmas, begin, collected, seconds):
+        self.stdout.write(f"{label}: {'; '.join(pragmas)}; {begin}")
+        for role in ('read', 'write'):
+            rows = [row for row in collected if row[0] == role]
+            ops = sum(row[1] for row in rows)
+            errors = sum(row[2] for row in rows)
+            latencies = sorted(latency for row in rows for latency in row[3])
+            p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0
+            self.stdout.write(
+                f'  {role:<5} {ops / seconds:>9.0f} ops/s  p95 {p95:>8.2f} ms  '
+                f'{errors} "database is locked" errors'
+            )
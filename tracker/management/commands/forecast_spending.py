@@ -0,0 +1,22 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from tracker.services.forecast import forecast_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Forecast every user's month-end expense and budget breach probability "
+        'and store it for the dashboard. Meant to run nightly.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Forecast as of this date (default today).')
+    
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        as_of = options['date'] or date.today()
+        written = forecast_month(as_of=as_of)
+        self.stdout.write(self.style.SUCCESS(
+            f'Forecast {as_of:%Y-%m} for {written} users in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,76 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from tracker.services.statements import (
+    STATEMENT_BATCH_SIZE, pending_user_ids, statement_dir, write_statements,
+)
+
+
+def _previous_month(today):
+    return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+
+def _parse_month(value):
+    try:
+        year, month = map(int, value.split('-'))
+        date(year, month, 1)
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}'; use YYYY-MM.")
+    return year, month
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every active user's monthly PDF statement into TRACKER_STATEMENT_DIR "
+        'using a process pool. Meant to run nightly; finished users are skipped on re-runs.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month as YYYY-MM (default the previous month).')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes (default one per CPU; 0 renders in this process).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=STATEMENT_BATCH_SIZE,
+            help='Users loaded and rendered per worker task.',
+        )
+    
+    def handle(self, *args, **options):
+        if options['month']:
+            year, month = _parse_month(options['month'])
+        else:
+            year, month = _previous_month(date.today())
+        if options['workers'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--workers must be 0 or more and --batch-size at least 1.')
+        
+        started = time.perf_counter()
+        user_ids = pending_user_ids(year, month)
+        batch_size = options['batch_size']
+        batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+        
+        written = 0
+        if options['workers'] == 0:
+            for batch in batches:
+                written += write_statements(batch, year, month)
+        elif batches:
+            # Forked workers must not share the parent's database connections;
+            # each opens its own on first use.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+                futures = [pool.submit(write_statements, batch, year, month) for batch in batches]
+                for future in as_completed(futures):
+                    written += future.result()
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{written}/{len(user_ids)} statements written')
+        
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {written} statements for {year:04d}-{month:02d} in {elapsed:.2f}s '
+            f'- {written / elapsed if elapsed else 0:.0f} statements/sec '
+            f'({statement_dir(year, month)}).'
+        ))
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tracker.services.importer import DEFAULT_BATCH_SIZE, TransactionImporter
+
+
+class Command(BaseCommand):
+    help = 'Import transactions for a user from a CSV file in the CSV export format.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        
+        importer = TransactionImporter(user, batch_size=options['batch_size'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+                result = importer.run(handle)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more errors')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} of {result.rows} rows '
+            f'({result.categories_created} new categories) in {result.elapsed:.2f}s '
+            f'- {result.rows_per_second:.0f} rows/sec.'
+        ))
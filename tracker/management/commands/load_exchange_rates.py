@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from tracker.services.exchange_rates import ExchangeRateError, load_rates, read_rates
+
+
+class Command(BaseCommand):
+    help = (
+        'Load dated exchange rates from a CSV file with date, currency and rate columns '
+        '(one unit of the currency in TRACKER_BASE_CURRENCY), then rebuild the totals '
+        'of every user with transactions in those currencies.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+    
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+                rates = read_rates(handle)
+        except (OSError, ExchangeRateError) as exc:
+            raise CommandError(str(exc))
+        
+        users = load_rates(rates)
+        currencies = len({rate.currency for rate in rates})
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {len(rates)} rates for {currencies} currencies; rebuilt totals for {users} users.'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from tracker.services.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete sync tombstones older than TRACKER_SYNC_TOMBSTONE_DAYS. Clients that '
+        'have not synced since then are told to start over. Meant to run nightly.'
+    )
+    
+    def handle(self, *args, **options):
+        removed = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} tombstones.'))
@@ -0,0 +1,28 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tracker.services.cache import bump_data_version
+from tracker.services.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and monthly analytics rollups from transactions.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild rollups for this username.')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date to rebuild (YYYY-MM-DD).')
+    
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+        
+        daily, monthly = rebuild_rollups(user=user, start=options['start'], end=options['end'])
+        bump_data_version(user.pk if user else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {daily} daily and {monthly} monthly rollup rows.'
+        ))
@@ -0,0 +1,38 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tracker.services.archive import ArchiveError, restore_archive
+
+
+class Command(BaseCommand):
+    help = 'Restore a full-account archive (from Export Archive) into an empty account.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--create-user', action='store_true',
+            help='Create the user, without a usable password, if it does not exist.',
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            if not options['create_user']:
+                raise CommandError(f"User '{options['username']}' does not exist.")
+            user = User.objects.create_user(username=options['username'])
+        
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as handle:
+                counts = restore_archive(user, handle)
+        except (OSError, ArchiveError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {counts['categories']} categories, {counts['transactions']} transactions "
+            f"and {counts['budgets']} budgets in {elapsed:.2f}s "
+            f"- {counts['transactions'] / elapsed if elapsed else 0:.0f} transactions/sec."
+        ))
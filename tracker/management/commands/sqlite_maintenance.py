@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Checkpoint the SQLite write-ahead log and refresh query planner '
+        'statistics. Meant to run periodically (e.g. hourly from cron).'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--mode', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+            help='wal_checkpoint mode; TRUNCATE also shrinks the -wal file back to zero.',
+        )
+        parser.add_argument('--vacuum', action='store_true', help='Also VACUUM the database (takes an exclusive lock).')
+    
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database '{options['database']}' is not SQLite.")
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA wal_checkpoint({options['mode']})")
+            busy, log_frames, checkpointed = cursor.fetchone()
+            if log_frames == -1:
+                self.stdout.write('Database is not in WAL mode; nothing to checkpoint.')
+            else:
+                if busy:
+                    self.stderr.write('Checkpoint could not complete because readers or writers were active.')
+                self.stdout.write(f'WAL checkpoint: {checkpointed} of {log_frames} frames written back.')
+            
+            # optimize only analyzes tables whose statistics are stale, so it
+            # is cheap to run often.
+            cursor.execute('PRAGMA optimize')
+            self.stdout.write('Query planner statistics optimized.')
+            
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+                self.stdout.write('Database vacuumed.')
+        
+        self.stdout.write(self.style.SUCCESS('SQLite maintenance complete.'))
@@ -0,0 +1,178 @@
+import contextvars
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+
+logger = logging.getLogger('tracker.performance')
+
+_current = contextvars.ContextVar('tracker_request_metrics', default=None)
+_template_patched = False
+_END = object()
+
+
+class RequestMetrics:
+    """Queries, database time and template time collected for one request."""
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries.append((sql, duration))
+
+    def repeated_queries(self, threshold):
+        """Statements run at least ``threshold`` times, most repeated first."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+    def slowest_queries(self, limit):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:limit]
+
+
+def _patch_template_render():
+    # Templates rendered through render() run inside the view, so template
+    # time is measured at Template.render. Only the outermost render is
+    # timed; includes and nested renders are part of it. The patch is only
+    # installed when instrumentation is enabled.
+    global _template_patched
+    if _template_patched:
+        return
+    original = Template.render
+
+    @functools.wraps(original)
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context)
+        metrics._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    Template.render = render
+    _template_patched = True
+
+
+@contextmanager
+def _collecting(metrics):
+    """Record the queries and template renders run inside the block into ``metrics``."""
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+    finally:
+        _current.reset(token)
+
+
+def _ms(seconds):
+    return f'{seconds * 1000:.1f}'
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Count queries and measure database, template and view time per request.
+
+    Adds a Server-Timing header, logs requests slower than
+    TRACKER_SLOW_REQUEST_MS with their slowest SQL to the
+    ``tracker.performance`` logger, and warns when one statement runs at
+    least TRACKER_N_PLUS_ONE_THRESHOLD times, which usually means a query
+    inside a loop. When TRACKER_INSTRUMENTATION is off the middleware
+    removes itself from the stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRACKER_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = settings.TRACKER_SLOW_REQUEST_MS
+        self.n_plus_one_threshold = settings.TRACKER_N_PLUS_ONE_THRESHOLD
+        self.slow_query_count = settings.TRACKER_SLOW_REQUEST_QUERIES_LOGGED
+        _patch_template_render()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        started = time.perf_counter()
+        with _collecting(metrics):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # The body runs its queries while it streams, after the headers
+            # are sent: there is no Server-Timing header, and the request is
+            # reported once the content is exhausted or closed.
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(response.streaming_content, request, response, metrics, started)
+            return response
+
+        total = time.perf_counter() - started
+        view_time = max(total - metrics.db_time - metrics.template_time, 0.0)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={_ms(metrics.db_time)};desc="{len(metrics.queries)} queries"',
+            f'tpl;dur={_ms(metrics.template_time)}',
+            f'view;dur={_ms(view_time)}',
+            f'total;dur={_ms(total)}',
+        ])
+        self._report(request, response, metrics, total)
+        return response
+
+    def _stream(self, content, request, response, metrics, started):
+        # Each chunk is produced under the wrappers; under ASGI consecutive
+        # chunks may run in different threads and contexts.
+        iterator = iter(content)
+        try:
+            while True:
+                with _collecting(metrics):
+                    chunk = next(iterator, _END)
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            self._report(request, response, metrics, time.perf_counter() - started)
+
+    async def _astream(self, content, request, response, metrics, started):
+        iterator = aiter(content)
+        try:
+            while True:
+                with _collecting(metrics):
+                    chunk = await anext(iterator, _END)
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            self._report(request, response, metrics, time.perf_counter() - started)
+
+    def _report(self, request, response, metrics, total):
+        label = f'{request.method} {request.path} {response.status_code}'
+        for sql, count in metrics.repeated_queries(self.n_plus_one_threshold):
+            logger.warning('Possible N+1 in %s: %d identical queries: %s', label, count, sql)
+
+        if total * 1000 >= self.slow_request_ms:
+            slowest = '\n'.join(
+                f'  {duration * 1000:.1f} ms  {sql}'
+                for sql, duration in metrics.slowest_queries(self.slow_query_count)
+            )
+            logger.warning(
+                'Slow request %s: %s ms total, %d queries in %s ms, template %s ms\n%s',
+                label, _ms(total), len(metrics.queries), _ms(metrics.db_time),
+                _ms(metrics.template_time), slowest,
+            )
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('tracker', 'Transaction')
+    DailyCategoryRollup = apps.get_model('tracker', 'DailyCategoryRollup')
+    MonthlyTypeRollup = apps.get_model('tracker', 'MonthlyTypeRollup')
+
+    daily_rows = Transaction.objects.values(
+        'user_id', 'category_id', 'date'
+    ).annotate(total=Sum('amount'), count=Count('id')).order_by()
+    DailyCategoryRollup.objects.bulk_create(
+        [DailyCategoryRollup(**row) for row in daily_rows],
+        batch_size=2000,
+    )
+
+    monthly_rows = Transaction.objects.annotate(
+        month_start=TruncMonth('date')
+    ).values(
+        'user_id', 'category__type', 'month_start'
+    ).annotate(total=Sum('amount'), count=Count('id')).order_by()
+    MonthlyTypeRollup.objects.bulk_create(
+        [
+            MonthlyTypeRollup(
+                user_id=row['user_id'],
+                month=row['month_start'].strftime('%Y-%m'),
+                type=row['category__type'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in monthly_rows
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tracker.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'date'], name='tracker_dai_categor_5abcb6_idx')],
+                'unique_together': {('user', 'date', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyTypeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=7)),
+                ('type', models.CharField(choices=[('INCOME', 'Income'), ('EXPENSE', 'Expense')], max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'month', 'type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
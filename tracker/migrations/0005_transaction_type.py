@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:02
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_transaction_type(apps, schema_editor):
+    Category = apps.get_model('tracker', 'Category')
+    Transaction = apps.get_model('tracker', 'Transaction')
+    Transaction.objects.update(
+        type=Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('type')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='type',
+            field=models.CharField(choices=[('INCOME', 'Income'), ('EXPENSE', 'Expense')], default='EXPENSE', editable=False, max_length=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_transaction_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'date'], name='tracker_tra_user_id_a850a4_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The index stores its own copy of each note and category name, keyed by
+# transaction id. Triggers rather than signals keep it in sync, so
+# bulk_create, queryset update()/delete() and raw SQL are covered too.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE tracker_transaction_fts USING fts5(
+        note, category, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO tracker_transaction_fts (rowid, note, category)
+    SELECT t.id, COALESCE(t.note, ''), c.name
+    FROM tracker_transaction t JOIN tracker_category c ON c.id = t.category_id
+    """,
+    """
+    CREATE TRIGGER tracker_transaction_fts_insert AFTER INSERT ON tracker_transaction BEGIN
+        INSERT INTO tracker_transaction_fts (rowid, note, category)
+        VALUES (
+            new.id, COALESCE(new.note, ''),
+            (SELECT name FROM tracker_category WHERE id = new.category_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER tracker_transaction_fts_update AFTER UPDATE OF note, category_id ON tracker_transaction BEGIN
+        UPDATE tracker_transaction_fts SET
+            note = COALESCE(new.note, ''),
+            category = (SELECT name FROM tracker_category WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tracker_transaction_fts_delete AFTER DELETE ON tracker_transaction BEGIN
+        DELETE FROM tracker_transaction_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tracker_category_fts_rename AFTER UPDATE OF name ON tracker_category BEGIN
+        UPDATE tracker_transaction_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM tracker_transaction WHERE category_id = new.id);
+    END
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS tracker_category_fts_rename',
+    'DROP TRIGGER IF EXISTS tracker_transaction_fts_delete',
+    'DROP TRIGGER IF EXISTS tracker_transaction_fts_update',
+    'DROP TRIGGER IF EXISTS tracker_transaction_fts_insert',
+    'DROP TABLE IF EXISTS tracker_transaction_fts',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # Other databases fall back to LIKE matching in services/search.py.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_transaction_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSearch',
+            fields=[
+                ('transaction', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='tracker.transaction')),
+                ('note', models.TextField()),
+                ('category', models.TextField()),
+                ('document', models.TextField(db_column='tracker_transaction_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tracker_transaction_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(_run_on_sqlite(CREATE_SQL), _run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:11
+
+import importlib
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+search_migration = importlib.import_module('tracker.migrations.0006_transaction_search')
+
+# The recurring_rule column and constraint rebuild the transaction table on
+# SQLite (in both directions), which breaks on the FTS triggers that name
+# it. They are dropped first and recreated after; see 0009.
+CREATE_TRIGGERS = [sql for sql in search_migration.CREATE_SQL if 'CREATE TRIGGER' in sql]
+DROP_TRIGGERS = [sql for sql in search_migration.DROP_SQL if 'DROP TRIGGER' in sql]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_transaction_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_migration._run_on_sqlite(DROP_TRIGGERS), search_migration._run_on_sqlite(CREATE_TRIGGERS)
+        ),
+        migrations.CreateModel(
+            name='RecurringRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('note', models.TextField(blank=True, null=True)),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly')], default='MONTHLY', max_length=10)),
+                ('interval', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('next_date', models.DateField(editable=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tracker.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['next_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring_rule',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='tracker.recurringrule'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_rule__isnull', False)), fields=('recurring_rule', 'date'), name='unique_recurring_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringrule',
+            index=models.Index(fields=['is_active', 'next_date'], name='tracker_rec_is_acti_d10435_idx'),
+        ),
+        migrations.RunPython(
+            search_migration._run_on_sqlite(CREATE_TRIGGERS), search_migration._run_on_sqlite(DROP_TRIGGERS)
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_recurring_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=7)),
+                ('as_of', models.DateField()),
+                ('spent', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('projected_expense', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('budget_limit', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('breach_probability', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:19
+
+import importlib
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+search_migration = importlib.import_module('tracker.migrations.0006_transaction_search')
+
+# Adding a NOT NULL column makes SQLite rebuild the table, which silently
+# drops the table's own FTS triggers and fails on the others, which name
+# the table being swapped out. They are dropped first and recreated after.
+CREATE_TRIGGERS = [sql for sql in search_migration.CREATE_SQL if 'CREATE TRIGGER' in sql]
+DROP_TRIGGERS = [sql for sql in search_migration.DROP_SQL if 'DROP TRIGGER' in sql]
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows count as last changed when they were created, rather
+    # than all at once when this migration ran.
+    for model_name in ('Category', 'Transaction', 'Budget'):
+        apps.get_model('tracker', model_name).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_spend_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_migration._run_on_sqlite(DROP_TRIGGERS), search_migration._run_on_sqlite(CREATE_TRIGGERS)
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('transaction', 'Transaction'), ('budget', 'Budget')], max_length=11)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='tracker_tra_user_id_74f85d_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'deleted_at', 'id'], name='tracker_tom_user_id_ae492d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tracker_tom_deleted_2d8996_idx'),
+        ),
+        migrations.RunPython(
+            search_migration._run_on_sqlite(CREATE_TRIGGERS), search_migration._run_on_sqlite(DROP_TRIGGERS)
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:36
+
+import importlib
+import tracker.models
+from django.db import migrations, models
+
+
+search_migration = importlib.import_module('tracker.migrations.0006_transaction_search')
+sync_migration = importlib.import_module('tracker.migrations.0009_sync_tombstones')
+
+# The currency column rebuilds the transaction table on SQLite; see 0009.
+CREATE_TRIGGERS = sync_migration.CREATE_TRIGGERS
+DROP_TRIGGERS = sync_migration.DROP_TRIGGERS
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_migration._run_on_sqlite(DROP_TRIGGERS), search_migration._run_on_sqlite(CREATE_TRIGGERS)
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default=tracker.models.base_currency, max_length=3),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+            options={
+                'ordering': ['currency', 'date'],
+                'unique_together': {('currency', 'date')},
+            },
+        ),
+        migrations.RunPython(
+            search_migration._run_on_sqlite(CREATE_TRIGGERS), search_migration._run_on_sqlite(DROP_TRIGGERS)
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 
+def base_currency():
+    """ISO 4217 code of the currency totals are kept in (TRACKER_BASE_CURRENCY)."""
+    return settings.TRACKER_BASE_CURRENCY
+
+
 class Category(models.Model):
     TYPE_INCOME = 'INCOME'
     TYPE_EXPENSE = 'EXPENSE'
@@ -16,6 +24,7 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['user', 'name', 'type']
@@ -28,26 +37,178 @@ class Category(models.Model):
 class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Copy of category.type so filters and aggregates by type need no join.
+    # Set on save; bulk writers and category type changes keep it in step.
+    type = models.CharField(max_length=10, choices=Category.TYPE_CHOICES, editable=False)
     amount = models.DecimalField(
         max_digits=12, 
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.01'))]
     )
+    # ISO 4217 code. Rollups and analytics hold amounts converted to the
+    # base currency at the rate of the transaction's date.
+    currency = models.CharField(max_length=3, default=base_currency)
     date = models.DateField()
     note = models.TextField(blank=True, null=True)
+    # Set on transactions materialized from a recurring rule; together with
+    # the date it is the idempotency key for that occurrence.
+    recurring_rule = models.ForeignKey(
+        'RecurringRule', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='occurrences',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # auto_now only applies to save() and bulk_create(); queryset updates
+    # and raw inserts must set it themselves, or sync clients miss the change.
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
         indexes = [
             models.Index(fields=['user', 'date']),
             models.Index(fields=['user', 'category']),
+            models.Index(fields=['user', '-date', '-created_at', '-id']),
+            models.Index(fields=['user', 'type', 'date']),
+            models.Index(fields=['user', 'updated_at', 'id']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurring_rule', 'date'],
+                condition=models.Q(recurring_rule__isnull=False),
+                name='unique_recurring_occurrence',
+            ),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.category_id is not None:
+            self.type = self.category.type
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'category' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'type'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.category.name}: {self.amount} on {self.date}"
 
 
+class ExchangeRate(models.Model):
+    """
+    Value of one unit of ``currency`` in the base currency on ``date``.
+    
+    Loaded from a local file by the load_exchange_rates command. A
+    transaction is converted with the latest rate on or before its date,
+    or the earliest one after it when it predates every loaded rate.
+    """
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+    
+    class Meta:
+        unique_together = ['currency', 'date']
+        ordering = ['currency', 'date']
+    
+    def __str__(self):
+        return f"{self.currency} on {self.date}: {self.rate}"
+
+
+class RecurringRule(models.Model):
+    """
+    A transaction that repeats every ``interval`` days, weeks or months.
+    
+    ``next_date`` is the first occurrence that has not been materialized
+    yet; the materialize_recurring command creates every occurrence up to
+    today and moves it forward. Monthly rules keep the start date's day of
+    month, falling back to the last day in shorter months.
+    """
+    FREQUENCY_DAILY = 'DAILY'
+    FREQUENCY_WEEKLY = 'WEEKLY'
+    FREQUENCY_MONTHLY = 'MONTHLY'
+    FREQUENCY_CHOICES = [
+        (FREQUENCY_DAILY, 'Daily'),
+        (FREQUENCY_WEEKLY, 'Weekly'),
+        (FREQUENCY_MONTHLY, 'Monthly'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    amount = models.DecimalField(
+        max_digits=12, 
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    note = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=FREQUENCY_MONTHLY)
+    interval = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField(editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['next_date']
+        indexes = [
+            models.Index(fields=['is_active', 'next_date']),
+        ]
+    
+    def clean(self):
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'End date cannot be before the start date.'})
+    
+    def save(self, *args, **kwargs):
+        if self.next_date is None:
+            self.next_date = self.start_date
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        unit = {
+            self.FREQUENCY_DAILY: 'day',
+            self.FREQUENCY_WEEKLY: 'week',
+            self.FREQUENCY_MONTHLY: 'month',
+        }[self.frequency]
+        every = unit if self.interval == 1 else f"{self.interval} {unit}s"
+        return f"{self.category.name}: {self.amount} every {every}"
+
+
+class Match(models.Lookup):
+    """SQLite full-text ``MATCH`` against an FTS5 column."""
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class TransactionSearch(models.Model):
+    """
+    Read-only view of the FTS5 index over transaction notes and category names.
+    
+    The virtual table and the triggers that keep it in sync (including for
+    bulk inserts, queryset updates and category renames) are created by
+    migration 0006 on SQLite only. ``document`` is the FTS5 hidden column
+    named after the table, so ``search__document__match`` searches every
+    indexed column; ``rank`` is the bm25 score, lower is better.
+    """
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+    )
+    note = models.TextField()
+    category = models.TextField()
+    document = models.TextField(db_column='tracker_transaction_fts')
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'tracker_transaction_fts'
+
+
+TransactionSearch._meta.get_field('document').register_lookup(Match)
+
+
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     month = models.CharField(max_length=7)  # Format: YYYY-MM
@@ -57,6 +218,7 @@ class Budget(models.Model):
         validators=[MinValueValidator(Decimal('0.01'))]
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['user', 'month']
@@ -64,3 +226,102 @@ class Budget(models.Model):
     
     def __str__(self):
         return f"Budget for {self.month}: {self.limit_amount}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted category, transaction or budget, for sync clients.
+    
+    Written by the delete signals and by every bulk delete, so the sync
+    endpoint can tell clients what to remove. Rows older than
+    TRACKER_SYNC_TOMBSTONE_DAYS are pruned by the prune_tombstones command.
+    """
+    KIND_CATEGORY = 'category'
+    KIND_TRANSACTION = 'transaction'
+    KIND_BUDGET = 'budget'
+    KIND_CHOICES = [
+        (KIND_CATEGORY, 'Category'),
+        (KIND_TRANSACTION, 'Transaction'),
+        (KIND_BUDGET, 'Budget'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=11, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
+
+
+class SpendForecast(models.Model):
+    """
+    Projected month-end expense and budget breach probability for one user and month.
+    
+    Rows are written for every user at once by the forecast_spending
+    command; the dashboard only reads them.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.CharField(max_length=7)  # Format: YYYY-MM
+    as_of = models.DateField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    projected_expense = models.DecimalField(max_digits=14, decimal_places=2)
+    budget_limit = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    breach_probability = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'month']
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"Forecast for {self.month} as of {self.as_of}: {self.projected_expense}"
+
+
+class DailyCategoryRollup(models.Model):
+    """Pre-aggregated transaction totals per user, day and category."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    date = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'date', 'category']
+        indexes = [
+            models.Index(fields=['category', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} / {self.category_id}: {self.total} ({self.count})"
+
+
+class MonthlyTypeRollup(models.Model):
+    """Pre-aggregated transaction totals per user, month and category type."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.CharField(max_length=7)  # Format: YYYY-MM
+    type = models.CharField(max_length=10, choices=Category.TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'month', 'type']
+    
+    def __str__(self):
+        return f"{self.month} {self.type}: {self.total} ({self.count})"
+
+
+class DataVersion(models.Model):
+    """Changes whenever any of a user's transactions, categories or budgets change."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveBigIntegerField()
+    updated_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Data version for {self.user_id}: {self.version}"
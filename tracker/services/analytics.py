@@ -1,39 +1,36 @@
-from datetime import datetime, date
+import asyncio
+from collections import defaultdict
+from datetime import date
 from decimal import Decimal
-from django.db.models import Sum, Q, Count
-from ..models import Transaction, Category, Budget
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from ..models import Category, Budget, DailyCategoryRollup, MonthlyTypeRollup
+from .cache import cached_monthly
+from .rollups import month_bounds, month_key
 
 
+@cached_monthly('monthly_summary')
 def get_monthly_summary(user, year, month):
     """Get monthly financial summary for a user."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-    
-    transactions = Transaction.objects.filter(
-        user=user,
-        date__gte=start_date,
-        date__lt=end_date
+    month_str = f"{year:04d}-{month:02d}"
+
+    totals = dict(
+        MonthlyTypeRollup.objects.filter(
+            user=user,
+            month=month_str
+        ).values_list('type', 'total')
     )
-    
-    income = transactions.filter(
-        category__type=Category.TYPE_INCOME
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    expense = transactions.filter(
-        category__type=Category.TYPE_EXPENSE
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
+
+    income = totals.get(Category.TYPE_INCOME) or Decimal('0.00')
+    expense = totals.get(Category.TYPE_EXPENSE) or Decimal('0.00')
+
     net = income - expense
-    
+
     # Get budget for the month
-    month_str = f"{year:04d}-{month:02d}"
     budget = Budget.objects.filter(user=user, month=month_str).first()
     budget_limit = budget.limit_amount if budget else None
     budget_remaining = budget_limit - expense if budget_limit else None
-    
+
     return {
         'income': income,
         'expense': expense,
@@ -44,60 +41,49 @@ def get_monthly_summary(user, year, month):
     }
 
 
+@cached_monthly('category_breakdown')
 def get_category_breakdown(user, year, month, limit=10):
     """Get expense breakdown by category for a month."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-    
-    categories = Category.objects.filter(
+    start_date, end_date = month_bounds(year, month)
+
+    categories = DailyCategoryRollup.objects.filter(
         user=user,
-        type=Category.TYPE_EXPENSE
+        category__type=Category.TYPE_EXPENSE,
+        date__gte=start_date,
+        date__lt=end_date
+    ).values(
+        'category_id', 'category__name'
     ).annotate(
-        total_spent=Sum(
-            'transaction__amount',
-            filter=Q(
-                transaction__user=user,
-                transaction__date__gte=start_date,
-                transaction__date__lt=end_date
-            )
-        )
-    ).filter(
-        total_spent__isnull=False
+        total_spent=Sum('total')
     ).order_by('-total_spent')[:limit]
-    
+
     return [
         {
-            'name': cat.name,
-            'amount': cat.total_spent or Decimal('0.00')
+            'name': cat['category__name'],
+            'amount': cat['total_spent'] or Decimal('0.00')
         }
         for cat in categories
     ]
 
 
+@cached_monthly('monthly_chart_data')
 def get_monthly_chart_data(user, year, month):
     """Get data for monthly charts."""
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
-    
+    start_date, end_date = month_bounds(year, month)
+
     # Daily expense data
-    daily_expenses = Transaction.objects.filter(
+    daily_expenses = DailyCategoryRollup.objects.filter(
         user=user,
         category__type=Category.TYPE_EXPENSE,
         date__gte=start_date,
         date__lt=end_date
     ).values('date').annotate(
-        total=Sum('amount')
+        total=Sum('total')
     ).order_by('date')
-    
+
     # Category breakdown for pie chart
     category_data = get_category_breakdown(user, year, month)
-    
+
     return {
         'daily_expenses': [
             {
@@ -114,3 +100,219 @@ def get_monthly_chart_data(user, year, month):
             for item in category_data
         ]
     }
+
+
+@cached_monthly('monthly_summary')
+async def aget_monthly_summary(user, year, month):
+    """Async variant of ``get_monthly_summary``; the totals and budget are fetched concurrently."""
+    month_str = f"{year:04d}-{month:02d}"
+
+    async def fetch_totals():
+        rows = MonthlyTypeRollup.objects.filter(
+            user=user,
+            month=month_str
+        ).values_list('type', 'total')
+        return {category_type: total async for category_type, total in rows}
+
+    totals, budget = await asyncio.gather(
+        fetch_totals(),
+        Budget.objects.filter(user=user, month=month_str).afirst(),
+    )
+
+    income = totals.get(Category.TYPE_INCOME) or Decimal('0.00')
+    expense = totals.get(Category.TYPE_EXPENSE) or Decimal('0.00')
+    budget_limit = budget.limit_amount if budget else None
+    budget_remaining = budget_limit - expense if budget_limit else None
+
+    return {
+        'income': income,
+        'expense': expense,
+        'net': income - expense,
+        'budget_limit': budget_limit,
+        'budget_remaining': budget_remaining,
+        'budget_used_percentage': (expense / budget_limit * 100) if budget_limit and budget_limit > 0 else None,
+    }
+
+
+@cached_monthly('category_breakdown')
+async def aget_category_breakdown(user, year, month, limit=10):
+    """Async variant of ``get_category_breakdown``."""
+    start_date, end_date = month_bounds(year, month)
+
+    categories = DailyCategoryRollup.objects.filter(
+        user=user,
+        category__type=Category.TYPE_EXPENSE,
+        date__gte=start_date,
+        date__lt=end_date
+    ).values(
+        'category_id', 'category__name'
+    ).annotate(
+        total_spent=Sum('total')
+    ).order_by('-total_spent')[:limit]
+
+    return [
+        {
+            'name': cat['category__name'],
+            'amount': cat['total_spent'] or Decimal('0.00')
+        }
+        async for cat in categories
+    ]
+
+
+@cached_monthly('monthly_chart_data')
+async def aget_monthly_chart_data(user, year, month):
+    """Async variant of ``get_monthly_chart_data``; both series are fetched concurrently."""
+    start_date, end_date = month_bounds(year, month)
+
+    async def fetch_daily():
+        rows = DailyCategoryRollup.objects.filter(
+            user=user,
+            category__type=Category.TYPE_EXPENSE,
+            date__gte=start_date,
+            date__lt=end_date
+        ).values('date').annotate(
+            total=Sum('total')
+        ).order_by('date')
+        return [row async for row in rows]
+
+    daily_expenses, category_data = await asyncio.gather(
+        fetch_daily(),
+        aget_category_breakdown(user, year, month),
+    )
+
+    return {
+        'daily_expenses': [
+            {
+                'date': item['date'].strftime('%Y-%m-%d'),
+                'amount': float(item['total'])
+            }
+            for item in daily_expenses
+        ],
+        'category_breakdown': [
+            {
+                'name': item['name'],
+                'amount': float(item['amount'])
+            }
+            for item in category_data
+        ]
+    }
+
+
+def quarter_bounds(year, quarter):
+    """Return the inclusive (start, end) dates of a calendar quarter (1-4)."""
+    first_month = (quarter - 1) * 3 + 1
+    start_date = date(year, first_month, 1)
+    end_date = month_bounds(year, first_month + 2)[1]
+    return start_date, date.fromordinal(end_date.toordinal() - 1)
+
+
+def year_bounds(year):
+    """Return the inclusive (start, end) dates of a calendar year."""
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def _months_between(start_date, end_date):
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def get_range_report(user, start_date, end_date):
+    """
+    Get per-month totals, per-category totals and budget adherence for a date range.
+
+    ``start_date`` and ``end_date`` are inclusive. The figures come from one
+    month-grouped query over the daily rollups plus one budget lookup, so a
+    yearly report costs the same two queries as a quarterly one.
+    """
+    rows = DailyCategoryRollup.objects.filter(
+        user=user,
+        date__gte=start_date,
+        date__lte=end_date
+    ).annotate(
+        month=TruncMonth('date')
+    ).values(
+        'month', 'category_id', 'category__name', 'category__type'
+    ).annotate(
+        amount=Sum('total')
+    ).order_by()
+
+    month_keys = list(_months_between(start_date, end_date))
+    monthly = {
+        key: {Category.TYPE_INCOME: Decimal('0.00'), Category.TYPE_EXPENSE: Decimal('0.00')}
+        for key in month_keys
+    }
+    categories = defaultdict(Decimal)
+    category_info = {}
+
+    for row in rows:
+        monthly[month_key(row['month'])][row['category__type']] += row['amount']
+        categories[row['category_id']] += row['amount']
+        category_info[row['category_id']] = (row['category__name'], row['category__type'])
+
+    budgets = dict(
+        Budget.objects.filter(
+            user=user,
+            month__gte=month_keys[0],
+            month__lte=month_keys[-1]
+        ).values_list('month', 'limit_amount')
+    )
+
+    months = []
+    total_income = total_expense = Decimal('0.00')
+    budgeted_months = within_budget = 0
+    budget_total = budgeted_spend = Decimal('0.00')
+
+    for key in month_keys:
+        income = monthly[key][Category.TYPE_INCOME]
+        expense = monthly[key][Category.TYPE_EXPENSE]
+        total_income += income
+        total_expense += expense
+        budget_limit = budgets.get(key)
+        if budget_limit:
+            budgeted_months += 1
+            budget_total += budget_limit
+            budgeted_spend += expense
+            if expense <= budget_limit:
+                within_budget += 1
+        months.append({
+            'month': key,
+            'income': income,
+            'expense': expense,
+            'net': income - expense,
+            'budget_limit': budget_limit,
+            'budget_remaining': budget_limit - expense if budget_limit else None,
+            'within_budget': expense <= budget_limit if budget_limit else None,
+        })
+
+    ranked = sorted(
+        categories.items(),
+        key=lambda item: (category_info[item[0]][1], -item[1], category_info[item[0]][0])
+    )
+
+    return {
+        'start': start_date,
+        'end': end_date,
+        'months': months,
+        'categories': [
+            {
+                'name': category_info[category_id][0],
+                'type': category_info[category_id][1],
+                'amount': amount,
+            }
+            for category_id, amount in ranked
+        ],
+        'totals': {
+            'income': total_income,
+            'expense': total_expense,
+            'net': total_income - total_expense,
+        },
+        'budget': {
+            'months_budgeted': budgeted_months,
+            'months_within_budget': within_budget,
+            'limit_total': budget_total,
+            'expense_in_budgeted_months': budgeted_spend,
+            'used_percentage': (budgeted_spend / budget_total * 100) if budget_total > 0 else None,
+        },
+    }
@@ -0,0 +1,255 @@
+import functools
+import io
+import json
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from operator import itemgetter
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from ..models import Budget, Category, Transaction, base_currency
+from .cache import bump_data_version
+from .currency import clean_currency, to_base
+from .rollups import BATCH_SIZE, apply_totals
+from .search import deferred_search_indexing
+from .sync import MONTH_RE
+
+
+ARCHIVE_FORMAT = 'expense-tracker-archive'
+ARCHIVE_VERSION = 1
+
+CATEGORY_FIELDS = ('id', 'name', 'type', 'created_at')
+TRANSACTION_FIELDS = ('id', 'category_id', 'amount', 'currency', 'date', 'note', 'created_at')
+BUDGET_FIELDS = ('month', 'limit_amount', 'created_at')
+
+# Transactions restored per INSERT batch. Each batch is sorted by date
+# first, so the date indexes are written in runs instead of at random.
+RESTORE_BATCH_SIZE = 10 * BATCH_SIZE
+
+
+class ArchiveError(Exception):
+    """The archive is malformed or cannot be restored into the account."""
+
+
+class _ZipStream:
+    """Write-only file object that hands ZipFile's output back in chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _ndjson_chunks(queryset, fields):
+    rows = queryset.values_list(*fields).order_by('id').iterator(chunk_size=BATCH_SIZE)
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(fields, row)), default=str))
+        if len(chunk) >= BATCH_SIZE:
+            yield ('\n'.join(chunk) + '\n').encode('utf-8')
+            chunk = []
+    if chunk:
+        yield ('\n'.join(chunk) + '\n').encode('utf-8')
+
+
+def iter_archive(user):
+    """
+    Yield a ZIP archive of a user's categories, transactions and budgets.
+
+    Each model is one NDJSON member. Rows are read with a server-side
+    iterator and compressed in BATCH_SIZE chunks, and every compressed
+    chunk is yielded as soon as it is written, so memory use does not grow
+    with the account size.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('manifest.json', json.dumps({
+            'format': ARCHIVE_FORMAT,
+            'version': ARCHIVE_VERSION,
+            'username': user.username,
+            'exported_at': timezone.now().isoformat(),
+        }))
+        members = [
+            ('categories.ndjson', Category.objects.filter(user=user), CATEGORY_FIELDS),
+            ('transactions.ndjson', Transaction.objects.filter(user=user), TRANSACTION_FIELDS),
+            ('budgets.ndjson', Budget.objects.filter(user=user), BUDGET_FIELDS),
+        ]
+        for name, queryset, fields in members:
+            # The output is not seekable, so sizes cannot be patched in
+            # afterwards; ZIP64 headers allow members over 2 GiB.
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for chunk in _ndjson_chunks(queryset, fields):
+                    member.write(chunk)
+                    yield stream.take()
+    yield stream.take()
+
+
+def _read_ndjson(archive, name):
+    try:
+        member = archive.open(name)
+    except KeyError:
+        raise ArchiveError(f'The archive has no {name}.')
+    with io.TextIOWrapper(member, encoding='utf-8') as lines:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ArchiveError(f'{name} line {number} is not valid JSON.')
+
+
+def restore_archive(user, fileobj):
+    """
+    Restore an archive written by ``iter_archive`` into an empty account.
+
+    Everything happens in one database transaction. Categories are
+    inserted first and their new ids kept in an in-memory map; transactions
+    are then streamed from the archive and inserted in BATCH_SIZE batches
+    with their category ids remapped. The rollups and the search index are
+    written once at the end. Every row is checked against the model fields'
+    validators first; the first invalid row rejects the whole archive.
+    Returns a dict of restored row counts per model.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ArchiveError('Not a ZIP archive.')
+
+    with archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except (KeyError, ValueError):
+            raise ArchiveError('The archive has no valid manifest.json.')
+        if manifest.get('format') != ARCHIVE_FORMAT or manifest.get('version') != ARCHIVE_VERSION:
+            raise ArchiveError('Unsupported archive format or version.')
+
+        with transaction.atomic():
+            if (Category.objects.filter(user=user).exists()
+                    or Transaction.objects.filter(user=user).exists()
+                    or Budget.objects.filter(user=user).exists()):
+                raise ArchiveError(f"User '{user.username}' already has data; restore into an empty account.")
+
+            try:
+                counts = _restore(user, archive)
+            except (KeyError, TypeError, ValueError, ArithmeticError, IntegrityError) as exc:
+                raise ArchiveError(f'Invalid row in the archive: {exc!r}')
+
+    bump_data_version(user.pk)
+    return counts
+
+
+def _clean(model, name, value):
+    # The model field's own validators (max_length, MinValueValidator, and
+    # the digits and decimal places of a DecimalField), since the rows are
+    # written without going through a form or full_clean().
+    field = model._meta.get_field(name)
+    try:
+        return field.clean(value, None)
+    except ValidationError as exc:
+        raise ArchiveError(f"Invalid {model._meta.model_name} {name} {value!r}: {' '.join(exc.messages)}")
+
+
+def _restore(user, archive):
+    rows = list(_read_ndjson(archive, 'categories.ndjson'))
+    for row in rows:
+        row['name'] = _clean(Category, 'name', row['name'])
+        row['type'] = _clean(Category, 'type', row['type'])
+    # Categories and budgets get a new created_at (it is auto_now_add);
+    # transactions keep theirs, since the list orders by it.
+    categories = Category.objects.bulk_create([
+        Category(user=user, name=row['name'], type=row['type'])
+        for row in rows
+    ], batch_size=BATCH_SIZE)
+    # bulk_create returns the new primary keys on SQLite and PostgreSQL.
+    category_map = {row['id']: (category.pk, category.type) for row, category in zip(rows, categories)}
+
+    # Rows go to a plain executemany INSERT, as in the recurring scheduler:
+    # building a million model instances for bulk_create costs more than
+    # the insert. Rollup totals are summed in memory and written once at
+    # the end; an account has far fewer (category, day) pairs than rows.
+    insert = _insert_sql(
+        Transaction,
+        ('user_id', 'category_id', 'type', 'amount', 'currency', 'date', 'note', 'created_at', 'updated_at'),
+    )
+    ops = connection.ops
+    amount_field = Transaction._meta.get_field('amount')
+
+    # Validating and adapting a Decimal costs more than inserting the row;
+    # an account repeats the same amounts many times over.
+    @functools.lru_cache(maxsize=65536)
+    def clean_amount(value):
+        amount = _clean(Transaction, 'amount', value)
+        return amount, ops.adapt_decimalfield_value(amount, amount_field.max_digits, amount_field.decimal_places)
+    updated_at = ops.adapt_datetimefield_value(timezone.now())
+    totals = defaultdict(lambda: [Decimal('0.00'), 0])
+    # Archives written before transactions had a currency are in the base one.
+    currencies = {base_currency(): base_currency()}
+    restored = 0
+    batch = []
+
+    def flush():
+        batch.sort(key=itemgetter(5, 7))
+        cursor.executemany(insert, batch)
+        batch.clear()
+
+    with deferred_search_indexing(), connection.cursor() as cursor:
+        for row in _read_ndjson(archive, 'transactions.ndjson'):
+            category_id, category_type = category_map[row['category_id']]
+            (amount, db_amount), txn_date = clean_amount(row['amount']), date.fromisoformat(row['date'])
+            note = row['note']
+            if note is not None and not isinstance(note, str):
+                raise ArchiveError(f'Invalid transaction note {note!r}.')
+            currency = row.get('currency') or base_currency()
+            if currency not in currencies:
+                currencies[currency] = clean_currency(currency)
+            currency = currencies[currency]
+            created_at = datetime.fromisoformat(row['created_at'])
+            if timezone.is_aware(created_at):
+                # What adapt_datetimefield_value does, without its per-row
+                # settings lookups.
+                created_at = created_at.astimezone(dt_timezone.utc).replace(tzinfo=None)
+            batch.append((
+                user.pk, category_id, category_type,
+                db_amount, currency, txn_date.isoformat(), note, created_at.isoformat(' '), updated_at,
+            ))
+            day_total = totals[(category_id, category_type, txn_date)]
+            day_total[0] += to_base(amount, currency, txn_date)
+            day_total[1] += 1
+            restored += 1
+            if len(batch) >= RESTORE_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    apply_totals(user.pk, (key + tuple(value) for key, value in totals.items()))
+
+    budgets = []
+    for row in _read_ndjson(archive, 'budgets.ndjson'):
+        if not isinstance(row['month'], str) or not MONTH_RE.match(row['month']):
+            raise ArchiveError(f"Invalid budget month {row['month']!r}; expected YYYY-MM.")
+        limit_amount = _clean(Budget, 'limit_amount', row['limit_amount'])
+        budgets.append(Budget(user=user, month=row['month'], limit_amount=limit_amount))
+    Budget.objects.bulk_create(budgets, batch_size=BATCH_SIZE)
+
+    return {'categories': len(categories), 'transactions': restored, 'budgets': len(budgets)}
+
+
+def _insert_sql(model, columns):
+    ops = connection.ops
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        ops.quote_name(model._meta.db_table),
+        ', '.join(ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import DateField, F
+from django.db.models.functions import Cast
+from django.utils import timezone
+from ..models import Transaction
+from .cache import bump_data_version
+from .currency import converted_totals
+from .rollups import apply_totals
+from .sync import delete_transactions
+
+
+ACTION_RECATEGORIZE = 'recategorize'
+ACTION_SHIFT_DATE = 'shift_date'
+ACTION_DELETE = 'delete'
+ACTION_CHOICES = [
+    (ACTION_RECATEGORIZE, 'Move to category'),
+    (ACTION_SHIFT_DATE, 'Shift date'),
+    (ACTION_DELETE, 'Delete'),
+]
+
+
+def bulk_change_transactions(user, queryset, action, category=None, days=0, dry_run=False):
+    """
+    Apply one bulk action to the user's transactions in ``queryset``.
+
+    The change is a single UPDATE over the matching ids, or a DELETE per
+    batch of them, so it costs about the same for ten rows or ten
+    thousand. Model signals do not run: the rollups are adjusted from
+    grouped queries of the affected rows, converted to the base currency
+    in SQL, in the same database transaction, and the FTS triggers keep
+    the search index in step. Changed rows get a new ``updated_at`` and
+    deleted ones a tombstone, for sync clients. With ``dry_run`` nothing
+    changes. Returns the number of transactions matched.
+    """
+    # Re-selecting by id drops the caller's ordering, select_related and
+    # search joins, and scopes the statement to the user whatever it was given.
+    rows = Transaction.objects.filter(user=user, pk__in=queryset.values('pk'))
+    if dry_run:
+        return rows.count()
+
+    with transaction.atomic():
+        totals = converted_totals(rows)
+        now = timezone.now()
+        if action == ACTION_RECATEGORIZE:
+            changed = rows.update(category=category, type=category.type, updated_at=now)
+            moved = [(category.pk, category.type, day, total, count) for _, _, day, total, count in totals]
+        elif action == ACTION_SHIFT_DATE:
+            # Foreign amounts convert at the rate of their new date. The
+            # totals are read first: the caller's filters may stop matching
+            # the rows once their dates have moved.
+            shifted = Cast(F('date') + timedelta(days=days), DateField())
+            moved = converted_totals(rows.annotate(shifted_date=shifted), 'shifted_date')
+            changed = rows.update(date=shifted, updated_at=now)
+        elif action == ACTION_DELETE:
+            # Model.delete() would run the rollup signals once per row.
+            changed = delete_transactions(user.pk, rows)
+            moved = []
+        else:
+            raise ValueError(f'Unknown bulk action {action!r}.')
+
+        apply_totals(user.pk, totals, sign=-1)
+        apply_totals(user.pk, moved)
+
+    if changed:
+        bump_data_version(user.pk)
+    return changed
@@ -0,0 +1,183 @@
+import functools
+import hashlib
+import inspect
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ..models import DataVersion
+
+
+HITS_KEY = 'tracker:analytics:hits'
+MISSES_KEY = 'tracker:analytics:misses'
+
+_MISSING = object()
+
+
+def _new_version():
+    # Nanosecond timestamps are never reused, so a version bumped inside a
+    # rolled-back transaction cannot resurface and match stale entries.
+    return time.time_ns()
+
+
+def get_data_version(user):
+    """Return the (version, updated_at) pair for a user's data, creating it if needed."""
+    user_id = getattr(user, 'pk', user)
+    row = DataVersion.objects.filter(user_id=user_id).values_list('version', 'updated_at').first()
+    if row is None:
+        row = bump_data_version(user_id)
+    return row
+
+
+async def aget_data_version(user):
+    """Async variant of ``get_data_version``."""
+    user_id = getattr(user, 'pk', user)
+    row = await DataVersion.objects.filter(user_id=user_id).values_list('version', 'updated_at').afirst()
+    if row is None:
+        row = await sync_to_async(bump_data_version)(user_id)
+    return row
+
+
+def bump_data_version(user_id=None):
+    """
+    Give a user's data (or everyone's, when user_id is None) a new version.
+
+    Cached analytics are keyed by version, so bumping makes every existing
+    entry for that user unreachable; the backend evicts them in time.
+    """
+    version, updated_at = _new_version(), timezone.now()
+    rows = DataVersion.objects.all()
+    if user_id is None:
+        rows.update(version=version, updated_at=updated_at)
+        return version, updated_at
+
+    if not rows.filter(user_id=user_id).update(version=version, updated_at=updated_at):
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(user_id=user_id, version=version, updated_at=updated_at)
+        except IntegrityError:
+            rows.filter(user_id=user_id).update(version=version, updated_at=updated_at)
+    return version, updated_at
+
+
+def bump_data_versions(user_ids):
+    """Give several users' data a new version with one UPDATE per chunk of ids."""
+    user_ids = list(user_ids)
+    version, updated_at = _new_version(), timezone.now()
+    # Users without a row have nothing cached yet; get_data_version creates it.
+    for start in range(0, len(user_ids), 500):
+        DataVersion.objects.filter(user_id__in=user_ids[start:start + 500]).update(
+            version=version, updated_at=updated_at
+        )
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+async def _acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, timeout=None)
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            pass
+
+
+def cache_stats():
+    """Return the analytics cache hit/miss counters."""
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': values.get(HITS_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+    }
+
+
+def _cache_key(name, user, year, month, version, args, kwargs):
+    extra = ':'.join(
+        [str(arg) for arg in args] + [f'{k}={v}' for k, v in sorted(kwargs.items())]
+    )
+    return f'tracker:{name}:{user.pk}:{year:04d}-{month:02d}:{version}:{extra}'
+
+
+def cached_monthly(name):
+    """
+    Cache a ``func(user, year, month, ...)`` result per user, month and data version.
+
+    Coroutine functions get an async wrapper. The undecorated function
+    stays available as ``func.uncached``.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(user, year, month, *args, **kwargs):
+                version, _ = await aget_data_version(user)
+                key = _cache_key(name, user, year, month, version, args, kwargs)
+
+                value = await cache.aget(key, _MISSING)
+                if value is not _MISSING:
+                    await _acount(HITS_KEY)
+                    return value
+
+                await _acount(MISSES_KEY)
+                value = await func(user, year, month, *args, **kwargs)
+                await cache.aset(key, value, settings.TRACKER_ANALYTICS_CACHE_TIMEOUT)
+                return value
+
+            async_wrapper.uncached = func
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(user, year, month, *args, **kwargs):
+            version, _ = get_data_version(user)
+            key = _cache_key(name, user, year, month, version, args, kwargs)
+            return _get_or_set(key, lambda: func(user, year, month, *args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def cached_per_user(name):
+    """
+    Cache a ``func(user, ...)`` result per user, data version and arguments.
+
+    For results that are not tied to one month, such as the transaction
+    list facets. The arguments are hashed into the key, so they may hold
+    free text. The undecorated function stays available as ``func.uncached``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(user, *args, **kwargs):
+            version, _ = get_data_version(user)
+            extra = repr((args, sorted(kwargs.items())))
+            digest = hashlib.sha1(extra.encode('utf-8')).hexdigest()
+            key = f'tracker:{name}:{user.pk}:{version}:{digest}'
+            return _get_or_set(key, lambda: func(user, *args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def _get_or_set(key, compute):
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count(HITS_KEY)
+        return value
+
+    _count(MISSES_KEY)
+    value = compute()
+    cache.set(key, value, settings.TRACKER_ANALYTICS_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.utils import timezone
+from ..models import RecurringRule, Transaction
+from .cache import bump_data_version
+from .rollups import merge_category
+
+
+def merge_categories(source, target, delete_source=False):
+    """
+    Move every transaction and recurring rule of ``source`` to ``target``.
+
+    The transactions move with one bulk UPDATE (which also sets their
+    denormalized type) and the rollups are shifted in aggregate, all in one
+    database transaction; the FTS triggers re-index the moved rows. With
+    ``delete_source`` the emptied category is deleted afterwards.
+    Returns the number of transactions moved.
+    """
+    if source.pk == target.pk or source.user_id != target.user_id:
+        raise ValueError('Transactions can only move to another category of the same user.')
+
+    with transaction.atomic():
+        moved = Transaction.objects.filter(category=source).update(
+            category=target, type=target.type, updated_at=timezone.now()
+        )
+        RecurringRule.objects.filter(category=source).update(category=target)
+        merge_category(source, target)
+        if delete_source:
+            source.delete()
+
+    bump_data_version(source.user_id)
+    return moved
@@ -0,0 +1,118 @@
+import bisect
+import re
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from ..models import ExchangeRate, base_currency
+
+
+CENTS = Decimal('0.01')
+CURRENCY_RE = re.compile(r'^[A-Z]{3}$')
+
+# Rates read in the current request (or command), per currency: a sorted
+# list of dates and the matching rates. Cleared when a request starts and
+# whenever the rate table changes, so a dashboard or an import touching
+# many foreign transactions reads each currency's rates once.
+_cache = threading.local()
+
+
+class ExchangeRateError(ValueError):
+    """A rate file row or a currency code is invalid."""
+
+
+def clear_rate_cache():
+    _cache.series = {}
+    _cache.known = None
+
+
+def _series(currency):
+    if getattr(_cache, 'series', None) is None:
+        clear_rate_cache()
+    if currency not in _cache.series:
+        rows = list(ExchangeRate.objects.filter(currency=currency).order_by('date').values_list('date', 'rate'))
+        _cache.series[currency] = ([day for day, _ in rows], [rate for _, rate in rows])
+    return _cache.series[currency]
+
+
+def known_currencies():
+    """The base currency followed by every currency with a loaded rate."""
+    if getattr(_cache, 'series', None) is None:
+        clear_rate_cache()
+    if _cache.known is None:
+        base = base_currency()
+        others = ExchangeRate.objects.exclude(currency=base).values_list('currency', flat=True)
+        _cache.known = [base] + sorted(set(others))
+    return _cache.known
+
+
+def clean_currency(value):
+    """Return ``value`` as an upper-case code, or raise ExchangeRateError if it has no rates."""
+    code = (value or '').strip().upper()
+    if code not in known_currencies():
+        raise ExchangeRateError(f"Unknown currency '{value}'; load its exchange rates first.")
+    return code
+
+
+def get_rate(currency, day):
+    """
+    Base-currency value of one unit of ``currency`` on ``day``.
+
+    The latest rate on or before the day is used, or the earliest one
+    after it for days before the first loaded rate; this is the same rate
+    ``converted_amount`` picks in SQL.
+    """
+    if currency == base_currency():
+        return Decimal('1')
+    dates, rates = _series(currency)
+    if not dates:
+        return Decimal('1')
+    index = bisect.bisect_right(dates, day)
+    return rates[index - 1] if index else rates[0]
+
+
+def to_base(amount, currency, day):
+    """Convert one amount to the base currency, rounded to cents like the SQL conversion."""
+    if currency == base_currency():
+        return amount
+    return (Decimal(amount) * get_rate(currency, day)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def converted_amount(date_field='date'):
+    """
+    Expression for a transaction's amount in the base currency.
+
+    Foreign amounts are multiplied by a correlated subquery on the rate
+    table, at the rate of ``date_field``, and rounded to cents per row, so
+    ``Sum(converted_amount())`` converts inside the aggregation itself.
+    """
+    on_or_before = ExchangeRate.objects.filter(
+        currency=OuterRef('currency'), date__lte=OuterRef(date_field)
+    ).order_by('-date').values('rate')[:1]
+    earliest = ExchangeRate.objects.filter(currency=OuterRef('currency')).order_by('date').values('rate')[:1]
+    output = DecimalField(max_digits=14, decimal_places=2)
+    return Case(
+        When(currency=base_currency(), then=F('amount')),
+        default=Round(
+            F('amount') * Coalesce(Subquery(on_or_before), Subquery(earliest), Value(Decimal('1'))),
+            2,
+            output_field=output,
+        ),
+        output_field=output,
+    )
+
+
+def converted_totals(transactions, date_field='date'):
+    """
+    Group a transaction queryset into rollup rows in the base currency.
+
+    Returns (category_id, type, date, total, count) tuples, as taken by
+    ``rollups.apply_totals``, from one grouped query. ``date_field`` may
+    name an annotation to group and convert by instead of the stored date.
+    """
+    return [
+        (row['category_id'], row['type'], row[date_field], row['total'], row['count'])
+        for row in transactions.values('category_id', 'type', date_field).annotate(
+            total=Sum(converted_amount(date_field)), count=Count('id')
+        ).order_by()
+    ]
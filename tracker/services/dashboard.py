@@ -0,0 +1,143 @@
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+from ..models import Category, Budget, DailyCategoryRollup
+from .cache import cached_monthly
+from .rollups import month_bounds
+
+
+# Expense categories listed in the breakdown, largest first.
+TOP_CATEGORIES = 10
+
+
+class DashboardSnapshot:
+    """
+    Summary, category breakdown and chart series for one user and month.
+
+    Everything is derived in Python from the month's daily rollup rows and
+    the budget, so building a snapshot costs two queries regardless of how
+    many categories or transactions the user has.
+    """
+
+    def __init__(self, user, year, month, limit=TOP_CATEGORIES, state=None):
+        self.user = user
+        self.year = year
+        self.month = month
+        self.limit = limit
+        if state is None:
+            state = _load_state(user, year, month, limit)
+        self.summary = state['summary']
+        self.category_breakdown = state['category_breakdown']
+        self.daily_expenses = state['daily_expenses']
+
+    @classmethod
+    def for_month(cls, user, year, month, limit=TOP_CATEGORIES):
+        """Return a snapshot, reusing the cached one while the user's data is unchanged."""
+        return cls(user, year, month, limit, state=_cached_state(user, year, month, limit))
+
+    @classmethod
+    async def afor_month(cls, user, year, month, limit=TOP_CATEGORIES):
+        """Async variant of ``for_month``."""
+        return cls(user, year, month, limit, state=await _acached_state(user, year, month, limit))
+
+    @classmethod
+    def from_rows(cls, user, year, month, rows, budget, limit=TOP_CATEGORIES):
+        """
+        Build a snapshot from rollup rows the caller already loaded.
+
+        ``rows`` yields (date, category_id, name, type, total) tuples for
+        the month and ``budget`` is its Budget or None, so snapshots of many
+        users can be derived from a few shared queries.
+        """
+        return cls(user, year, month, limit, state=_build_state(rows, budget, limit))
+
+    @property
+    def chart_data(self):
+        """Chart payload in the same shape as ``get_monthly_chart_data``."""
+        return {
+            'daily_expenses': [
+                {
+                    'date': day.strftime('%Y-%m-%d'),
+                    'amount': float(amount)
+                }
+                for day, amount in self.daily_expenses
+            ],
+            'category_breakdown': [
+                {
+                    'name': item['name'],
+                    'amount': float(item['amount'])
+                }
+                for item in self.category_breakdown
+            ]
+        }
+
+
+def _build_summary(income, expense, budget_limit):
+    budget_remaining = budget_limit - expense if budget_limit else None
+    return {
+        'income': income,
+        'expense': expense,
+        'net': income - expense,
+        'budget_limit': budget_limit,
+        'budget_remaining': budget_remaining,
+        'budget_used_percentage': (expense / budget_limit * 100) if budget_limit and budget_limit > 0 else None,
+    }
+
+
+def _rollup_rows(user, year, month):
+    start_date, end_date = month_bounds(year, month)
+    return DailyCategoryRollup.objects.filter(
+        user=user,
+        date__gte=start_date,
+        date__lt=end_date
+    ).values_list('date', 'category_id', 'category__name', 'category__type', 'total')
+
+
+def _budget(user, year, month):
+    return Budget.objects.filter(user=user, month=f"{year:04d}-{month:02d}")
+
+
+def _build_state(rows, budget, limit):
+    totals = {Category.TYPE_INCOME: Decimal('0.00'), Category.TYPE_EXPENSE: Decimal('0.00')}
+    by_category = defaultdict(Decimal)
+    names = {}
+    by_day = defaultdict(Decimal)
+
+    for day, category_id, name, category_type, total in rows:
+        totals[category_type] += total
+        if category_type == Category.TYPE_EXPENSE:
+            by_category[category_id] += total
+            names[category_id] = name
+            by_day[day] += total
+
+    ranked = sorted(by_category.items(), key=lambda item: (-item[1], names[item[0]]))
+    return {
+        'summary': _build_summary(
+            totals[Category.TYPE_INCOME],
+            totals[Category.TYPE_EXPENSE],
+            budget.limit_amount if budget else None,
+        ),
+        'category_breakdown': [
+            {'name': names[category_id], 'amount': amount}
+            for category_id, amount in ranked[:limit]
+        ],
+        'daily_expenses': sorted(by_day.items()),
+    }
+
+
+def _load_state(user, year, month, limit):
+    rows = list(_rollup_rows(user, year, month))
+    budget = _budget(user, year, month).first()
+    return _build_state(rows, budget, limit)
+
+
+async def _aload_state(user, year, month, limit):
+    async def fetch_rows():
+        return [row async for row in _rollup_rows(user, year, month)]
+
+    rows, budget = await asyncio.gather(fetch_rows(), _budget(user, year, month).afirst())
+    return _build_state(rows, budget, limit)
+
+
+_cached_state = cached_monthly('dashboard')(_load_state)
+_acached_state = cached_monthly('dashboard')(_aload_state)
@@ -0,0 +1,71 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from ..models import ExchangeRate, Transaction, base_currency
+from .cache import bump_data_version
+from .currency import CURRENCY_RE, ExchangeRateError, clear_rate_cache
+from .rollups import BATCH_SIZE, rebuild_rollups
+
+
+def read_rates(lines):
+    """
+    Parse a rate file with ``date``, ``currency`` and ``rate`` columns.
+
+    Returns a list of unsaved ExchangeRate objects; raises
+    ExchangeRateError naming the first invalid line.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    if not reader.fieldnames or not {'date', 'currency', 'rate'} <= set(reader.fieldnames):
+        raise ExchangeRateError('The rate file needs date, currency and rate columns.')
+
+    rates = {}
+    for row in reader:
+        line = reader.line_num
+        try:
+            day = date.fromisoformat((row['date'] or '').strip())
+        except ValueError:
+            raise ExchangeRateError(f"Line {line}: invalid date '{row['date']}', expected YYYY-MM-DD.")
+        currency = (row['currency'] or '').strip().upper()
+        if not CURRENCY_RE.match(currency) or currency == base_currency():
+            raise ExchangeRateError(f"Line {line}: invalid currency '{row['currency']}'.")
+        try:
+            rate = Decimal((row['rate'] or '').strip())
+        except InvalidOperation:
+            raise ExchangeRateError(f"Line {line}: invalid rate '{row['rate']}'.")
+        if not rate.is_finite() or rate <= 0 or rate >= Decimal('1e10'):
+            raise ExchangeRateError(f"Line {line}: rate '{row['rate']}' is out of range.")
+        # A later row for the same currency and day replaces the earlier one.
+        rates[(currency, day)] = ExchangeRate(currency=currency, date=day, rate=rate)
+    return list(rates.values())
+
+
+def load_rates(rates):
+    """
+    Insert or replace exchange rates and re-convert the affected totals.
+
+    The rates are upserted by (currency, date); every user with
+    transactions in one of those currencies then has their rollups rebuilt,
+    which converts the amounts again in SQL, and gets a new data version.
+    Returns the number of users rebuilt.
+    """
+    currencies = {rate.currency for rate in rates}
+    with transaction.atomic():
+        ExchangeRate.objects.bulk_create(
+            rates,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['currency', 'date'],
+            update_fields=['rate'],
+        )
+        user_ids = list(
+            Transaction.objects.filter(currency__in=currencies).values_list('user_id', flat=True).distinct()
+        )
+        for user_id in user_ids:
+            rebuild_rollups(user=user_id)
+    clear_rate_cache()
+    for user_id in user_ids:
+        bump_data_version(user_id)
+    return len(user_ids)
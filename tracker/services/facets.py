@@ -0,0 +1,60 @@
+from collections import Counter
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from ..models import Category, DailyCategoryRollup, Transaction
+from .cache import cached_per_user
+from .rollups import month_key
+from .search import search_terms, search_transactions
+
+
+@cached_per_user('transaction_facets')
+def get_transaction_facets(user, date_from=None, date_to=None, category_id=None, transaction_type=None, query=''):
+    """
+    Count a user's transactions per category, type and month under the list filters.
+
+    One grouped query counts the rows matching the date range and search
+    per (category, type, month); the facets are summed from its rows. The
+    category counts ignore the category filter and the type counts ignore
+    the type filter, so each shows what picking another value would match;
+    the month counts and ``total`` apply every filter. Without a search the
+    query reads the daily rollups instead of the transactions.
+
+    Returns ``{'total', 'categories': {id: count}, 'types': {type: count},
+    'months': [{'month': 'YYYY-MM', 'count'}]}``, newest month first.
+    """
+    if search_terms(query or ''):
+        rows = Transaction.objects.filter(user=user)
+        if date_from:
+            rows = rows.filter(date__gte=date_from)
+        if date_to:
+            rows = rows.filter(date__lte=date_to)
+        rows = search_transactions(rows, query).annotate(month=TruncMonth('date')).values_list(
+            'category_id', 'type', 'month'
+        ).annotate(count=Count('id'))
+    else:
+        rows = DailyCategoryRollup.objects.filter(user=user)
+        if date_from:
+            rows = rows.filter(date__gte=date_from)
+        if date_to:
+            rows = rows.filter(date__lte=date_to)
+        rows = rows.annotate(month=TruncMonth('date')).values_list(
+            'category_id', 'category__type', 'month'
+        ).annotate(count=Sum('count'))
+
+    categories, types, months = Counter(), Counter(), Counter()
+    for row_category_id, row_type, month, count in rows.order_by():
+        category_match = not category_id or str(row_category_id) == str(category_id)
+        type_match = not transaction_type or row_type == transaction_type
+        if type_match:
+            categories[row_category_id] += count
+        if category_match:
+            types[row_type] += count
+        if category_match and type_match:
+            months[month_key(month)] += count
+
+    return {
+        'total': sum(months.values()),
+        'categories': dict(categories),
+        'types': {category_type: types[category_type] for category_type, _ in Category.TYPE_CHOICES},
+        'months': [{'month': month, 'count': months[month]} for month in sorted(months, reverse=True)],
+    }
@@ -0,0 +1,150 @@
+import calendar
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from django.db.models import CharField, FloatField, Sum
+from django.db.models.functions import Cast
+from ..models import Budget, Category, DailyCategoryRollup, SpendForecast
+from .rollups import BATCH_SIZE, month_key
+
+
+# Full months before the forecast month that the daily spending rate and
+# its spread are learned from.
+HISTORY_MONTHS = 3
+# Weight of the historical daily mean, in days, against the days of the
+# month so far: early in the month the history dominates, later the
+# month's own pace does.
+PRIOR_DAYS = 14
+
+
+def _normal_sf(z):
+    """Survival function of the standard normal distribution, vectorized."""
+    # Abramowitz & Stegun 7.1.26; absolute error below 1.5e-7.
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    tail = 0.5 * poly * np.exp(-x * x)
+    return np.where(z >= 0, tail, 1 - tail)
+
+
+def _history_start(year, month):
+    month_index = year * 12 + month - 1 - HISTORY_MONTHS
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def forecast_month(as_of=None):
+    """
+    Forecast month-end expense for every user and store it in SpendForecast.
+
+    One grouped query loads each user's daily expense from the start of
+    the history window through ``as_of`` (today by default); the forecast
+    for the month of ``as_of`` is then computed for all users at once:
+
+    * the daily rate blends the month-to-date pace with the historical
+      daily mean, weighted as PRIOR_DAYS days;
+    * the remaining days are assumed to spend that rate with the daily
+      variance seen since the user's first expense in the window;
+    * the breach probability is the normal tail of the projected total
+      above the month's budget, or 1 once the budget is already spent.
+
+    Users with expenses in the window or a budget for the month are scored.
+    Returns the number of forecasts written.
+    """
+    as_of = as_of or date.today()
+    month = month_key(as_of)
+    start = _history_start(as_of.year, as_of.month)
+    month_offset = (as_of.replace(day=1) - start).days
+    n_days = (as_of - start).days + 1
+    days_in_month = calendar.monthrange(as_of.year, as_of.month)[1]
+
+    # ISO text and floats go straight into arrays, without the ORM's
+    # per-row date and Decimal conversions; see patterns.load_expense_matrix.
+    rows = list(DailyCategoryRollup.objects.filter(
+        category__type=Category.TYPE_EXPENSE,
+        date__gte=start,
+        date__lte=as_of,
+    ).annotate(day=Cast('date', CharField())).values_list('user_id', 'day').annotate(
+        total=Cast(Sum('total'), FloatField())
+    ).order_by())
+    budgets = dict(Budget.objects.filter(month=month).values_list('user_id', 'limit_amount'))
+    budget_users = np.fromiter(budgets, dtype=np.int64, count=len(budgets))
+    if rows:
+        row_users, dates, totals = zip(*rows)
+        row_users = np.array(row_users, dtype=np.int64)
+    else:
+        row_users = np.empty(0, dtype=np.int64)
+    user_ids = np.union1d(row_users, budget_users)
+    if not len(user_ids):
+        return 0
+
+    matrix = np.zeros((len(user_ids), n_days))
+    first_day = np.full(len(user_ids), month_offset)
+    if rows:
+        user_index = np.searchsorted(user_ids, row_users)
+        day_index = (np.array(dates, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+        np.add.at(matrix, (user_index, day_index), np.array(totals, dtype=np.float64))
+        np.minimum.at(first_day, user_index, day_index)
+    limits = np.full(len(user_ids), np.nan)
+    limits[np.searchsorted(user_ids, budget_users)] = np.array(list(budgets.values()), dtype=np.float64)
+
+    elapsed = as_of.day
+    remaining = days_in_month - as_of.day
+    spent = matrix[:, month_offset:].sum(axis=1)
+
+    history_days = month_offset - first_day
+    with np.errstate(divide='ignore', invalid='ignore'):
+        history_mean = np.where(
+            history_days > 0, matrix[:, :month_offset].sum(axis=1) / history_days, spent / elapsed
+        )
+    rate = (spent + PRIOR_DAYS * history_mean) / (elapsed + PRIOR_DAYS)
+
+    # Variance of the daily totals since each user's first expense.
+    active = np.arange(n_days) >= first_day[:, None]
+    active_days = active.sum(axis=1)
+    mean = (matrix * active).sum(axis=1) / active_days
+    variance = np.clip((matrix ** 2 * active).sum(axis=1) / active_days - mean ** 2, 0, None)
+
+    projected = spent + remaining * rate
+    spread = np.sqrt(variance * remaining)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probability = np.where(
+            spread > 0, _normal_sf((limits - projected) / spread), (projected > limits).astype(float)
+        )
+    probability = np.where(spent > limits, 1.0, probability)
+
+    forecasts = [
+        SpendForecast(
+            user_id=user_id,
+            month=month,
+            as_of=as_of,
+            spent=Decimal(f'{user_spent:.2f}'),
+            projected_expense=Decimal(f'{user_projected:.2f}'),
+            budget_limit=budgets.get(user_id),
+            breach_probability=None if user_id not in budgets else round(user_probability, 4),
+        )
+        for user_id, user_spent, user_projected, user_probability in zip(
+            user_ids.tolist(), spent.tolist(), projected.tolist(), probability.tolist()
+        )
+    ]
+    SpendForecast.objects.bulk_create(
+        forecasts,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['user', 'month'],
+        update_fields=['as_of', 'spent', 'projected_expense', 'budget_limit', 'breach_probability', 'updated_at'],
+    )
+    return len(forecasts)
+
+
+def _forecast(user, year, month):
+    return SpendForecast.objects.filter(user=user, month=f"{year:04d}-{month:02d}")
+
+
+def get_forecast(user, year, month):
+    """The stored forecast for a user and month, or None."""
+    return _forecast(user, year, month).first()
+
+
+async def aget_forecast(user, year, month):
+    """Async variant of ``get_forecast``."""
+    return await _forecast(user, year, month).afirst()
@@ -0,0 +1,176 @@
+import csv
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from ..models import Category, Transaction, base_currency
+from .cache import bump_data_version
+from .currency import ExchangeRateError, clean_currency, converted_totals
+from .rollups import BATCH_SIZE, apply_totals
+
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+MAX_AMOUNT = Decimal('9999999999.99')
+
+
+class ImportResult:
+    """Outcome of a transaction import: counts, timing and per-row errors."""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.categories_created = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class TransactionImporter:
+    """
+    Import transactions for one user from CSV text.
+
+    The file is read as a stream with the same columns as the CSV export
+    (Date, Category, Type, Amount, Currency, Note). When the Type column is
+    missing or blank, negative amounts are imported as expenses and
+    positive ones as income, which matches most bank statement exports.
+    A missing or blank Currency means the base currency; any other must
+    have exchange rates loaded. Rows are
+    validated and inserted in batches, one atomic transaction per batch.
+    """
+
+    def __init__(self, user, batch_size=DEFAULT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self._categories = {
+            (name.lower(), category_type): category_id
+            for category_id, name, category_type in Category.objects.filter(
+                user=user
+            ).values_list('id', 'name', 'type')
+        }
+
+    def run(self, lines):
+        result = ImportResult()
+        started = time.perf_counter()
+
+        reader = csv.DictReader(lines)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+        batch = []
+        try:
+            for row in reader:
+                result.rows += 1
+                line = reader.line_num
+                try:
+                    batch.append(self._parse_row(row))
+                except ValueError as exc:
+                    result.add_error(line, str(exc))
+                    continue
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, result)
+                    batch = []
+            if batch:
+                self._flush(batch, result)
+        finally:
+            if result.created:
+                bump_data_version(self.user.pk)
+            result.elapsed = time.perf_counter() - started
+
+        return result
+
+    def _parse_row(self, row):
+        raw_date = (row.get('date') or '').strip()
+        try:
+            txn_date = date.fromisoformat(raw_date)
+        except ValueError:
+            raise ValueError(f"Invalid date '{raw_date}', expected YYYY-MM-DD.")
+
+        name = (row.get('category') or '').strip()
+        if not name:
+            raise ValueError('Category is required.')
+        if len(name) > 100:
+            raise ValueError('Category name is longer than 100 characters.')
+
+        raw_amount = (row.get('amount') or '').strip().replace(',', '')
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount '{raw_amount}'.")
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount '{raw_amount}'.")
+
+        category_type = (row.get('type') or '').strip().upper()
+        if not category_type:
+            category_type = Category.TYPE_EXPENSE if amount < 0 else Category.TYPE_INCOME
+        elif category_type not in (Category.TYPE_INCOME, Category.TYPE_EXPENSE):
+            raise ValueError(f"Invalid type '{category_type}', expected INCOME or EXPENSE.")
+
+        amount = abs(amount).quantize(Decimal('0.01'))
+        if amount < Decimal('0.01') or amount > MAX_AMOUNT:
+            raise ValueError(f"Amount '{raw_amount}' is out of range.")
+
+        currency = (row.get('currency') or '').strip() or base_currency()
+        try:
+            currency = clean_currency(currency)
+        except ExchangeRateError as exc:
+            raise ValueError(str(exc))
+
+        note = (row.get('note') or '').strip() or None
+        return txn_date, name, category_type, amount, currency, note
+
+    def _resolve_categories(self, batch, result):
+        missing = {}
+        for _, name, category_type, _, _, _ in batch:
+            key = (name.lower(), category_type)
+            if key not in self._categories and key not in missing:
+                missing[key] = Category(user=self.user, name=name, type=category_type)
+        if not missing:
+            return
+
+        # ignore_conflicts skips names another import created meanwhile, so
+        # only the rows that appeared are counted.
+        categories = Category.objects.filter(user=self.user)
+        before = categories.count()
+        Category.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        result.categories_created += categories.count() - before
+        names = {category.name for category in missing.values()}
+        for category_id, name, category_type in Category.objects.filter(
+            user=self.user, name__in=names
+        ).values_list('id', 'name', 'type'):
+            self._categories[(name.lower(), category_type)] = category_id
+
+    def _flush(self, batch, result):
+        with transaction.atomic():
+            self._resolve_categories(batch, result)
+            created = Transaction.objects.bulk_create([
+                Transaction(
+                    user=self.user,
+                    category_id=self._categories[(name.lower(), category_type)],
+                    type=category_type,
+                    amount=amount,
+                    currency=currency,
+                    date=txn_date,
+                    note=note,
+                )
+                for txn_date, name, category_type, amount, currency, note in batch
+            ])
+            # bulk_create bypasses the model signals, so the rollups are
+            # updated here, in the same transaction as the rows, from one
+            # grouped query per chunk that converts to the base currency.
+            ids = [txn.pk for txn in created]
+            apply_totals(self.user.pk, [
+                row
+                for start in range(0, len(ids), BATCH_SIZE)
+                for row in converted_totals(Transaction.objects.filter(pk__in=ids[start:start + BATCH_SIZE]))
+            ])
+        result.created += len(batch)
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import date, datetime
+from django.db.models import Q
+
+
+KEYSET_ORDERING = ('-date', '-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, direction):
+    """Encode an opaque token pointing just past ``obj`` in ``direction`` ('next' or 'prev')."""
+    payload = {
+        'd': obj.date.isoformat(),
+        'c': obj.created_at.isoformat(),
+        'i': obj.pk,
+        'p': direction == 'prev',
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token into (date, created_at, id, is_previous)."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        return (
+            date.fromisoformat(payload['d']),
+            datetime.fromisoformat(payload['c']),
+            int(payload['i']),
+            bool(payload['p']),
+        )
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+
+    ``total`` is computed lazily from the callable passed in, so the page
+    itself never issues a COUNT(*).
+    """
+
+    def __init__(self, object_list, has_next, has_previous, count_func=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self._count_func = count_func
+        self._total = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page:
+            return None
+        return encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page:
+            return None
+        return encode_cursor(self.object_list[0], 'prev')
+
+    @property
+    def total(self):
+        if self._total is None and self._count_func is not None:
+            self._total = self._count_func()
+        return self._total
+
+
+def paginate_keyset(queryset, cursor=None, per_page=20, count_func=None):
+    """
+    Return a KeysetPage of ``queryset`` ordered by (-date, -created_at, -id).
+
+    Rows are located with a range predicate on the ordering key instead of
+    an OFFSET, so every page costs the same no matter how deep it is.
+    """
+    if not cursor:
+        rows = list(queryset.order_by(*KEYSET_ORDERING)[:per_page + 1])
+        return KeysetPage(rows[:per_page], len(rows) > per_page, False, count_func)
+
+    key_date, key_created, key_id, is_previous = decode_cursor(cursor)
+    if is_previous:
+        # Rows that sort before the key: walk the index backwards and flip.
+        after = (
+            Q(date__gt=key_date)
+            | Q(date=key_date, created_at__gt=key_created)
+            | Q(date=key_date, created_at=key_created, id__gt=key_id)
+        )
+        rows = list(queryset.filter(after).order_by('date', 'created_at', 'id')[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        return KeysetPage(rows, True, has_more, count_func)
+
+    before = (
+        Q(date__lt=key_date)
+        | Q(date=key_date, created_at__lt=key_created)
+        | Q(date=key_date, created_at=key_created, id__lt=key_id)
+    )
+    rows = list(queryset.filter(before).order_by(*KEYSET_ORDERING)[:per_page + 1])
+    return KeysetPage(rows[:per_page], len(rows) > per_page, True, count_func)
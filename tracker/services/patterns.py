@@ -0,0 +1,170 @@
+from datetime import date, timedelta
+import numpy as np
+from django.db.models import CharField, FloatField
+from django.db.models.functions import Cast
+from ..models import Category, DailyCategoryRollup
+from .cache import cached_monthly
+from .rollups import month_bounds
+
+
+ROLLING_WINDOWS = (7, 30)
+BASELINE_DAYS = 28
+ANOMALY_Z_SCORE = 3.0
+RECENT_DAYS = 90
+VOLATILITY_WEEKS = 52
+TOP_VOLATILE = 5
+
+
+def load_expense_matrix(user, end):
+    """
+    Load a user's daily expenses up to ``end`` (inclusive) with one query.
+
+    Returns (first_day, category_ids, names, matrix). ``matrix`` has one
+    row per category and one column per day from ``first_day`` through
+    ``end``; days without expenses are zero.
+    """
+    # The date and total are read as ISO text and a float: the rows go
+    # straight into arrays, and the ORM's per-row date and Decimal
+    # conversions cost more than the analysis itself.
+    rows = list(DailyCategoryRollup.objects.filter(
+        user=user,
+        category__type=Category.TYPE_EXPENSE,
+        date__lte=end,
+    ).values_list('category_id', 'category__name', Cast('date', CharField()), Cast('total', FloatField())))
+    if not rows:
+        return end, np.empty(0, dtype=np.int64), {}, np.zeros((0, 0))
+
+    category_ids, names, dates, totals = zip(*rows)
+    days = np.array(dates, dtype='datetime64[D]')
+    first_day = days.min()
+    ids, category_index = np.unique(np.array(category_ids, dtype=np.int64), return_inverse=True)
+
+    matrix = np.zeros((len(ids), (np.datetime64(end, 'D') - first_day).astype(np.int64) + 1))
+    np.add.at(matrix, (category_index, (days - first_day).astype(np.int64)), np.array(totals, dtype=np.float64))
+    return first_day.item(), ids, dict(zip(category_ids, names)), matrix
+
+
+def _window_sums(series, window):
+    """Sum of each trailing ``window``-day window; NaN until the window is full."""
+    sums = np.full(series.shape, np.nan)
+    if len(series) >= window:
+        cumulative = np.concatenate(([0.0], np.cumsum(series)))
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def _period_change(series, window, offset):
+    """Compare the last ``window`` days with the ``window`` days ``offset`` days earlier."""
+    if len(series) < window + offset:
+        return None
+    current = float(series[-window:].sum())
+    previous = float(series[len(series) - window - offset:len(series) - offset].sum())
+    return {
+        'current': round(current, 2),
+        'previous': round(previous, 2),
+        'change': round(current - previous, 2),
+        'change_pct': round((current - previous) / previous * 100, 1) if previous else None,
+    }
+
+
+def _anomalies(first_day, series):
+    # Each day is scored against the BASELINE_DAYS days before it.
+    sums = _window_sums(series, BASELINE_DAYS)
+    squares = _window_sums(series ** 2, BASELINE_DAYS)
+    mean = np.full(series.shape, np.nan)
+    std = np.full(series.shape, np.nan)
+    mean[1:] = sums[:-1] / BASELINE_DAYS
+    std[1:] = np.sqrt(np.clip(squares[:-1] / BASELINE_DAYS - mean[1:] ** 2, 0, None))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = (series - mean) / std
+    recent = np.zeros(series.shape, dtype=bool)
+    recent[-RECENT_DAYS:] = True
+    flagged = np.flatnonzero(recent & (std > 0) & (z_scores >= ANOMALY_Z_SCORE))[::-1]
+
+    day_labels = np.datetime_as_string(np.datetime64(first_day, 'D') + flagged)
+    return [
+        {'date': label, 'amount': amount, 'baseline': baseline, 'z_score': z_score}
+        for label, amount, baseline, z_score in zip(
+            day_labels.tolist(),
+            np.round(series[flagged], 2).tolist(),
+            np.round(mean[flagged], 2).tolist(),
+            np.round(z_scores[flagged], 1).tolist(),
+        )
+    ]
+
+
+def _volatility(ids, names, matrix):
+    weeks = min(matrix.shape[1] // 7, VOLATILITY_WEEKS)
+    if weeks < 2 or not len(ids):
+        return []
+    weekly = matrix[:, -weeks * 7:].reshape(len(ids), weeks, 7).sum(axis=2)
+    mean = weekly.mean(axis=1)
+    std = weekly.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variation = np.where(mean > 0, std / mean, 0.0)
+    top = np.argsort(-variation, kind='stable')[:TOP_VOLATILE]
+    top = top[mean[top] > 0]
+    return [
+        {'name': names[category_id], 'weekly_mean': weekly_mean, 'weekly_std': weekly_std, 'variation': cv}
+        for category_id, weekly_mean, weekly_std, cv in zip(
+            ids[top].tolist(),
+            np.round(mean[top], 2).tolist(),
+            np.round(std[top], 2).tolist(),
+            np.round(variation[top], 2).tolist(),
+        )
+    ]
+
+
+def analyze_patterns(user, end):
+    """Spending patterns of a user's daily expenses up to ``end``."""
+    first_day, ids, names, matrix = load_expense_matrix(user, end)
+    series = matrix.sum(axis=0)
+
+    averages = {
+        window: np.round(_window_sums(series, window) / window, 2)
+        for window in ROLLING_WINDOWS
+    }
+    recent = slice(max(len(series) - RECENT_DAYS, 0), None)
+    day_labels = np.datetime_as_string(
+        np.datetime64(first_day, 'D') + np.arange(len(series))[recent]
+    ).tolist()
+
+    def latest(values):
+        return float(values[-1]) if len(values) and not np.isnan(values[-1]) else None
+
+    return {
+        'as_of': end.isoformat(),
+        'days': len(series),
+        'average_7d': latest(averages[7]),
+        'average_30d': latest(averages[30]),
+        'week_over_week': _period_change(series, 7, 7),
+        'year_over_year': _period_change(series, 30, 365),
+        'volatility': _volatility(ids, names, matrix),
+        'anomalies': _anomalies(first_day, series) if len(series) else [],
+        'rolling_average': [
+            {'date': label, 'average_7d': week, 'average_30d': month}
+            for label, week, month in zip(
+                day_labels,
+                np.where(np.isnan(averages[7]), None, averages[7])[recent].tolist(),
+                np.where(np.isnan(averages[30]), None, averages[30])[recent].tolist(),
+            )
+        ],
+    }
+
+
+def patterns_as_of(year, month):
+    """The day a month's patterns are computed up to: its last day, or today while it is open."""
+    _, next_month = month_bounds(year, month)
+    return min(next_month - timedelta(days=1), date.today())
+
+
+def get_spending_patterns(user, year, month):
+    """Spending patterns as of the end of a month, or as of today for the current month."""
+    return _cached_patterns(user, year, month, patterns_as_of(year, month))
+
+
+@cached_monthly('spending_patterns')
+def _cached_patterns(user, year, month, end):
+    # ``end`` is part of the cache key, so the current month moves on with the calendar.
+    return analyze_patterns(user, end)
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from django.conf import settings
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from .dashboard import DashboardSnapshot
+
+
+def render_monthly_pdf(snapshot):
+    """Render a dashboard snapshot as the monthly PDF report and return its bytes."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Title
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, height - 50, f"Monthly Report - {snapshot.year:04d}-{snapshot.month:02d}")
+
+    summary = snapshot.summary
+
+    # Summary section
+    y_position = height - 100
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(50, y_position, "Summary:")
+    y_position -= 20
+
+    p.setFont("Helvetica", 10)
+    p.drawString(50, y_position, f"Total Income: ${summary['income']}")
+    y_position -= 15
+    p.drawString(50, y_position, f"Total Expense: ${summary['expense']}")
+    y_position -= 15
+    p.drawString(50, y_position, f"Net: ${summary['net']}")
+    y_position -= 15
+
+    if summary['budget_limit']:
+        p.drawString(50, y_position, f"Budget: ${summary['budget_limit']}")
+        y_position -= 15
+        p.drawString(50, y_position, f"Budget Remaining: ${summary['budget_remaining']}")
+        y_position -= 15
+        if summary['budget_used_percentage']:
+            p.drawString(50, y_position, f"Budget Used: {summary['budget_used_percentage']:.1f}%")
+            y_position -= 15
+
+    # Category breakdown
+    y_position -= 20
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(50, y_position, "Expense Breakdown by Category:")
+    y_position -= 20
+
+    p.setFont("Helvetica", 10)
+    for category in snapshot.category_breakdown:
+        p.drawString(50, y_position, f"{category['name']}: ${category['amount']}")
+        y_position -= 15
+        if y_position < 50:
+            p.showPage()
+            y_position = height - 50
+
+    p.save()
+    return buffer.getvalue()
+
+
+def _report_digest(snapshot):
+    # Only what the PDF shows goes into the key, so edits in other months
+    # (which bump the user's data version) do not invalidate this report.
+    content = repr((snapshot.year, snapshot.month, snapshot.summary, snapshot.category_breakdown))
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def _report_dir(user):
+    return Path(settings.TRACKER_REPORT_CACHE_DIR) / str(user.pk)
+
+
+def monthly_report_path(user, year, month):
+    """
+    Return the path of the stored PDF report for a user and month.
+
+    The snapshot behind the report is cached per data version, so checking
+    whether the stored file is current costs no report queries while the
+    user's data is unchanged. The file name carries a digest of the
+    rendered figures; the PDF is only rendered again when that month's
+    transactions, categories or budget change.
+    """
+    snapshot = DashboardSnapshot.for_month(user, year, month)
+    prefix = f'{year:04d}-{month:02d}-'
+    directory = _report_dir(user)
+    path = directory / f'{prefix}{_report_digest(snapshot)}.pdf'
+
+    if path.exists():
+        # Reads refresh the mtime so eviction drops the least recently used reports.
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob(f'{prefix}*.pdf'):
+        stale.unlink(missing_ok=True)
+
+    # Write to a temporary file and rename, so concurrent downloads never
+    # see a partially written report.
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(render_monthly_pdf(snapshot))
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    prune_reports()
+    return path
+
+
+def open_monthly_report(user, year, month):
+    """
+    Open the stored PDF report for a user and month for reading.
+
+    A report pruned between ``monthly_report_path`` returning and the open
+    is rendered into memory instead, rather than stored and looked up again.
+    """
+    path = monthly_report_path(user, year, month)
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        return io.BytesIO(render_monthly_pdf(DashboardSnapshot.for_month(user, year, month)))
+
+
+def prune_reports(max_bytes=None, max_age=None):
+    """
+    Evict stored reports older than ``max_age`` seconds, then the least
+    recently used ones until the store fits in ``max_bytes``.
+
+    Defaults come from TRACKER_REPORT_CACHE_MAX_BYTES and
+    TRACKER_REPORT_CACHE_MAX_AGE. Returns the number of files removed.
+    """
+    if max_bytes is None:
+        max_bytes = settings.TRACKER_REPORT_CACHE_MAX_BYTES
+    if max_age is None:
+        max_age = settings.TRACKER_REPORT_CACHE_MAX_AGE
+
+    root = Path(settings.TRACKER_REPORT_CACHE_DIR)
+    if not root.is_dir():
+        return 0
+
+    files = []
+    for path in root.glob('*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    removed = 0
+    cutoff = time.time() - max_age
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,318 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from ..models import Transaction, DailyCategoryRollup, MonthlyTypeRollup
+from .currency import converted_amount
+
+
+BATCH_SIZE = 2000
+
+
+def month_key(value):
+    """Return the YYYY-MM key used by monthly rollups and budgets."""
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def month_bounds(year, month):
+    """Return the [start, end) date range covering a calendar month."""
+    start_date = date(year, month, 1)
+    if month == 12:
+        end_date = date(year + 1, 1, 1)
+    else:
+        end_date = date(year, month + 1, 1)
+    return start_date, end_date
+
+
+def _apply_delta(model, lookup, amount, count):
+    """Add amount/count to a single rollup row, creating or pruning it as needed."""
+    rows = model.objects.filter(**lookup)
+    updated = rows.update(total=F('total') + amount, count=F('count') + count)
+    if not updated:
+        if count <= 0:
+            # Nothing to subtract from (e.g. the row was already cascaded away).
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(total=amount, count=count, **lookup)
+            return
+        except IntegrityError:
+            rows.update(total=F('total') + amount, count=F('count') + count)
+    if count < 0:
+        rows.filter(count__lte=0).delete()
+
+
+def apply_transaction(user_id, category_id, category_type, txn_date, amount, sign=1):
+    """Add (sign=1) or remove (sign=-1) one transaction, with ``amount`` in the base currency."""
+    amount = Decimal(amount) * sign
+    _apply_delta(
+        DailyCategoryRollup,
+        {'user_id': user_id, 'category_id': category_id, 'date': txn_date},
+        amount, sign,
+    )
+    _apply_delta(
+        MonthlyTypeRollup,
+        {'user_id': user_id, 'month': month_key(txn_date), 'type': category_type},
+        amount, sign,
+    )
+
+
+def add_transactions(user_id, entries):
+    """
+    Add many new transactions to a user's rollups at once.
+
+    ``entries`` yields (category_id, category_type, date, amount) tuples,
+    amounts in the base currency. Deltas are summed in memory and merged
+    with one ``INSERT ... ON CONFLICT DO UPDATE`` per table that adds to
+    the stored totals, so callers that insert with bulk_create (which skips
+    signals) keep the rollups exact inside the same database transaction.
+    """
+    apply_totals(user_id, (
+        (category_id, category_type, txn_date, amount, 1)
+        for category_id, category_type, txn_date, amount in entries
+    ))
+
+
+def apply_totals(user_id, rows, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) grouped transaction totals.
+
+    ``rows`` yields (category_id, category_type, date, total, count) tuples,
+    e.g. a ``values().annotate()`` of the rows a bulk UPDATE or DELETE is
+    about to change. Subtracted rows that reach zero transactions are
+    removed.
+    """
+    daily = defaultdict(lambda: [Decimal('0.00'), 0])
+    monthly = defaultdict(lambda: [Decimal('0.00'), 0])
+    for category_id, category_type, txn_date, total, count in rows:
+        daily_row = daily[(category_id, txn_date)]
+        daily_row[0] += total
+        daily_row[1] += count
+        monthly_row = monthly[(month_key(txn_date), category_type)]
+        monthly_row[0] += total
+        monthly_row[1] += count
+    if not daily:
+        return
+
+    apply = _upsert_add if sign > 0 else _subtract
+    apply(
+        DailyCategoryRollup, ('user_id', 'category_id', 'date'),
+        [(user_id, category_id, txn_date, total, count)
+         for (category_id, txn_date), (total, count) in daily.items()],
+    )
+    apply(
+        MonthlyTypeRollup, ('user_id', 'month', 'type'),
+        [(user_id, month, category_type, total, count)
+         for (month, category_type), (total, count) in monthly.items()],
+    )
+    if sign < 0:
+        DailyCategoryRollup.objects.filter(user_id=user_id, count__lte=0).delete()
+        MonthlyTypeRollup.objects.filter(user_id=user_id, count__lte=0).delete()
+
+
+def _subtract(model, key_columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    total, count = connection.ops.quote_name('total'), connection.ops.quote_name('count')
+    condition = ' AND '.join(f'{connection.ops.quote_name(name)} = %s' for name in key_columns)
+    sql = f'UPDATE {table} SET {total} = {total} - %s, {count} = {count} - %s WHERE {condition}'
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, [
+                (row_total, row_count, *key) for *key, row_total, row_count in rows[start:start + BATCH_SIZE]
+            ])
+
+
+def _upsert_add(model, key_columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(name) for name in key_columns + ('total', 'count'))
+    conflict = ', '.join(connection.ops.quote_name(name) for name in key_columns)
+    placeholders = ', '.join(['%s'] * (len(key_columns) + 2))
+    total, count = connection.ops.quote_name('total'), connection.ops.quote_name('count')
+    sql = (
+        f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET '
+        f'{total} = {table}.{total} + excluded.{total}, '
+        f'{count} = {table}.{count} + excluded.{count}'
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+
+
+def move_category_type(category, old_type, new_type):
+    """Shift a category's monthly totals from one type to another."""
+    months = DailyCategoryRollup.objects.filter(
+        category=category
+    ).annotate(
+        month=TruncMonth('date')
+    ).values('month').annotate(
+        total_sum=Sum('total'),
+        count_sum=Sum('count')
+    ).order_by()
+
+    for row in months:
+        key = month_key(row['month'])
+        _apply_delta(
+            MonthlyTypeRollup,
+            {'user_id': category.user_id, 'month': key, 'type': old_type},
+            -row['total_sum'], -row['count_sum'],
+        )
+        _apply_delta(
+            MonthlyTypeRollup,
+            {'user_id': category.user_id, 'month': key, 'type': new_type},
+            row['total_sum'], row['count_sum'],
+        )
+
+
+def remove_category(category):
+    """Subtract every transaction of a category being deleted from the monthly rollups."""
+    months = DailyCategoryRollup.objects.filter(
+        category=category
+    ).annotate(
+        month=TruncMonth('date')
+    ).values('month').annotate(
+        total_sum=Sum('total'),
+        count_sum=Sum('count')
+    ).order_by()
+
+    for row in months:
+        _apply_delta(
+            MonthlyTypeRollup,
+            {'user_id': category.user_id, 'month': month_key(row['month']), 'type': category.type},
+            -row['total_sum'], -row['count_sum'],
+        )
+
+
+def merge_category(source, target):
+    """
+    Move a category's rollup totals onto another category of the same user.
+
+    Daily rows are added to the target's rows for the same day and then
+    removed; monthly totals only move when the two categories have
+    different types.
+    """
+    rows = list(DailyCategoryRollup.objects.filter(category=source).values_list('date', 'total', 'count'))
+    if not rows:
+        return
+
+    _upsert_add(
+        DailyCategoryRollup, ('user_id', 'category_id', 'date'),
+        [(target.user_id, target.pk, txn_date, total, count) for txn_date, total, count in rows],
+    )
+    DailyCategoryRollup.objects.filter(category=source).delete()
+    if source.type == target.type:
+        return
+
+    monthly = defaultdict(lambda: [Decimal('0.00'), 0])
+    for txn_date, total, count in rows:
+        monthly_row = monthly[month_key(txn_date)]
+        monthly_row[0] += total
+        monthly_row[1] += count
+    for month, (total, count) in monthly.items():
+        _apply_delta(
+            MonthlyTypeRollup,
+            {'user_id': source.user_id, 'month': month, 'type': source.type},
+            -total, -count,
+        )
+        _apply_delta(
+            MonthlyTypeRollup,
+            {'user_id': target.user_id, 'month': month, 'type': target.type},
+            total, count,
+        )
+
+
+def rebuild_rollups(user=None, start=None, end=None):
+    """
+    Recompute rollups from the Transaction table.
+
+    Amounts in other currencies are converted to the base currency inside
+    the grouped queries, with the rate of each transaction's date.
+    The optional ``start``/``end`` dates (inclusive) are widened to whole
+    months so that monthly rows are always rebuilt from complete data.
+    Returns the number of daily and monthly rows written.
+    """
+    transactions = Transaction.objects.all()
+    daily = DailyCategoryRollup.objects.all()
+    monthly = MonthlyTypeRollup.objects.all()
+
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        daily = daily.filter(user=user)
+        monthly = monthly.filter(user=user)
+    if start is not None:
+        start = date(start.year, start.month, 1)
+        transactions = transactions.filter(date__gte=start)
+        daily = daily.filter(date__gte=start)
+        monthly = monthly.filter(month__gte=month_key(start))
+    if end is not None:
+        end = month_bounds(end.year, end.month)[1]
+        transactions = transactions.filter(date__lt=end)
+        daily = daily.filter(date__lt=end)
+        monthly = monthly.filter(month__lt=month_key(end))
+
+    daily_rows = transactions.values(
+        'user_id', 'category_id', 'date'
+    ).annotate(
+        total=Sum(converted_amount()),
+        count=Count('id')
+    ).order_by()
+
+    monthly_rows = transactions.annotate(
+        month=TruncMonth('date')
+    ).values(
+        'user_id', 'type', 'month'
+    ).annotate(
+        total=Sum(converted_amount()),
+        count=Count('id')
+    ).order_by()
+
+    with transaction.atomic():
+        daily.delete()
+        monthly.delete()
+
+        daily_written = _bulk_insert(
+            DailyCategoryRollup,
+            (
+                DailyCategoryRollup(
+                    user_id=row['user_id'],
+                    category_id=row['category_id'],
+                    date=row['date'],
+                    total=row['total'],
+                    count=row['count'],
+                )
+                for row in daily_rows.iterator(chunk_size=BATCH_SIZE)
+            ),
+        )
+        monthly_written = _bulk_insert(
+            MonthlyTypeRollup,
+            (
+                MonthlyTypeRollup(
+                    user_id=row['user_id'],
+                    month=month_key(row['month']),
+                    type=row['type'],
+                    total=row['total'],
+                    count=row['count'],
+                )
+                for row in monthly_rows.iterator(chunk_size=BATCH_SIZE)
+            ),
+        )
+
+    return daily_written, monthly_written
+
+
+def _bulk_insert(model, objects):
+    written = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
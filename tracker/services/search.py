@@ -0,0 +1,92 @@
+import re
+from contextlib import contextmanager
+from django.db import connection
+from django.db.transaction import TransactionManagementError
+from django.db.models import Q
+
+
+MAX_TERMS = 8
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(text):
+    """Split free text into at most MAX_TERMS words, dropping FTS5 syntax characters."""
+    return _TERM.findall(text or '')[:MAX_TERMS]
+
+
+def match_expression(terms):
+    """FTS5 query requiring every term, each matched as a prefix."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_transactions(queryset, text, by_relevance=False):
+    """
+    Narrow a Transaction queryset to rows whose note or category name match ``text``.
+
+    On SQLite the FTS5 index is joined in and every word matches as a
+    prefix, so "gro sup" finds "Groceries" with the note "supermarket".
+    With ``by_relevance`` the rows are ordered by bm25 rank, best match
+    first, then newest first. Other databases fall back to case-insensitive
+    substring matching and keep the queryset's ordering.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    if connection.vendor != 'sqlite':
+        for term in terms:
+            queryset = queryset.filter(Q(note__icontains=term) | Q(category__name__icontains=term))
+        return queryset
+
+    queryset = queryset.filter(search__document__match=match_expression(terms))
+    if by_relevance:
+        queryset = queryset.order_by('search__rank', '-date', '-created_at', '-id')
+    return queryset
+
+
+INSERT_TRIGGER = 'tracker_transaction_fts_insert'
+
+
+@contextmanager
+def deferred_search_indexing():
+    """
+    Index the transactions inserted inside the block in one statement at the end.
+
+    The per-row insert trigger costs more than the insert itself on large
+    loads. Inside the block it is dropped; on exit every transaction with a
+    higher id than before is indexed with one INSERT ... SELECT and the
+    trigger is recreated from its saved definition, also when the block
+    raises. Must run inside ``transaction.atomic()``, whose write lock keeps
+    other connections from inserting meanwhile and whose rollback undoes
+    the drop with the rest of the block. A no-op on other databases.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    if not connection.in_atomic_block:
+        raise TransactionManagementError('deferred_search_indexing() must run inside transaction.atomic().')
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = %s", [INSERT_TRIGGER])
+        row = cursor.fetchone()
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM tracker_transaction')
+        (last_id,) = cursor.fetchone()
+    if not row:
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER {INSERT_TRIGGER}')
+    try:
+        yield
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO tracker_transaction_fts (rowid, note, category) "
+                "SELECT t.id, COALESCE(t.note, ''), c.name FROM tracker_transaction t "
+                "JOIN tracker_category c ON c.id = t.category_id WHERE t.id > %s",
+                [last_id],
+            )
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(row[0])
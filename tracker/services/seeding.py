@@ -0,0 +1,121 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from ..models import Category, Transaction, Budget
+from .cache import bump_data_version
+from .rollups import BATCH_SIZE, add_transactions
+
+
+EXPENSE_NAMES = [
+    'Groceries', 'Rent', 'Utilities', 'Transport', 'Dining', 'Health',
+    'Entertainment', 'Shopping', 'Travel', 'Education', 'Insurance', 'Gifts',
+]
+INCOME_NAMES = ['Salary', 'Freelance', 'Interest', 'Refunds']
+NOTES = [None, None, 'Card payment', 'Cash', 'Monthly', 'Online order', 'Shared bill']
+
+# Share of transactions that are income; the rest are expenses.
+INCOME_SHARE = 0.1
+
+
+def _category_specs(count):
+    income = max(1, round(count * 0.25)) if count > 1 else 0
+    specs = []
+    for index in range(count - income):
+        name = EXPENSE_NAMES[index % len(EXPENSE_NAMES)]
+        if index >= len(EXPENSE_NAMES):
+            name = f'{name} {index // len(EXPENSE_NAMES) + 1}'
+        specs.append((name, Category.TYPE_EXPENSE))
+    for index in range(income):
+        name = INCOME_NAMES[index % len(INCOME_NAMES)]
+        if index >= len(INCOME_NAMES):
+            name = f'{name} {index // len(INCOME_NAMES) + 1}'
+        specs.append((name, Category.TYPE_INCOME))
+    return specs
+
+
+def seed_user(user, transactions=1000, categories=10, months=12, end=None, rng=None):
+    """
+    Fill one user's account with random categories, transactions and budgets.
+
+    Transactions are spread over the ``months`` months ending with ``end``
+    (today by default) and inserted with bulk_create; rollups are updated
+    in the same transaction and the data version is bumped once at the end.
+    Returns the number of transactions created.
+    """
+    rng = rng or random.Random()
+    end = end or date.today()
+    first_month = date(end.year, end.month, 1)
+    for _ in range(months - 1):
+        first_month = (first_month - timedelta(days=1)).replace(day=1)
+    span = (end - first_month).days + 1
+
+    with transaction.atomic():
+        Category.objects.bulk_create(
+            [Category(user=user, name=name, type=category_type) for name, category_type in _category_specs(categories)],
+            ignore_conflicts=True,
+        )
+        type_of = dict(Category.objects.filter(user=user).values_list('id', 'type'))
+        by_type = {Category.TYPE_INCOME: [], Category.TYPE_EXPENSE: []}
+        for category_id, category_type in type_of.items():
+            by_type[category_type].append(category_id)
+        if not by_type[Category.TYPE_INCOME]:
+            by_type[Category.TYPE_INCOME] = by_type[Category.TYPE_EXPENSE]
+        if not by_type[Category.TYPE_EXPENSE]:
+            by_type[Category.TYPE_EXPENSE] = by_type[Category.TYPE_INCOME]
+
+        created = 0
+        while created < transactions:
+            batch = []
+            for _ in range(min(BATCH_SIZE, transactions - created)):
+                if rng.random() < INCOME_SHARE:
+                    category_type = Category.TYPE_INCOME
+                    amount = Decimal(rng.randint(50000, 500000)) / 100
+                else:
+                    category_type = Category.TYPE_EXPENSE
+                    amount = Decimal(int(rng.lognormvariate(7.5, 1.0)) + 1) / 100
+                category_id = rng.choice(by_type[category_type])
+                batch.append((
+                    category_id,
+                    type_of[category_id],
+                    first_month + timedelta(days=rng.randrange(span)),
+                    amount,
+                ))
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=user, category_id=category_id, type=category_type, amount=amount, date=txn_date,
+                    note=rng.choice(NOTES),
+                )
+                for category_id, category_type, txn_date, amount in batch
+            ])
+            add_transactions(user.pk, batch)
+            created += len(batch)
+
+        month = first_month
+        budgets = []
+        while month <= end:
+            budgets.append(Budget(
+                user=user,
+                month=f'{month.year:04d}-{month.month:02d}',
+                limit_amount=Decimal(rng.randint(1000, 5000)),
+            ))
+            month = (month + timedelta(days=32)).replace(day=1)
+        Budget.objects.bulk_create(budgets, ignore_conflicts=True)
+
+    bump_data_version(user.pk)
+    return created
+
+
+def create_users(prefix, count, password):
+    """Create ``count`` users named ``<prefix>-<n>`` that do not exist yet and return all of them."""
+    usernames = [f'{prefix}-{index}' for index in range(1, count + 1)]
+    existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    # Hashing is deliberately slow, so every new user shares one hash.
+    hashed = make_password(password)
+    User.objects.bulk_create([
+        User(username=username, email=f'{username}@example.com', password=hashed)
+        for username in usernames if username not in existing
+    ])
+    return list(User.objects.filter(username__in=usernames).order_by('id'))
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from ..models import Budget, DailyCategoryRollup
+from .dashboard import DashboardSnapshot
+from .reports import render_monthly_pdf
+from .rollups import month_bounds
+
+
+# Users whose statements one worker task loads and renders together.
+STATEMENT_BATCH_SIZE = 200
+
+
+def statement_dir(year, month):
+    """Directory holding every user's statement for a month."""
+    return Path(settings.TRACKER_STATEMENT_DIR) / f'{year:04d}-{month:02d}'
+
+
+def statement_path(user_id, year, month):
+    return statement_dir(year, month) / f'{user_id}.pdf'
+
+
+def pending_user_ids(year, month):
+    """
+    Ids of the active users whose statement for the month is not written yet.
+
+    A statement only appears under its final name once it is complete, so
+    after a crash the finished users are skipped and only the rest are
+    generated; leftover temporary files are removed.
+    """
+    directory = statement_dir(year, month)
+    done = set()
+    if directory.is_dir():
+        for path in directory.iterdir():
+            if path.suffix == '.tmp':
+                path.unlink(missing_ok=True)
+            elif path.suffix == '.pdf' and path.stem.isdigit():
+                done.add(int(path.stem))
+    user_ids = User.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)
+    return [user_id for user_id in user_ids if user_id not in done]
+
+
+def load_statement_snapshots(user_ids, year, month):
+    """
+    Build the monthly snapshot of every user in ``user_ids`` with three queries.
+
+    Instead of a snapshot query per user, one grouped query sums the
+    month's rollups per user and category and one more loads the budgets;
+    ``DashboardSnapshot.from_rows`` then derives the figures exactly as
+    the dashboard does.
+    """
+    start_date, end_date = month_bounds(year, month)
+    users = User.objects.in_bulk(user_ids)
+    rows = defaultdict(list)
+    for user_id, category_id, name, category_type, total in DailyCategoryRollup.objects.filter(
+        user_id__in=user_ids,
+        date__gte=start_date,
+        date__lt=end_date,
+    ).values_list('user_id', 'category_id', 'category__name', 'category__type').annotate(
+        total=Sum('total')
+    ).order_by():
+        # Grouped by category rather than by day: the statement does not
+        # draw the daily series, so it collapses onto the first of the month.
+        rows[user_id].append((start_date, category_id, name, category_type, total))
+    budgets = {
+        budget.user_id: budget
+        for budget in Budget.objects.filter(user_id__in=user_ids, month=f'{year:04d}-{month:02d}')
+    }
+    return [
+        DashboardSnapshot.from_rows(users[user_id], year, month, rows[user_id], budgets.get(user_id))
+        for user_id in user_ids
+        if user_id in users
+    ]
+
+
+def write_statements(user_ids, year, month):
+    """
+    Render and store the statements of ``user_ids`` for a month.
+
+    Runs in a worker process. Each PDF is written to a temporary file and
+    renamed into place. Returns the number of statements written.
+    """
+    directory = statement_dir(year, month)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for snapshot in load_statement_snapshots(user_ids, year, month):
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(render_monthly_pdf(snapshot))
+            os.replace(tmp_name, statement_path(snapshot.user.pk, year, month))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        written += 1
+    return written
@@ -0,0 +1,427 @@
+import base64
+import json
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from ..models import Budget, Category, Tombstone, Transaction, base_currency
+from .cache import bump_data_version
+from .currency import ExchangeRateError, clean_currency, to_base
+from .importer import MAX_AMOUNT
+from .pagination import InvalidCursor
+from .rollups import BATCH_SIZE, apply_totals
+
+
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 5000
+# Rows accepted by one upload; larger change sets are sent in several.
+SYNC_MAX_UPLOAD = 5000
+
+# (payload key, cursor key, model, timestamp field, fields sent to clients).
+# Categories come first so a client never sees a transaction before its category.
+SYNC_SOURCES = [
+    ('categories', 'c', Category, 'updated_at', ('id', 'name', 'type', 'created_at', 'updated_at')),
+    ('transactions', 't', Transaction, 'updated_at',
+     ('id', 'category_id', 'amount', 'currency', 'date', 'note', 'created_at', 'updated_at')),
+    ('budgets', 'b', Budget, 'updated_at', ('id', 'month', 'limit_amount', 'created_at', 'updated_at')),
+    ('deleted', 'd', Tombstone, 'deleted_at', ('id', 'kind', 'object_id', 'deleted_at')),
+]
+
+MONTH_RE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+class CursorExpired(InvalidCursor):
+    """The cursor predates the retained tombstones; the client must sync from scratch."""
+
+
+class SyncError(ValueError):
+    """An uploaded change set is invalid; nothing was applied."""
+
+
+def record_deletions(user_id, kind, ids):
+    """Write a tombstone for each deleted ``kind`` id, in BATCH_SIZE inserts."""
+    Tombstone.objects.bulk_create(
+        [Tombstone(user_id=user_id, kind=kind, object_id=object_id) for object_id in ids],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def delete_transactions(user_id, queryset):
+    """
+    Delete the transactions in ``queryset`` without the model signals.
+
+    For callers that take the rows out of the rollups themselves, from one
+    grouped query, so the per-row post_delete handler must not run. The
+    ids are read once; tombstones are written for them and the rows removed
+    with a plain DELETE per BATCH_SIZE ids. Nothing references a
+    transaction, so there is nothing to cascade, and the FTS trigger still
+    drops the rows from the search index. Returns the number deleted.
+    """
+    ids = list(queryset.values_list('pk', flat=True))
+    record_deletions(user_id, Tombstone.KIND_TRANSACTION, ids)
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[start:start + BATCH_SIZE]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def prune_tombstones():
+    """
+    Delete tombstones older than TRACKER_SYNC_TOMBSTONE_DAYS.
+
+    ``get_changes`` rejects cursors older than the same limit, so no client
+    can miss a pruned deletion. Returns the number of tombstones removed.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.TRACKER_SYNC_TOMBSTONE_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def encode_sync_cursor(positions):
+    payload = {
+        key: None if moment is None else [moment.isoformat(), pk]
+        for key, (moment, pk) in positions.items()
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_sync_cursor(token):
+    """Decode a sync cursor into {cursor key: (timestamp, id)}; (None, None) means from the start."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        positions = {}
+        for _, key, _, _, _ in SYNC_SOURCES:
+            value = payload[key]
+            positions[key] = (None, None) if value is None else (datetime.fromisoformat(value[0]), int(value[1]))
+    except (ValueError, KeyError, TypeError, IndexError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+    if positions['d'][0] is None or timezone.is_naive(positions['d'][0]):
+        raise InvalidCursor('Cursor has no deletion position.')
+    return positions
+
+
+def get_changes(user, cursor=None, limit=SYNC_PAGE_SIZE):
+    """
+    Return the user's changes since ``cursor``, at most ``limit`` rows.
+
+    Each kind is read in (timestamp, id) order from where the cursor left
+    it, with indexed keyset queries, until the page is full. Without a
+    cursor every row is returned (over as many pages as it takes) and
+    deletions are tracked from now on. The returned cursor covers exactly
+    the rows returned; ``has_more`` says whether to ask again at once.
+
+    Rows changed in the last TRACKER_SYNC_SETTLE_SECONDS are held back to
+    the next sync: a write that took its timestamp just before a later one
+    may still be waiting for the write lock, and would otherwise fall
+    behind the cursor. The window is longer than the SQLite busy timeout
+    (checked at startup by tracker.E001).
+    """
+    now = timezone.now()
+    settled = now - timedelta(seconds=settings.TRACKER_SYNC_SETTLE_SECONDS)
+    if cursor:
+        positions = decode_sync_cursor(cursor)
+        if positions['d'][0] < now - timedelta(days=settings.TRACKER_SYNC_TOMBSTONE_DAYS):
+            raise CursorExpired('Deletions since this cursor are no longer kept.')
+    else:
+        positions = {key: (None, None) for _, key, _, _, _ in SYNC_SOURCES}
+        positions['d'] = (settled, 0)
+
+    changes = {}
+    has_more = False
+    remaining = limit
+    for name, key, model, stamp, fields in SYNC_SOURCES:
+        rows = _rows_after(
+            model.objects.filter(user=user, **{f'{stamp}__lte': settled}), stamp, fields, positions[key],
+            # One row past the page tells whether more are waiting.
+            remaining + 1,
+        )
+        caught_up = len(rows) <= remaining
+        if not caught_up:
+            has_more = True
+            rows = rows[:remaining]
+        if rows:
+            positions[key] = (rows[-1][stamp], rows[-1]['id'])
+        remaining -= len(rows)
+        changes[name] = rows
+
+    if caught_up and positions['d'][0] < settled:
+        # Every tombstone up to ``settled`` has been sent; moving the
+        # position up keeps a cursor without recent deletions from expiring.
+        positions['d'] = (settled, 0)
+    changes['deleted'] = [
+        {'kind': row['kind'], 'id': row['object_id'], 'deleted_at': row['deleted_at']}
+        for row in changes['deleted']
+    ]
+    changes['cursor'] = encode_sync_cursor(positions)
+    changes['has_more'] = has_more
+    return changes
+
+
+def _rows_after(queryset, stamp, fields, position, count):
+    """The first ``count`` rows after ``position`` in (timestamp, id) order."""
+    moment, pk = position
+    ordered = queryset.order_by(stamp, 'pk').values(*fields)
+    if moment is None:
+        return list(ordered[:count])
+    # Two index seeks rather than one query with an OR, which SQLite can
+    # only serve by scanning every row sharing the timestamp; a bulk
+    # update gives thousands of rows the same one.
+    rows = list(queryset.filter(**{stamp: moment}, pk__gt=pk).order_by('pk').values(*fields)[:count])
+    if len(rows) < count:
+        rows += ordered.filter(**{f'{stamp}__gt': moment})[:count - len(rows)]
+    return rows
+
+
+def _rows(changes, name):
+    rows = changes.get(name) or []
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise SyncError(f'"{name}" must be a list of objects.')
+    return rows
+
+
+def _amount(value, field):
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise SyncError(f'Invalid {field} {value!r}.')
+    if not amount.is_finite():
+        raise SyncError(f'Invalid {field} {value!r}.')
+    if amount < Decimal('0.01') or amount > MAX_AMOUNT:
+        raise SyncError(f'{field.capitalize()} {value!r} is out of range.')
+    if amount != amount.quantize(Decimal('0.01')):
+        raise SyncError(f'{field.capitalize()} {value!r} has more than two decimal places.')
+    return amount
+
+
+def _currency(value, previous):
+    # A row without a currency keeps the stored one, so clients that
+    # predate currencies do not convert foreign transactions on edit.
+    if value is None:
+        return previous['currency'] if previous else base_currency()
+    if not isinstance(value, str):
+        raise SyncError(f'Invalid currency {value!r}.')
+    try:
+        return clean_currency(value)
+    except ExchangeRateError as exc:
+        raise SyncError(str(exc))
+
+
+def _note(value):
+    if value is not None and not isinstance(value, str):
+        raise SyncError(f'Invalid note {value!r}.')
+    return value or None
+
+
+def _ref(row):
+    ref = row.get('ref')
+    if ref is not None and not isinstance(ref, str):
+        raise SyncError(f'Invalid ref {ref!r}.')
+    return ref
+
+
+def _own_ids(model, user, rows):
+    id_list = [row['id'] for row in rows if row.get('id') is not None]
+    if any(not isinstance(pk, int) or isinstance(pk, bool) for pk in id_list):
+        raise SyncError(f'{model._meta.verbose_name.capitalize()} ids must be integers.')
+    ids = set(id_list)
+    if len(ids) != len(id_list):
+        raise SyncError(f'Each {model._meta.verbose_name} may only be changed once per upload.')
+    found = model.objects.filter(user=user, pk__in=ids)
+    return ids, found
+
+
+def apply_changes(user, changes):
+    """
+    Apply a client's batch of changes in one database transaction.
+
+    ``changes`` holds ``categories``, ``transactions`` and ``budgets`` to
+    create or update, and ``deleted`` ({kind, id}) rows. Rows with an
+    ``id`` update that row, rows without one are created; new categories
+    and transactions may carry a client ``ref``, and a transaction may name
+    its category by ``category_ref``. Budgets are matched by month. The
+    last write wins. Creates and updates are one ``bulk_create`` and one
+    ``bulk_update`` per model; the rollups are adjusted from the old and
+    new rows in the same transaction. Raises SyncError and applies nothing
+    if any row is invalid.
+
+    Returns, per kind, the ids given to each ref (or month) and counts.
+    """
+    category_rows = _rows(changes, 'categories')
+    transaction_rows = _rows(changes, 'transactions')
+    budget_rows = _rows(changes, 'budgets')
+    deleted_rows = _rows(changes, 'deleted')
+    if len(category_rows) + len(transaction_rows) + len(budget_rows) + len(deleted_rows) > SYNC_MAX_UPLOAD:
+        raise SyncError(f'Send at most {SYNC_MAX_UPLOAD} changes per upload.')
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            result = {
+                'categories': _apply_categories(user, category_rows, now),
+                'transactions': None,
+                'budgets': _apply_budgets(user, budget_rows),
+            }
+            result['transactions'] = _apply_transactions(
+                user, transaction_rows, result['categories']['ids'], now
+            )
+            result['deleted'] = _apply_deletions(user, deleted_rows)
+    except IntegrityError as exc:
+        raise SyncError(f'Conflicting change: {exc}')
+    except (KeyError, TypeError) as exc:
+        raise SyncError(f'Missing or invalid field: {exc}')
+
+    if category_rows or transaction_rows or budget_rows or result['deleted']:
+        bump_data_version(user.pk)
+    return result
+
+
+def _apply_categories(user, rows, now):
+    ids, found = _own_ids(Category, user, rows)
+    existing = found.in_bulk()
+    if len(existing) != len(ids):
+        raise SyncError(f'Unknown category ids: {sorted(ids - set(existing))}.')
+
+    types = {category_type for category_type, _ in Category.TYPE_CHOICES}
+    created, refs, updated = [], [], []
+    for row in rows:
+        name = row['name']
+        if not isinstance(name, str) or not name.strip() or len(name) > 100:
+            raise SyncError(f'Invalid category name {name!r}.')
+        if row['type'] not in types:
+            raise SyncError(f"Invalid category type {row['type']!r}.")
+        if row.get('id') is None:
+            created.append(Category(user=user, name=name.strip(), type=row['type']))
+            refs.append(_ref(row))
+            continue
+        category = existing[row['id']]
+        if category.type != row['type']:
+            # A type change moves every transaction between the income and
+            # expense rollups; that goes through the category form.
+            raise SyncError(f'Category {category.pk} cannot change type through sync.')
+        category.name = name.strip()
+        category.updated_at = now
+        updated.append(category)
+
+    Category.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    Category.objects.bulk_update(updated, ['name', 'updated_at'], batch_size=BATCH_SIZE)
+    return {
+        'ids': {ref: category.pk for ref, category in zip(refs, created) if ref is not None},
+        'created': len(created),
+        'updated': len(updated),
+    }
+
+
+def _apply_transactions(user, rows, category_refs, now):
+    ids, found = _own_ids(Transaction, user, rows)
+    previous = {
+        row['id']: row
+        for row in found.values('id', 'category_id', 'type', 'date', 'amount', 'currency')
+    }
+    if len(previous) != len(ids):
+        raise SyncError(f'Unknown transaction ids: {sorted(ids - set(previous))}.')
+    category_types = dict(Category.objects.filter(user=user).values_list('id', 'type'))
+
+    created, refs, updated = [], [], []
+    for row in rows:
+        if row.get('category_ref') is not None:
+            category_id = category_refs.get(row['category_ref'])
+        else:
+            category_id = row['category_id']
+        if category_id not in category_types:
+            raise SyncError(f"Unknown category {row.get('category_ref') or row.get('category_id')!r}.")
+        try:
+            txn_date = date.fromisoformat(row['date'])
+        except (TypeError, ValueError):
+            raise SyncError(f"Invalid date {row['date']!r}.")
+        values = {
+            'user': user,
+            'category_id': category_id,
+            'type': category_types[category_id],
+            'amount': _amount(row['amount'], 'amount'),
+            'currency': _currency(row.get('currency'), previous.get(row.get('id'))),
+            'date': txn_date,
+            'note': _note(row.get('note')),
+        }
+        if row.get('id') is None:
+            created.append(Transaction(**values))
+            refs.append(_ref(row))
+        else:
+            updated.append(Transaction(pk=row['id'], updated_at=now, **values))
+
+    Transaction.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    Transaction.objects.bulk_update(
+        updated, ['category', 'type', 'amount', 'currency', 'date', 'note', 'updated_at'], batch_size=BATCH_SIZE
+    )
+    # bulk_create and bulk_update skip the model signals; the FTS triggers
+    # still index the rows.
+    apply_totals(user.pk, (
+        (old['category_id'], old['type'], old['date'], to_base(old['amount'], old['currency'], old['date']), 1)
+        for old in previous.values()
+    ), sign=-1)
+    apply_totals(user.pk, (
+        (txn.category_id, txn.type, txn.date, to_base(txn.amount, txn.currency, txn.date), 1)
+        for txn in created + updated
+    ))
+    return {
+        'ids': {ref: txn.pk for ref, txn in zip(refs, created) if ref is not None},
+        'created': len(created),
+        'updated': len(updated),
+    }
+
+
+def _apply_budgets(user, rows):
+    budgets = {}
+    for row in rows:
+        month = row['month']
+        if not isinstance(month, str) or not MONTH_RE.match(month):
+            raise SyncError(f'Invalid budget month {month!r}; use YYYY-MM.')
+        budgets[month] = Budget(user=user, month=month, limit_amount=_amount(row['limit_amount'], 'limit amount'))
+    existing = set(Budget.objects.filter(user=user, month__in=budgets).values_list('month', flat=True))
+    # Budgets are keyed by month, so an upsert covers both creates and updates.
+    Budget.objects.bulk_create(
+        budgets.values(),
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['user', 'month'],
+        update_fields=['limit_amount', 'updated_at'],
+    )
+    return {
+        'ids': dict(Budget.objects.filter(user=user, month__in=budgets).values_list('month', 'id')),
+        'created': len(budgets.keys() - existing),
+        'updated': len(existing),
+    }
+
+
+def _apply_deletions(user, rows):
+    ids = defaultdict(set)
+    for row in rows:
+        if row['kind'] not in dict(Tombstone.KIND_CHOICES) or not isinstance(row['id'], int):
+            raise SyncError(f'Invalid deletion {row!r}.')
+        ids[row['kind']].add(row['id'])
+
+    # Ids that are already gone are skipped, so a retried upload is harmless.
+    deleted = 0
+    doomed = Transaction.objects.filter(user=user, pk__in=ids[Tombstone.KIND_TRANSACTION])
+    totals = list(doomed.values_list('category_id', 'type', 'date', 'amount', 'currency'))
+    if totals:
+        apply_totals(user.pk, (
+            (category_id, category_type, day, to_base(amount, currency, day), 1)
+            for category_id, category_type, day, amount, currency in totals
+        ), sign=-1)
+        deleted += delete_transactions(user.pk, doomed)
+    # Budgets and categories go through the signals, which write their
+    # tombstones and (for categories) remove the cascaded transactions.
+    deleted += Budget.objects.filter(user=user, pk__in=ids[Tombstone.KIND_BUDGET]).delete()[1].get('tracker.Budget', 0)
+    for category in Category.objects.filter(user=user, pk__in=ids[Tombstone.KIND_CATEGORY]):
+        category.delete()
+        deleted += 1
+    return deleted
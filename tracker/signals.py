@@ -0,0 +1,162 @@
+import threading
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.core.signals import request_started
+from .models import Budget, Category, ExchangeRate, Tombstone, Transaction
+from .services import rollups
+from .services.cache import bump_data_version
+from .services.currency import clear_rate_cache, to_base
+from .services.sync import record_deletions
+
+
+# Categories currently being deleted. Their cascaded transactions are removed
+# from the rollups in one step by the category handler, not row by row.
+# Users being deleted are tracked the same way so their cascaded rows do not
+# recreate a data version for an account that is going away.
+_deleting = threading.local()
+
+
+def _deleting_categories():
+    if not hasattr(_deleting, 'ids'):
+        _deleting.ids = set()
+    return _deleting.ids
+
+
+def _deleting_users():
+    if not hasattr(_deleting, 'user_ids'):
+        _deleting.user_ids = set()
+    return _deleting.user_ids
+
+
+def _data_changed(user_id):
+    if user_id not in _deleting_users():
+        bump_data_version(user_id)
+
+
+def _deleted(user_id, kind, ids):
+    # Sync clients of a user being deleted have nothing left to mirror.
+    if user_id not in _deleting_users():
+        record_deletions(user_id, kind, ids)
+
+
+# Exchange rates are read once per currency per request.
+@receiver(request_started)
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def forget_exchange_rates(sender, **kwargs):
+    clear_rate_cache()
+
+
+@receiver(pre_delete, sender=User)
+def remember_deleting_user(sender, instance, **kwargs):
+    _deleting_users().add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    _deleting_users().discard(instance.pk)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = Transaction.objects.filter(pk=instance.pk).values(
+        'user_id', 'category_id', 'type', 'date', 'amount', 'currency'
+    ).first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups_on_transaction_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        rollups.apply_transaction(
+            previous['user_id'],
+            previous['category_id'],
+            previous['type'],
+            previous['date'],
+            to_base(previous['amount'], previous['currency'], previous['date']),
+            sign=-1,
+        )
+    rollups.apply_transaction(
+        instance.user_id,
+        instance.category_id,
+        instance.type,
+        instance.date,
+        to_base(instance.amount, instance.currency, instance.date),
+    )
+    instance._rollup_previous = None
+    _data_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollups_on_transaction_delete(sender, instance, **kwargs):
+    if instance.category_id in _deleting_categories():
+        return
+    _deleted(instance.user_id, Tombstone.KIND_TRANSACTION, [instance.pk])
+    rollups.apply_transaction(
+        instance.user_id,
+        instance.category_id,
+        instance.type,
+        instance.date,
+        to_base(instance.amount, instance.currency, instance.date),
+        sign=-1,
+    )
+    _data_changed(instance.user_id)
+
+
+@receiver(pre_save, sender=Category)
+def remember_previous_category_type(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous_type = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous_type = Category.objects.filter(
+        pk=instance.pk
+    ).values_list('type', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def update_rollups_on_category_type_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _data_changed(instance.user_id)
+    previous_type = getattr(instance, '_rollup_previous_type', None)
+    if created or not previous_type or previous_type == instance.type:
+        return
+    Transaction.objects.filter(category=instance).update(type=instance.type)
+    rollups.move_category_type(instance, previous_type, instance.type)
+    instance._rollup_previous_type = None
+
+
+@receiver(pre_delete, sender=Category)
+def update_rollups_on_category_delete(sender, instance, **kwargs):
+    rollups.remove_category(instance)
+    _deleted(
+        instance.user_id,
+        Tombstone.KIND_TRANSACTION,
+        Transaction.objects.filter(category=instance).values_list('pk', flat=True),
+    )
+    _deleting_categories().add(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def forget_deleted_category(sender, instance, **kwargs):
+    _deleting_categories().discard(instance.pk)
+    _deleted(instance.user_id, Tombstone.KIND_CATEGORY, [instance.pk])
+    _data_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def bump_version_on_budget_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _data_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Budget)
+def record_budget_deletion(sender, instance, **kwargs):
+    _deleted(instance.user_id, Tombstone.KIND_BUDGET, [instance.pk])
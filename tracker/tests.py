@@ -1,9 +1,56 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, AsyncClient
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.transaction import TransactionManagementError
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.urls import reverse
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
 from decimal import Decimal
-from datetime import date
-from .models import Category, Transaction, Budget
+from datetime import date, datetime, timedelta
+from .checks import check_sync_settle_window
+from .management.commands import bench_sqlite
+from .management.commands.bench import Command as BenchCommand
+from .middleware import RequestMetrics
+from .models import (
+    Category, Transaction, Budget, DailyCategoryRollup, MonthlyTypeRollup, DataVersion, RecurringRule, SpendForecast,
+    Tombstone, ExchangeRate,
+)
+from .services.archive import ArchiveError, iter_archive, restore_archive
+from .services.analytics import (
+    get_monthly_summary, get_category_breakdown, get_monthly_chart_data, get_range_report,
+    aget_monthly_summary, aget_monthly_chart_data,
+)
+from .services.dashboard import DashboardSnapshot
+from .services.forecast import forecast_month
+from .services.importer import TransactionImporter
+from .services.patterns import analyze_patterns
+from .services.cache import cache_stats, get_data_version
+from .services.bulk import bulk_change_transactions
+from .services.categories import merge_categories
+from .services.currency import to_base
+from .services.recurring import materialize_recurring, occurrence_dates
+from .services.reports import monthly_report_path, prune_reports
+from .services.rollups import rebuild_rollups
+from .services.search import INSERT_TRIGGER, deferred_search_indexing, search_transactions
+from .services.statements import load_statement_snapshots, statement_path
+from .services.sync import encode_sync_cursor, get_changes
+from .views import CategoryListView
 
 
 class CategoryModelTest(TestCase):
@@ -106,4 +153,1938 @@ class DashboardViewTest(TestCase):
         response = self.client.get(reverse('dashboard'))
         self.assertIn('summary', response.context)
         self.assertIn('category_breakdown', response.context)
-        self.assertIn('chart_data_json', response.context)
+        self.assertIn('chart_data_url', response.context)
+
+
+class RollupSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.rent = Category.objects.create(user=self.user, name='Rent', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+    
+    def snapshot(self):
+        daily = sorted(
+            DailyCategoryRollup.objects.values_list('user_id', 'category_id', 'date', 'total', 'count')
+        )
+        monthly = sorted(
+            MonthlyTypeRollup.objects.values_list('user_id', 'month', 'type', 'total', 'count')
+        )
+        return daily, monthly
+    
+    def assertRollupsMatchRebuild(self):
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+    
+    def test_create_update_delete_keep_rollups_in_sync(self):
+        """Test rollups follow transaction create, update and delete."""
+        txn = Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('10.00'), date=date(2026, 1, 5)
+        )
+        Transaction.objects.create(
+            user=self.user, category=self.salary, amount=Decimal('100.00'), date=date(2026, 1, 6)
+        )
+        summary = get_monthly_summary(self.user, 2026, 1)
+        self.assertEqual(summary['income'], Decimal('100.00'))
+        self.assertEqual(summary['expense'], Decimal('10.00'))
+        
+        txn.amount = Decimal('25.50')
+        txn.category = self.rent
+        txn.date = date(2026, 2, 1)
+        txn.save()
+        self.assertEqual(get_monthly_summary(self.user, 2026, 1)['expense'], Decimal('0.00'))
+        self.assertEqual(get_monthly_summary(self.user, 2026, 2)['expense'], Decimal('25.50'))
+        self.assertEqual(
+            get_category_breakdown(self.user, 2026, 2),
+            [{'name': 'Rent', 'amount': Decimal('25.50')}]
+        )
+        self.assertRollupsMatchRebuild()
+        
+        txn.delete()
+        self.assertFalse(DailyCategoryRollup.objects.filter(category=self.rent).exists())
+        self.assertRollupsMatchRebuild()
+    
+    def test_category_type_change_moves_totals(self):
+        """Test changing a category type moves its totals to the other type."""
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('40.00'), date=date(2026, 3, 1)
+        )
+        self.food.type = Category.TYPE_INCOME
+        self.food.save()
+        summary = get_monthly_summary(self.user, 2026, 3)
+        self.assertEqual(summary['income'], Decimal('40.00'))
+        self.assertEqual(summary['expense'], Decimal('0.00'))
+        self.assertRollupsMatchRebuild()
+    
+    def test_category_delete_removes_cascaded_transactions(self):
+        """Test deleting a category removes its transactions from the rollups."""
+        for day in range(1, 4):
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=Decimal('5.00'), date=date(2026, 4, day)
+            )
+        Transaction.objects.create(
+            user=self.user, category=self.rent, amount=Decimal('7.00'), date=date(2026, 4, 1)
+        )
+        self.food.delete()
+        self.assertEqual(get_monthly_summary(self.user, 2026, 4)['expense'], Decimal('7.00'))
+        self.assertRollupsMatchRebuild()
+
+
+class DashboardSnapshotTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        Transaction.objects.create(
+            user=self.user, category=salary, amount=Decimal('1000.00'), date=date(2026, 5, 1)
+        )
+        Budget.objects.create(user=self.user, month='2026-05', limit_amount=Decimal('500.00'))
+    
+    def add_expense_categories(self, count):
+        existing = Category.objects.filter(user=self.user, type=Category.TYPE_EXPENSE).count()
+        for index in range(count):
+            category = Category.objects.create(
+                user=self.user, name=f'Expense {existing + index}', type=Category.TYPE_EXPENSE
+            )
+            Transaction.objects.create(
+                user=self.user, category=category, amount=Decimal(index + 1), date=date(2026, 5, index % 28 + 1)
+            )
+    
+    def test_snapshot_matches_analytics_functions(self):
+        """Test the snapshot agrees with the standalone analytics functions."""
+        self.add_expense_categories(12)
+        snapshot = DashboardSnapshot(self.user, 2026, 5)
+        self.assertEqual(snapshot.summary, get_monthly_summary(self.user, 2026, 5))
+        self.assertEqual(snapshot.category_breakdown, get_category_breakdown(self.user, 2026, 5))
+        self.assertEqual(snapshot.chart_data, get_monthly_chart_data(self.user, 2026, 5))
+    
+    def test_snapshot_query_count_is_fixed(self):
+        """Test the snapshot runs two queries however many categories exist."""
+        self.add_expense_categories(2)
+        with self.assertNumQueries(2):
+            DashboardSnapshot(self.user, 2026, 5)
+        self.add_expense_categories(20)
+        with self.assertNumQueries(2):
+            DashboardSnapshot(self.user, 2026, 5)
+    
+    def test_dashboard_query_count_does_not_grow_with_categories(self):
+        """Test the dashboard view query count is independent of category count."""
+        url = reverse('dashboard') + '?year=2026&month=5'
+        self.add_expense_categories(1)
+        self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.add_expense_categories(15)
+        cache.clear()
+        with self.assertNumQueries(len(few)):
+            self.client.get(url)
+
+
+class ExportCsvTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        Transaction.objects.create(
+            user=self.user, category=food, amount=Decimal('12.50'), date=date(2026, 1, 2), note='Lunch, with "friends"'
+        )
+        Transaction.objects.create(
+            user=self.user, category=salary, amount=Decimal('1000.00'), date=date(2026, 1, 3)
+        )
+    
+    def test_export_streams_expected_csv(self):
+        """Test the streamed CSV contains the header and rows in list order."""
+        response = self.client.get(reverse('export-csv'))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(
+            content,
+            'Date,Category,Type,Amount,Currency,Note\r\n'
+            '2026-01-03,Salary,INCOME,1000.00,USD,\r\n'
+            '2026-01-02,Food,EXPENSE,12.50,USD,"Lunch, with ""friends"""\r\n'
+        )
+    
+    def test_export_applies_list_filters(self):
+        """Test the export honours the transaction list filters."""
+        response = self.client.get(reverse('export-csv'), {'type': Category.TYPE_EXPENSE})
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertNotIn('Salary', content)
+        self.assertIn('Food', content)
+    
+    def test_export_gzip_encoding(self):
+        """Test the export is gzip encoded only when the client accepts it with a non-zero q-value."""
+        plain = b''.join(self.client.get(reverse('export-csv')).streaming_content)
+        response = self.client.get(reverse('export-csv'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+        
+        for header, encoded in (
+            ('gzip;q=0, deflate', False), ('deflate, gzip; q=0.000', False), ('br', False),
+            ('*;q=0.5', True), ('gzip;q=0, *', False), ('GZIP;Q=0.8', True),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(reverse('export-csv'), HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get('Content-Encoding') == 'gzip', encoded)
+
+
+class TransactionKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        for index in range(45):
+            Transaction.objects.create(
+                user=self.user, category=food, amount=Decimal('1.00'), date=date(2026, 1, index % 10 + 1)
+            )
+        self.expected = list(
+            Transaction.objects.filter(user=self.user).order_by('-date', '-created_at', '-id').values_list('pk', flat=True)
+        )
+    
+    def test_cursor_pages_cover_every_row_in_order(self):
+        """Test following next cursors visits every row once, in list order."""
+        seen = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page_obj = self.client.get(reverse('transaction-list'), params).context['page_obj']
+            seen.extend(txn.pk for txn in page_obj)
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(seen, self.expected)
+        
+        previous = self.client.get(
+            reverse('transaction-list'), {'cursor': page_obj.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual([txn.pk for txn in previous], self.expected[20:40])
+    
+    def test_cursor_page_does_not_count_transactions(self):
+        """Test the page never issues COUNT(*) over the transaction table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transaction-list'))
+        self.assertEqual(response.context['page_obj'].total, 45)
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] and 'tracker_transaction' in query['sql']
+            for query in queries
+        ))
+    
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Test a malformed cursor shows the first page instead of failing."""
+        response = self.client.get(reverse('transaction-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual([txn.pk for txn in response.context['page_obj']], self.expected[:20])
+    
+    def test_page_number_links_still_work(self):
+        """Test the legacy page parameter is still honoured."""
+        response = self.client.get(reverse('transaction-list'), {'page': 3})
+        self.assertEqual([txn.pk for txn in response.context['page_obj']], self.expected[40:])
+
+
+class TransactionImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+    
+    def test_import_creates_transactions_and_categories(self):
+        """Test rows are imported, missing categories created and bad rows reported."""
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('1.00'), date=date(2026, 1, 2)
+        )
+        data = io.StringIO(
+            'Date,Category,Type,Amount,Note\n'
+            '2026-01-02,food,EXPENSE,12.50,Lunch\n'
+            '2026-01-03,Salary,INCOME,1000.00,\n'
+            '2026-01-04,Coffee,,-3.20,Bank row\n'
+            'not-a-date,Food,EXPENSE,1.00,\n'
+            '2026-01-05,Food,EXPENSE,abc,\n'
+        )
+        result = TransactionImporter(self.user, batch_size=2).run(data)
+        self.assertEqual(result.rows, 5)
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.error_count, 2)
+        self.assertEqual([line for line, _ in result.errors], [5, 6])
+        self.assertEqual(Transaction.objects.filter(category=self.food).count(), 2)
+        coffee = Category.objects.get(user=self.user, name='Coffee')
+        self.assertEqual(coffee.type, Category.TYPE_EXPENSE)
+        
+        summary = get_monthly_summary(self.user, 2026, 1)
+        self.assertEqual(summary['income'], Decimal('1000.00'))
+        self.assertEqual(summary['expense'], Decimal('16.70'))
+        
+        incremental = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(
+            incremental,
+            sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        )
+    
+    def test_categories_created_elsewhere_are_not_counted(self):
+        """Test a category created after the importer loaded its cache is reused, not counted."""
+        importer = TransactionImporter(self.user)
+        coffee = Category.objects.create(user=self.user, name='Coffee', type=Category.TYPE_EXPENSE)
+        result = importer.run(io.StringIO(
+            'Date,Category,Type,Amount,Note\n'
+            '2026-01-02,Coffee,EXPENSE,3.00,\n'
+            '2026-01-02,Tea,EXPENSE,2.00,\n'
+        ))
+        self.assertEqual((result.created, result.categories_created), (2, 1))
+        self.assertEqual(Transaction.objects.get(amount=Decimal('3.00')).category, coffee)
+    
+    def test_export_round_trips_through_import(self):
+        """Test a CSV export can be imported back for another user."""
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('9.99'), date=date(2026, 2, 1), note='a, b'
+        )
+        exported = b''.join(self.client.get(reverse('export-csv')).streaming_content)
+        other = User.objects.create_user(username='other', password='testpass123')
+        result = TransactionImporter(other).run(io.StringIO(exported.decode('utf-8')))
+        self.assertEqual(result.error_count, 0)
+        txn = Transaction.objects.get(user=other)
+        self.assertEqual((txn.amount, txn.note, txn.category.name), (Decimal('9.99'), 'a, b', 'Food'))
+    
+    def test_upload_view_imports_file(self):
+        """Test the upload view imports the posted file."""
+        upload = SimpleUploadedFile(
+            'statement.csv',
+            b'Date,Category,Type,Amount,Note\n2026-03-01,Food,EXPENSE,4.00,\n',
+            content_type='text/csv',
+        )
+        response = self.client.post(reverse('transaction-import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+
+class AnalyticsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('10.00'), date=date(2026, 6, 1)
+        )
+    
+    def test_repeat_call_is_served_from_cache(self):
+        """Test a repeated call only looks up the data version."""
+        get_monthly_summary(self.user, 2026, 6)
+        with self.assertNumQueries(1):
+            summary = get_monthly_summary(self.user, 2026, 6)
+        self.assertEqual(summary['expense'], Decimal('10.00'))
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1})
+    
+    def test_writes_invalidate_cached_results(self):
+        """Test transaction, category and budget writes change the data version."""
+        self.assertEqual(get_monthly_summary(self.user, 2026, 6)['expense'], Decimal('10.00'))
+        
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('5.00'), date=date(2026, 6, 2)
+        )
+        self.assertEqual(get_monthly_summary(self.user, 2026, 6)['expense'], Decimal('15.00'))
+        
+        Budget.objects.create(user=self.user, month='2026-06', limit_amount=Decimal('30.00'))
+        self.assertEqual(get_monthly_summary(self.user, 2026, 6)['budget_remaining'], Decimal('15.00'))
+        
+        self.food.type = Category.TYPE_INCOME
+        self.food.save()
+        self.assertEqual(get_monthly_summary(self.user, 2026, 6)['expense'], Decimal('0.00'))
+    
+    def test_deleting_user_leaves_no_data_version(self):
+        """Test cascaded deletes do not recreate the deleted user's data version."""
+        get_data_version(self.user)
+        self.user.delete()
+        self.assertFalse(DataVersion.objects.exists())
+    
+    def test_metrics_endpoint_requires_staff(self):
+        """Test the cache metrics endpoint is only available to staff."""
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+        self.assertEqual(client.get(reverse('cache-metrics')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = client.get(reverse('cache-metrics'))
+        self.assertContains(response, 'tracker_analytics_cache_hits_total')
+
+
+class ChartDataEndpointTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('8.00'), date=date(2026, 7, 4)
+        )
+        self.url = reverse('dashboard-chart-data') + '?year=2026&month=7'
+    
+    def test_returns_chart_payload_with_validators(self):
+        """Test the endpoint returns the chart data with ETag and Last-Modified."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), get_monthly_chart_data(self.user, 2026, 7))
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+    
+    def test_unchanged_data_returns_304_without_aggregation(self):
+        """Test a matching If-None-Match is answered without touching the rollups."""
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('rollup' in query['sql'] for query in queries))
+    
+    def test_write_changes_etag(self):
+        """Test a data change produces a new ETag and fresh data."""
+        etag = self.client.get(self.url)['ETag']
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('2.00'), date=date(2026, 7, 5)
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['daily_expenses']), 2)
+    
+    def test_other_months_have_distinct_etags(self):
+        """Test each month gets its own ETag."""
+        other = self.client.get(reverse('dashboard-chart-data') + '?year=2026&month=8')
+        self.assertNotEqual(other['ETag'], self.client.get(self.url)['ETag'])
+
+
+class RangeReportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        for month in range(1, 13):
+            Transaction.objects.create(
+                user=self.user, category=food, amount=Decimal(month * 10), date=date(2025, month, 15)
+            )
+            Transaction.objects.create(
+                user=self.user, category=salary, amount=Decimal('500.00'), date=date(2025, month, 1)
+            )
+        Budget.objects.create(user=self.user, month='2025-02', limit_amount=Decimal('50.00'))
+        Budget.objects.create(user=self.user, month='2025-03', limit_amount=Decimal('20.00'))
+    
+    def test_yearly_report_matches_monthly_summaries(self):
+        """Test the range report agrees with the per-month summaries in two queries."""
+        with self.assertNumQueries(2):
+            report_data = get_range_report(self.user, date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual(len(report_data['months']), 12)
+        for row, month in zip(report_data['months'], range(1, 13)):
+            summary = get_monthly_summary(self.user, 2025, month)
+            self.assertEqual((row['income'], row['expense']), (summary['income'], summary['expense']))
+        self.assertEqual(report_data['totals']['expense'], Decimal('780.00'))
+        self.assertEqual(report_data['budget']['months_budgeted'], 2)
+        self.assertEqual(report_data['budget']['months_within_budget'], 1)
+        self.assertEqual(
+            [(item['name'], item['amount']) for item in report_data['categories']],
+            [('Food', Decimal('780.00')), ('Salary', Decimal('6000.00'))]
+        )
+    
+    def test_quarter_report_view_and_json(self):
+        """Test the report page and JSON endpoint cover the requested quarter."""
+        response = self.client.get(reverse('report'), {'period': 'quarter', 'year': 2025, 'quarter': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['month'] for row in response.context['report']['months']],
+            ['2025-04', '2025-05', '2025-06']
+        )
+        data = self.client.get(reverse('report-data'), {'period': 'quarter', 'year': 2025, 'quarter': 2}).json()
+        self.assertEqual(data['start'], '2025-04-01')
+        self.assertEqual(data['end'], '2025-06-30')
+        self.assertEqual(data['totals']['expense'], 150.0)
+    
+    def test_out_of_range_year(self):
+        """Test a year without dates falls back on the page and is rejected by the JSON endpoint."""
+        current_year = date.today().year
+        for params in ({'year': 0}, {'year': 99999}, {'period': 'quarter', 'year': 9999, 'quarter': 4}):
+            response = self.client.get(reverse('report'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['selected_year'], current_year)
+            
+            response = self.client.get(reverse('report-data'), params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid year', response.json()['error'])
+        
+        response = self.client.get(reverse('report-data'), {'year': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('report-data'), {'period': 'quarter', 'year': 9998, 'quarter': 4})
+        self.assertEqual(response.json()['end'], '9998-12-31')
+
+
+class AsyncDashboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        Transaction.objects.create(
+            user=self.user, category=food, amount=Decimal('12.00'), date=date(2026, 8, 3)
+        )
+        Transaction.objects.create(
+            user=self.user, category=salary, amount=Decimal('900.00'), date=date(2026, 8, 1)
+        )
+        Budget.objects.create(user=self.user, month='2026-08', limit_amount=Decimal('100.00'))
+    
+    async def test_async_analytics_match_sync(self):
+        """Test the async analytics return the same results as the sync ones."""
+        self.assertEqual(
+            await aget_monthly_summary.uncached(self.user, 2026, 8),
+            await sync_to_async(get_monthly_summary.uncached)(self.user, 2026, 8)
+        )
+        self.assertEqual(
+            await aget_monthly_chart_data(self.user, 2026, 8),
+            await sync_to_async(get_monthly_chart_data.uncached)(self.user, 2026, 8)
+        )
+        snapshot = await DashboardSnapshot.afor_month(self.user, 2026, 8)
+        self.assertEqual(snapshot.summary['expense'], Decimal('12.00'))
+    
+    async def test_async_dashboard_renders(self):
+        """Test the async dashboard renders the same summary under the ASGI handler."""
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('dashboard-async'), {'year': 2026, 'month': 8})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary']['income'], Decimal('900.00'))
+        self.assertEqual(response.context['summary']['budget_remaining'], Decimal('88.00'))
+
+
+class PdfReportStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.report_dir.cleanup)
+        settings_override = override_settings(TRACKER_REPORT_CACHE_DIR=self.report_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('12.00'), date=date(2026, 8, 3)
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def download(self):
+        response = self.client.get(reverse('export-pdf'), {'year': 2026, 'month': 8})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return b''.join(response.streaming_content)
+    
+    def test_repeat_download_is_served_from_store(self):
+        """Test a repeat download reuses the stored file without rendering again."""
+        first = self.download()
+        self.assertTrue(first.startswith(b'%PDF'))
+        with mock.patch('tracker.services.reports.render_monthly_pdf') as render:
+            self.assertEqual(self.download(), first)
+        render.assert_not_called()
+    
+    def test_report_regenerated_only_when_month_changes(self):
+        """Test edits to another month keep the report while edits to its month replace it."""
+        self.download()
+        with mock.patch('tracker.services.reports.render_monthly_pdf', return_value=b'%PDF-new') as render:
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=Decimal('5.00'), date=date(2026, 7, 3)
+            )
+            self.download()
+            render.assert_not_called()
+            Budget.objects.create(user=self.user, month='2026-08', limit_amount=Decimal('100.00'))
+            self.assertEqual(self.download(), b'%PDF-new')
+        self.assertEqual(len(list(Path(self.report_dir.name).glob('*/*.pdf'))), 1)
+    
+    def test_invalid_month_rejected(self):
+        """Test a malformed or out-of-range year or month is a 400, not a server error."""
+        for params in ({'year': 'abc', 'month': 8}, {'year': 0, 'month': 8}, {'year': 2026, 'month': 13}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('export-pdf'), params).status_code, 400)
+    
+    def test_report_pruned_before_open_rendered_in_memory(self):
+        """Test a report evicted between lookup and open is still served."""
+        missing = Path(self.report_dir.name) / 'evicted.pdf'
+        with mock.patch('tracker.services.reports.monthly_report_path', return_value=missing):
+            self.assertTrue(self.download().startswith(b'%PDF'))
+        self.assertFalse(missing.exists())
+    
+    def test_prune_reports_evicts_by_size_and_age(self):
+        """Test eviction drops expired reports, then the least recently used ones."""
+        for month in (6, 7, 8):
+            monthly_report_path(self.user, 2026, month)
+        paths = sorted(Path(self.report_dir.name).glob('*/*.pdf'))
+        now = time.time()
+        for age, path in zip((500, 300, 100), paths):
+            os.utime(path, (now - age, now - age))
+        self.assertEqual(prune_reports(max_bytes=10 ** 9, max_age=400), 1)
+        size = paths[2].stat().st_size
+        self.assertEqual(prune_reports(max_bytes=size, max_age=400), 1)
+        self.assertEqual(list(Path(self.report_dir.name).glob('*/*.pdf')), [paths[2]])
+
+
+class SeedAndBenchCommandTest(TestCase):
+    def test_seed_fake_data_keeps_rollups_exact(self):
+        """Test seeded transactions, budgets and rollups are consistent."""
+        call_command(
+            'seed_fake_data', users=2, transactions=300, categories=5, months=3, seed=7,
+            stdout=io.StringIO(),
+        )
+        users = User.objects.filter(username__startswith='bench-')
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Transaction.objects.filter(user__in=users).count(), 600)
+        self.assertEqual(Category.objects.filter(user=users[0]).count(), 5)
+        self.assertEqual(Budget.objects.filter(user=users[0]).count(), 3)
+        
+        seeded = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(
+            seeded,
+            sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        )
+    
+    def test_bench_compare_flags_regressions(self):
+        """Test the bench baseline check reports slower results and extra queries only."""
+        command = BenchCommand()
+        command.options = {'tolerance': 0.25, 'min_delta_ms': 1.0}
+        baseline = {'results': {'100': {
+            'dashboard': {'p95_ms': 10.0, 'queries': 5},
+            'export_csv': {'p95_ms': 10.0, 'queries': 3},
+        }}}
+        results = {'results': {'100': {
+            'dashboard': {'p95_ms': 12.0, 'queries': 5},
+            'export_csv': {'p95_ms': 20.0, 'queries': 4},
+            'export_pdf': {'p95_ms': 50.0, 'queries': 9},
+        }}}
+        regressions = command.compare(baseline, results)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('100/export_csv') for line in regressions))
+    
+    def test_async_bench_requires_uvicorn(self):
+        """Test the async dashboard benchmark stops with a clear error when uvicorn is missing."""
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            with self.assertRaisesMessage(CommandError, 'pip install uvicorn'):
+                call_command('bench_async_dashboard', 'nobody')
+
+
+class RequestInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        for day in range(1, 4):
+            Transaction.objects.create(
+                user=self.user, category=food, amount=Decimal('5.00'), date=date(2026, 8, day)
+            )
+    
+    def get_transactions(self):
+        client = Client()
+        client.force_login(self.user)
+        return client.get(reverse('transaction-list'), {'page': 1})
+    
+    def test_disabled_by_default(self):
+        """Test no Server-Timing header is added when instrumentation is off."""
+        self.assertNotIn('Server-Timing', self.get_transactions())
+    
+    @override_settings(TRACKER_INSTRUMENTATION=True, TRACKER_SLOW_REQUEST_MS=10 ** 6)
+    def test_server_timing_header(self):
+        """Test the Server-Timing header reports query count and timings."""
+        response = self.get_transactions()
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        for name in ('tpl', 'view', 'total'):
+            self.assertIn(f'{name};dur=', timing)
+    
+    @override_settings(TRACKER_INSTRUMENTATION=True, TRACKER_SLOW_REQUEST_MS=0)
+    def test_logs_slow_requests_with_slowest_sql(self):
+        """Test requests over the threshold are logged with their slowest SQL."""
+        with self.assertLogs('tracker.performance', level='WARNING') as logs:
+            self.get_transactions()
+        output = '\n'.join(logs.output)
+        self.assertIn('Slow request GET /transactions/ 200', output)
+        self.assertIn('FROM "tracker_transaction"', output)
+    
+    @override_settings(TRACKER_INSTRUMENTATION=True, TRACKER_SLOW_REQUEST_MS=0)
+    def test_streaming_response_reported_after_content(self):
+        """Test queries run while a response streams are recorded and reported once it ends."""
+        client = Client()
+        client.force_login(self.user)
+        with self.assertLogs('tracker.performance', level='WARNING') as logs:
+            response = client.get(reverse('export-csv'))
+            self.assertNotIn('Server-Timing', response)
+            self.assertEqual(logs.output, [])
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('Food'), 3)
+        output = '\n'.join(logs.output)
+        self.assertIn('Slow request GET /export/csv/ 200', output)
+        self.assertIn('FROM "tracker_transaction"', output)
+    
+    def test_repeated_queries_flag_n_plus_one(self):
+        """Test identical statements run past the threshold are reported."""
+        metrics = RequestMetrics()
+        execute = lambda sql, params, many, context: None
+        for category_id in range(4):
+            metrics(execute, 'SELECT name FROM tracker_category WHERE id = %s', (category_id,), False, {})
+        metrics(execute, 'SELECT 1', (), False, {})
+        self.assertEqual(
+            metrics.repeated_queries(3),
+            [('SELECT name FROM tracker_category WHERE id = %s', 4)]
+        )
+        self.assertEqual(len(metrics.queries), 5)
+
+
+class SqliteProfileTest(TestCase):
+    def test_connection_pragmas_applied(self):
+        """Test the tuned pragmas are applied to new connections."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+    
+    def test_bench_database_uses_project_schema(self):
+        """Test bench_sqlite seeds a scratch copy of the transaction, rollup and search tables."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            bench_sqlite._setup(path, [], bench_sqlite._schema(), 50)
+            db = sqlite3.connect(path)
+            try:
+                self.assertEqual(db.execute('SELECT COUNT(*) FROM tracker_transaction_fts').fetchone(), (50,))
+                self.assertEqual(db.execute('SELECT SUM(count) FROM tracker_dailycategoryrollup').fetchone(), (50,))
+                self.assertEqual(db.execute('SELECT SUM(count) FROM tracker_monthlytyperollup').fetchone(), (50,))
+            finally:
+                db.close()
+
+
+class TransactionTypeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+    
+    def test_type_follows_category(self):
+        """Test the denormalized type is set on save and when the category changes."""
+        txn = Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('10.00'), date=date(2026, 8, 3)
+        )
+        self.assertEqual(txn.type, Category.TYPE_EXPENSE)
+        
+        txn.category = self.salary
+        txn.save(update_fields=['category'])
+        txn.refresh_from_db()
+        self.assertEqual(txn.type, Category.TYPE_INCOME)
+    
+    def test_category_type_change_updates_transactions(self):
+        """Test editing a category's type rewrites the type of its transactions."""
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('10.00'), date=date(2026, 8, 3)
+        )
+        self.food.type = Category.TYPE_INCOME
+        self.food.save()
+        self.assertEqual(
+            list(Transaction.objects.values_list('type', flat=True)),
+            [Category.TYPE_INCOME]
+        )
+        self.assertEqual(
+            Transaction.objects.filter(user=self.user, type=Category.TYPE_INCOME).count(), 1
+        )
+    
+    def test_import_sets_type(self):
+        """Test bulk imported transactions carry their category's type."""
+        TransactionImporter(self.user).run(io.StringIO(
+            'Date,Category,Type,Amount,Note\n'
+            '2026-08-01,Salary,INCOME,900.00,\n'
+            '2026-08-02,Food,EXPENSE,4.50,\n'
+        ))
+        for txn in Transaction.objects.select_related('category'):
+            self.assertEqual(txn.type, txn.category.type)
+
+
+class TransactionSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Groceries', type=Category.TYPE_EXPENSE)
+        self.travel = Category.objects.create(user=self.user, name='Travel', type=Category.TYPE_EXPENSE)
+        self.market = Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('20.00'),
+            date=date(2026, 8, 1), note='Weekly supermarket run'
+        )
+        self.train = Transaction.objects.create(
+            user=self.user, category=self.travel, amount=Decimal('45.00'),
+            date=date(2026, 8, 2), note='Train to the supermarket conference, supermarket expo'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def search(self, text, **params):
+        response = self.client.get(reverse('transaction-list'), {'q': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [txn.pk for txn in response.context['page_obj']]
+    
+    def test_prefix_search_over_notes_and_categories(self):
+        """Test every word must match a note or category name as a prefix."""
+        self.assertEqual(self.search('superm'), [self.train.pk, self.market.pk])
+        self.assertEqual(self.search('groc super'), [self.market.pk])
+        self.assertEqual(self.search('"tra*" (-'), [self.train.pk])
+        self.assertEqual(self.search('nothing'), [])
+    
+    def test_relevance_ordering(self):
+        """Test sort=relevance orders by rank and pages by number."""
+        response = self.client.get(reverse('transaction-list'), {'q': 'supermarket', 'sort': 'relevance'})
+        self.assertFalse(response.context['cursor_mode'])
+        self.assertEqual([txn.pk for txn in response.context['page_obj']], [self.train.pk, self.market.pk])
+    
+    def test_index_follows_changes(self):
+        """Test edits, category renames, bulk inserts and deletes reach the index."""
+        self.market.note = 'Farmers stall'
+        self.market.save()
+        self.assertEqual(self.search('farm'), [self.market.pk])
+        
+        self.food.name = 'Produce'
+        self.food.save()
+        self.assertEqual(self.search('produce'), [self.market.pk])
+        self.assertEqual(self.search('groceries'), [])
+        
+        TransactionImporter(self.user).run(io.StringIO(
+            'Date,Category,Type,Amount,Note\n2026-08-05,Produce,EXPENSE,3.00,Apples\n'
+        ))
+        self.assertEqual(len(self.search('apples')), 1)
+        
+        Transaction.objects.filter(pk=self.market.pk).delete()
+        self.assertEqual(self.search('farm'), [])
+    
+    def test_deferred_indexing_restores_trigger(self):
+        """Test the insert trigger comes back when the block raises, and the block needs a transaction."""
+        with self.assertRaises(ValueError), deferred_search_indexing():
+            raise ValueError
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = %s", [INSERT_TRIGGER])
+            self.assertEqual(cursor.fetchone(), (1,))
+        
+        with mock.patch.object(connection, 'in_atomic_block', False):
+            with self.assertRaises(TransactionManagementError), deferred_search_indexing():
+                pass
+    
+    def test_export_csv_search(self):
+        """Test the CSV export applies the search."""
+        response = self.client.get(reverse('export-csv'), {'q': 'train'})
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Train to the supermarket', content)
+        self.assertNotIn('Weekly', content)
+
+
+class RecurringRuleTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.rent = Category.objects.create(user=self.user, name='Rent', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+    
+    def test_occurrence_dates(self):
+        """Test daily, weekly and month-end monthly schedules."""
+        dates, following = occurrence_dates(
+            RecurringRule.FREQUENCY_MONTHLY, 1, date(2026, 1, 31), date(2026, 1, 31), date(2026, 4, 15)
+        )
+        self.assertEqual(dates, [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)])
+        self.assertEqual(following, date(2026, 4, 30))
+        
+        dates, following = occurrence_dates(
+            RecurringRule.FREQUENCY_WEEKLY, 2, date(2026, 1, 1), date(2026, 1, 15), date(2026, 2, 1)
+        )
+        self.assertEqual(dates, [date(2026, 1, 15), date(2026, 1, 29)])
+        self.assertEqual(following, date(2026, 2, 12))
+        
+        dates, following = occurrence_dates(
+            RecurringRule.FREQUENCY_DAILY, 3, date(2026, 1, 1), date(2026, 1, 7), date(2026, 1, 6)
+        )
+        self.assertEqual(dates, [])
+        self.assertEqual(following, date(2026, 1, 7))
+    
+    def test_materialize_is_idempotent_and_updates_rollups(self):
+        """Test due occurrences are created once, with rollups and rule state updated."""
+        rent = RecurringRule.objects.create(
+            user=self.user, category=self.rent, amount=Decimal('800.00'),
+            frequency=RecurringRule.FREQUENCY_MONTHLY, start_date=date(2026, 1, 1), end_date=date(2026, 3, 1),
+        )
+        RecurringRule.objects.create(
+            user=self.user, category=self.salary, amount=Decimal('100.00'), note='Weekly pay',
+            frequency=RecurringRule.FREQUENCY_WEEKLY, start_date=date(2026, 3, 2),
+        )
+        # An occurrence that already exists is skipped, not duplicated.
+        Transaction.objects.create(
+            user=self.user, category=self.rent, amount=Decimal('800.00'), date=date(2026, 2, 1),
+            recurring_rule=rent
+        )
+        
+        self.assertEqual(materialize_recurring(as_of=date(2026, 3, 20)), (2, 5))
+        self.assertEqual(materialize_recurring(as_of=date(2026, 3, 20)), (0, 0))
+        
+        rent.refresh_from_db()
+        self.assertFalse(rent.is_active)
+        self.assertEqual(rent.occurrences.count(), 3)
+        self.assertEqual(
+            Transaction.objects.filter(category=self.salary).count(), 3
+        )
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 3)['income'], Decimal('300.00'))
+        
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+    
+    def test_materialize_recurring_command(self):
+        """Test the command reports what it created."""
+        RecurringRule.objects.create(
+            user=self.user, category=self.rent, amount=Decimal('5.00'),
+            frequency=RecurringRule.FREQUENCY_DAILY, start_date=date(2026, 1, 1),
+        )
+        out = io.StringIO()
+        call_command('materialize_recurring', '--date=2026-01-10', stdout=out)
+        self.assertIn('Processed 1 due rules and created 10 transactions', out.getvalue())
+
+
+class SpendingPatternsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Groceries', type=Category.TYPE_EXPENSE)
+        self.dining = Category.objects.create(user=self.user, name='Dining', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        # 8 and 12 on alternating days from January 1st to March 1st,
+        # one 100 dinner on February 20th and a salary that is ignored.
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, category=self.food, type=Category.TYPE_EXPENSE,
+                amount=Decimal(8 if day % 2 == 0 else 12), date=date.fromordinal(date(2026, 1, 1).toordinal() + day)
+            )
+            for day in range(60)
+        ] + [
+            Transaction(
+                user=self.user, category=self.dining, type=Category.TYPE_EXPENSE,
+                amount=Decimal('100.00'), date=date(2026, 2, 20)
+            ),
+            Transaction(
+                user=self.user, category=self.salary, type=Category.TYPE_INCOME,
+                amount=Decimal('5000.00'), date=date(2026, 2, 20)
+            ),
+        ])
+        rebuild_rollups(self.user)
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_analyze_patterns(self):
+        """Test averages, period changes, volatility and anomalies from the rollups."""
+        with self.assertNumQueries(1):
+            patterns = analyze_patterns(self.user, date(2026, 3, 1))
+        
+        self.assertEqual(patterns['days'], 60)
+        self.assertEqual(patterns['average_30d'], 13.33)
+        self.assertEqual(patterns['week_over_week']['previous'], 168.0)
+        self.assertEqual(patterns['week_over_week']['current'], 72.0)
+        self.assertIsNone(patterns['year_over_year'])
+        self.assertEqual([category['name'] for category in patterns['volatility']], ['Dining', 'Groceries'])
+        self.assertEqual(patterns['anomalies'], [
+            {'date': '2026-02-20', 'amount': 108.0, 'baseline': 10.0, 'z_score': 49.0}
+        ])
+        self.assertEqual(len(patterns['rolling_average']), 60)
+        self.assertIsNone(patterns['rolling_average'][0]['average_7d'])
+        self.assertEqual(patterns['rolling_average'][-1], {'date': '2026-03-01', 'average_7d': 10.29, 'average_30d': 13.33})
+    
+    def test_no_expenses(self):
+        """Test a user without expenses gets empty patterns."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        patterns = analyze_patterns(other, date(2026, 3, 1))
+        self.assertEqual(patterns['days'], 0)
+        self.assertIsNone(patterns['average_7d'])
+        self.assertEqual(patterns['anomalies'], [])
+        self.assertEqual(patterns['volatility'], [])
+    
+    def test_dashboard_and_json_endpoint(self):
+        """Test the dashboard shows the patterns and the JSON endpoint revalidates with an ETag."""
+        response = self.client.get(reverse('dashboard'), {'year': 2026, 'month': 2})
+        self.assertEqual(response.context['patterns']['as_of'], '2026-02-28')
+        self.assertContains(response, 'Unusual days')
+        
+        url = reverse('dashboard-patterns')
+        response = self.client.get(url, {'year': 2026, 'month': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['anomalies'][0]['date'], '2026-02-20')
+        
+        response = self.client.get(url, {'year': 2026, 'month': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_open_month_revalidates_after_midnight(self):
+        """Test the patterns of an open month are not answered with a 304 once the day has moved on."""
+        class FakeDate(date):
+            current = date(2026, 3, 1)
+            
+            @classmethod
+            def today(cls):
+                return cls.current
+        
+        url = reverse('dashboard-patterns')
+        self.client.get(url, {'year': 2026, 'month': 3})
+        # The data was last changed before the fake calendar starts.
+        DataVersion.objects.filter(user=self.user).update(updated_at=timezone.make_aware(datetime(2026, 2, 28, 12)))
+        with mock.patch('tracker.services.patterns.date', FakeDate):
+            response = self.client.get(url, {'year': 2026, 'month': 3})
+            self.assertEqual(response.json()['as_of'], '2026-03-01')
+            validators = {'HTTP_IF_NONE_MATCH': response['ETag'], 'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+            self.assertEqual(self.client.get(url, {'year': 2026, 'month': 3}, **validators).status_code, 304)
+            
+            FakeDate.current = date(2026, 3, 2)
+            response = self.client.get(url, {'year': 2026, 'month': 3}, **validators)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['as_of'], '2026-03-02')
+            response = self.client.get(url, {'year': 2026, 'month': 3}, HTTP_IF_MODIFIED_SINCE=validators['HTTP_IF_MODIFIED_SINCE'])
+            self.assertEqual(response.status_code, 200)
+
+
+class SpendForecastTest(TestCase):
+    def setUp(self):
+        self.users = {}
+        for name in ('steady', 'over', 'idle', 'nobudget'):
+            user = User.objects.create_user(username=name, password='testpass123')
+            category = Category.objects.create(user=user, name='Groceries', type=Category.TYPE_EXPENSE)
+            self.users[name] = (user, category)
+        
+        def daily(name, first, last, amounts):
+            user, category = self.users[name]
+            return [
+                Transaction(
+                    user=user, category=category, type=Category.TYPE_EXPENSE,
+                    amount=Decimal(amounts[day % len(amounts)]), date=date.fromordinal(day),
+                )
+                for day in range(first.toordinal(), last.toordinal() + 1)
+            ]
+        
+        # 8 and 12 on alternating days since January; 25 a day in March only.
+        Transaction.objects.bulk_create(
+            daily('steady', date(2026, 1, 1), date(2026, 3, 15), [8, 12])
+            + daily('over', date(2026, 3, 1), date(2026, 3, 10), [25])
+            + daily('nobudget', date(2026, 3, 1), date(2026, 3, 15), [5])
+        )
+        rebuild_rollups()
+        for name, limit in (('steady', '320.00'), ('over', '200.00'), ('idle', '100.00')):
+            Budget.objects.create(user=self.users[name][0], month='2026-03', limit_amount=Decimal(limit))
+    
+    def forecast(self, name):
+        return SpendForecast.objects.get(user=self.users[name][0], month='2026-03')
+    
+    def test_forecast_month(self):
+        """Test every user is scored in a fixed number of queries."""
+        with self.assertNumQueries(3):
+            self.assertEqual(forecast_month(as_of=date(2026, 3, 15)), 4)
+        
+        steady = self.forecast('steady')
+        self.assertEqual(steady.spent, Decimal('148.00'))
+        # About 10 a day for the remaining 16 days, spread by 2 * sqrt(16) = 8:
+        # the 320 budget is about 1.6 sigma away.
+        self.assertAlmostEqual(float(steady.projected_expense), 307, delta=1)
+        self.assertAlmostEqual(steady.breach_probability, 0.05, delta=0.01)
+        
+        over = self.forecast('over')
+        self.assertEqual(over.spent, Decimal('250.00'))
+        self.assertEqual(over.breach_probability, 1.0)
+        
+        idle = self.forecast('idle')
+        self.assertEqual(idle.projected_expense, Decimal('0.00'))
+        self.assertEqual(idle.breach_probability, 0.0)
+        
+        nobudget = self.forecast('nobudget')
+        self.assertEqual(nobudget.projected_expense, Decimal('155.00'))
+        self.assertIsNone(nobudget.breach_probability)
+        
+        # A later run replaces the month's forecasts.
+        forecast_month(as_of=date(2026, 3, 31))
+        self.assertEqual(SpendForecast.objects.count(), 4)
+        self.assertEqual(self.forecast('steady').projected_expense, Decimal('148.00'))
+    
+    def test_dashboard_reads_stored_forecast(self):
+        """Test the dashboard shows the stored forecast and computes none itself."""
+        client = Client()
+        client.login(username='steady', password='testpass123')
+        response = client.get(reverse('dashboard'), {'year': 2026, 'month': 3})
+        self.assertIsNone(response.context['forecast'])
+        
+        out = io.StringIO()
+        call_command('forecast_spending', '--date=2026-03-15', stdout=out)
+        self.assertIn('Forecast 2026-03 for 4 users', out.getvalue())
+        
+        response = client.get(reverse('dashboard'), {'year': 2026, 'month': 3})
+        self.assertEqual(response.context['forecast'].as_of, date(2026, 3, 15))
+        self.assertContains(response, 'chance of exceeding the $320.00 budget')
+
+
+class CategoryUsageAndMergeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.groceries = Category.objects.create(user=self.user, name='Groceries', type=Category.TYPE_EXPENSE)
+        self.refunds = Category.objects.create(user=self.user, name='Refunds', type=Category.TYPE_INCOME)
+        for amount, txn_date, category in (
+            ('10.00', date(2026, 3, 1), self.food),
+            ('15.00', date(2026, 3, 9), self.food),
+            ('20.00', date(2026, 3, 1), self.groceries),
+            ('5.00', date(2026, 4, 2), self.groceries),
+        ):
+            Transaction.objects.create(
+                user=self.user, category=category, amount=Decimal(amount), date=txn_date, note='Market'
+            )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def assertRollupsExact(self):
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        monthly = sorted(MonthlyTypeRollup.objects.values_list('month', 'type', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+        self.assertEqual(monthly, sorted(MonthlyTypeRollup.objects.values_list('month', 'type', 'total', 'count')))
+    
+    def test_usage_statistics(self):
+        """Test the category list shows count, total and last use from one query."""
+        view = CategoryListView()
+        view.request = mock.Mock(user=self.user)
+        with self.assertNumQueries(1):
+            categories = {category.name: category for category in view.get_queryset()}
+        self.assertEqual(categories['Food'].transaction_count, 2)
+        self.assertEqual(categories['Food'].transaction_total, Decimal('25.00'))
+        self.assertEqual(categories['Food'].last_used, date(2026, 3, 9))
+        self.assertEqual(categories['Refunds'].transaction_count, 0)
+        self.assertIsNone(categories['Refunds'].last_used)
+        
+        response = self.client.get(reverse('category-list'))
+        self.assertContains(response, '2 transactions')
+        self.assertEqual([c.name for c in response.context['expense_categories']], ['Food', 'Groceries'])
+    
+    def test_merge_categories(self):
+        """Test a merge moves rows in bulk and keeps rollups, type and search in step."""
+        rule = RecurringRule.objects.create(
+            user=self.user, category=self.food, amount=Decimal('1.00'), start_date=date(2026, 5, 1)
+        )
+        version = get_data_version(self.user)[0]
+        
+        self.assertEqual(merge_categories(self.food, self.groceries), 2)
+        self.assertEqual(self.groceries.transaction_set.count(), 4)
+        rule.refresh_from_db()
+        self.assertEqual(rule.category, self.groceries)
+        self.assertNotEqual(get_data_version(self.user)[0], version)
+        self.assertEqual(
+            DailyCategoryRollup.objects.get(category=self.groceries, date=date(2026, 3, 1)).total, Decimal('30.00')
+        )
+        self.assertRollupsExact()
+        
+        # Moving to a category of the other type moves the monthly totals and the denormalized type.
+        self.assertEqual(merge_categories(self.groceries, self.refunds, delete_source=True), 4)
+        self.assertFalse(Category.objects.filter(pk=self.groceries.pk).exists())
+        self.assertEqual(set(Transaction.objects.values_list('type', flat=True)), {Category.TYPE_INCOME})
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 3)['income'], Decimal('45.00'))
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 3)['expense'], Decimal('0.00'))
+        self.assertRollupsExact()
+        
+        response = self.client.get(reverse('transaction-list'), {'q': 'refunds market'})
+        self.assertEqual(len(response.context['page_obj']), 4)
+        
+        with self.assertRaises(ValueError):
+            merge_categories(self.refunds, self.refunds)
+    
+    def test_merge_view(self):
+        """Test the merge view only offers the user's own categories."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        foreign = Category.objects.create(user=other, name='Food', type=Category.TYPE_EXPENSE)
+        url = reverse('category-merge', args=[self.food.pk])
+        
+        response = self.client.post(url, {'target': foreign.pk, 'delete_source': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertEqual(self.food.transaction_set.count(), 2)
+        
+        response = self.client.post(url, {'target': self.groceries.pk, 'delete_source': 'on'})
+        self.assertRedirects(response, reverse('category-list'))
+        self.assertFalse(Category.objects.filter(pk=self.food.pk).exists())
+        self.assertEqual(self.groceries.transaction_set.count(), 4)
+        
+        response = self.client.get(reverse('category-merge', args=[foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TransactionBulkActionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.travel = Category.objects.create(user=self.user, name='Travel', type=Category.TYPE_EXPENSE)
+        self.refunds = Category.objects.create(user=self.user, name='Refunds', type=Category.TYPE_INCOME)
+        self.rows = [
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=Decimal('10.00'),
+                date=date(2026, 3, 30 - day), note='Imported' if day % 2 else 'Lunch'
+            )
+            for day in range(6)
+        ]
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        other_food = Category.objects.create(user=self.other, name='Food', type=Category.TYPE_EXPENSE)
+        self.foreign = Transaction.objects.create(
+            user=self.other, category=other_food, amount=Decimal('99.00'), date=date(2026, 3, 30), note='Imported'
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def bulk(self, data, filters=''):
+        return self.client.post(f"{reverse('transaction-bulk')}?{filters}", data, follow=True)
+    
+    def assertRollupsExact(self):
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        monthly = sorted(MonthlyTypeRollup.objects.values_list('user_id', 'month', 'type', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+        self.assertEqual(monthly, sorted(MonthlyTypeRollup.objects.values_list('user_id', 'month', 'type', 'total', 'count')))
+    
+    def test_dry_run_changes_nothing(self):
+        """Test a dry run only reports how many rows would change."""
+        response = self.bulk({'action': 'delete', 'scope': 'filtered', 'dry_run': 'on'}, 'q=imported')
+        self.assertContains(response, '3 transactions would be deleted.')
+        self.assertEqual(Transaction.objects.count(), 7)
+    
+    def test_recategorize_selected(self):
+        """Test selected rows move with one UPDATE and other users' ids are ignored."""
+        ids = [self.rows[0].pk, self.rows[1].pk, self.foreign.pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk({'action': 'recategorize', 'scope': 'selected', 'ids': ids, 'category': self.refunds.pk})
+        self.assertContains(response, '2 transactions moved to Refunds.')
+        self.assertEqual(
+            len([query for query in queries if query['sql'].startswith('UPDATE "tracker_transaction"')]), 1
+        )
+        self.assertEqual(self.refunds.transaction_set.count(), 2)
+        self.assertEqual(Transaction.objects.filter(type=Category.TYPE_INCOME).count(), 2)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.category.user, self.other)
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 3)['income'], Decimal('20.00'))
+        self.assertRollupsExact()
+    
+    def test_shift_dates_of_filtered_rows(self):
+        """Test every row matching the filters moves, across a month boundary."""
+        response = self.bulk({'action': 'shift_date', 'scope': 'filtered', 'days': '3'}, 'q=lunch')
+        self.assertContains(response, '3 transactions shifted by 3 days.')
+        self.assertEqual(
+            sorted(Transaction.objects.filter(note='Lunch').values_list('date', flat=True)),
+            [date(2026, 3, 29), date(2026, 3, 31), date(2026, 4, 2)],
+        )
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 4)['expense'], Decimal('10.00'))
+        self.assertRollupsExact()
+    
+    def test_delete_filtered(self):
+        """Test deleting by filter removes only the user's matching rows and their search entries."""
+        response = self.bulk({'action': 'delete', 'scope': 'filtered'}, 'date_from=2026-03-28')
+        self.assertContains(response, '3 transactions deleted.')
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+        response = self.client.get(reverse('transaction-list'), {'q': 'imported'})
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertRollupsExact()
+    
+    def test_invalid_requests(self):
+        """Test missing selections and parameters are reported, and GET is refused."""
+        response = self.bulk({'action': 'delete', 'scope': 'selected'})
+        self.assertContains(response, 'Select at least one transaction.')
+        response = self.bulk({'action': 'recategorize', 'scope': 'filtered'})
+        self.assertContains(response, 'Choose the category to move the transactions to.')
+        self.assertEqual(Transaction.objects.count(), 7)
+        self.assertEqual(self.client.get(reverse('transaction-bulk')).status_code, 405)
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        # Another user's categories first, so restored ids cannot line up by accident.
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        Category.objects.create(user=self.other, name='Other', type=Category.TYPE_EXPENSE)
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        for day in range(1, 11):
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=Decimal('12.50'), date=date(2026, 1, day), note=f'Lunch {day}'
+            )
+        Transaction.objects.create(
+            user=self.user, category=self.salary, amount=Decimal('3000.00'), date=date(2026, 1, 31), note='January pay'
+        )
+        Budget.objects.create(user=self.user, month='2026-01', limit_amount=Decimal('500.00'))
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def archive(self, user=None):
+        return io.BytesIO(b''.join(iter_archive(user or self.user)))
+    
+    def test_archive_members(self):
+        """Test the archive holds a manifest and one NDJSON file per model."""
+        with zipfile.ZipFile(self.archive()) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ['budgets.ndjson', 'categories.ndjson', 'manifest.json', 'transactions.ndjson'],
+            )
+            self.assertEqual(len(archive.read('transactions.ndjson').splitlines()), 11)
+    
+    def test_round_trip_into_new_account(self):
+        """Test a restore remaps categories and leaves rollups and search in step."""
+        restored = User.objects.create_user(username='restored')
+        counts = restore_archive(restored, self.archive())
+        self.assertEqual(counts, {'categories': 2, 'transactions': 11, 'budgets': 1})
+        
+        food = Category.objects.get(user=restored, name='Food')
+        self.assertNotEqual(food.pk, self.food.pk)
+        self.assertEqual(food.transaction_set.count(), 10)
+        self.assertEqual(
+            sorted(Transaction.objects.filter(user=restored).values_list('date', 'amount', 'note', 'type')),
+            sorted(Transaction.objects.filter(user=self.user).values_list('date', 'amount', 'note', 'type')),
+        )
+        self.assertEqual(Budget.objects.get(user=restored).limit_amount, Decimal('500.00'))
+        summary = get_monthly_summary(restored, 2026, 1)
+        self.assertEqual(summary['income'], Decimal('3000.00'))
+        self.assertEqual(summary['expense'], Decimal('125.00'))
+        self.assertEqual(
+            search_transactions(Transaction.objects.filter(user=restored), 'january').get().note, 'January pay'
+        )
+        
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+    
+    def test_restore_requires_empty_account(self):
+        """Test restoring into an account with data is refused and changes nothing."""
+        with self.assertRaises(ArchiveError):
+            restore_archive(self.user, self.archive())
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 11)
+    
+    def test_invalid_archives_rejected(self):
+        """Test files that are not archives, or have bad rows, roll back entirely."""
+        restored = User.objects.create_user(username='restored')
+        with self.assertRaises(ArchiveError):
+            restore_archive(restored, io.BytesIO(b'not a zip'))
+        
+        broken = io.BytesIO()
+        with zipfile.ZipFile(self.archive()) as source, zipfile.ZipFile(broken, 'w') as target:
+            for name in source.namelist():
+                data = source.read(name)
+                if name == 'transactions.ndjson':
+                    data += b'{"id": 999, "category_id": 12345, "amount": "1.00"}\n'
+                target.writestr(name, data)
+        broken.seek(0)
+        with self.assertRaises(ArchiveError):
+            restore_archive(restored, broken)
+        self.assertFalse(Category.objects.filter(user=restored).exists())
+        self.assertFalse(Transaction.objects.filter(user=restored).exists())
+    
+    def test_invalid_values_rejected(self):
+        """Test amounts and budget months the models would not accept reject the whole archive."""
+        restored = User.objects.create_user(username='restored')
+        
+        def tampered(member, field, value):
+            target = io.BytesIO()
+            with zipfile.ZipFile(self.archive()) as source, zipfile.ZipFile(target, 'w') as archive:
+                for name in source.namelist():
+                    data = source.read(name)
+                    if name == member:
+                        rows = [json.loads(line) for line in data.splitlines()]
+                        rows[-1][field] = value
+                        data = '\n'.join(json.dumps(row) for row in rows).encode('utf-8')
+                    archive.writestr(name, data)
+            target.seek(0)
+            return target
+        
+        for member, field, value in [
+            ('transactions.ndjson', 'amount', '-5.00'),
+            ('transactions.ndjson', 'amount', 'NaN'),
+            ('transactions.ndjson', 'amount', '1.234'),
+            ('transactions.ndjson', 'amount', '100000000000.00'),
+            ('budgets.ndjson', 'month', '2026-13'),
+            ('budgets.ndjson', 'limit_amount', '0.00'),
+            ('categories.ndjson', 'name', 'x' * 101),
+        ]:
+            with self.subTest(field=field, value=value), self.assertRaises(ArchiveError):
+                restore_archive(restored, tampered(member, field, value))
+        self.assertFalse(Category.objects.filter(user=restored).exists())
+        self.assertFalse(DailyCategoryRollup.objects.filter(user=restored).exists())
+    
+    def test_export_endpoint_streams_zip(self):
+        """Test the export view streams the logged-in user's archive."""
+        response = self.client.get(reverse('export-archive'))
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('expense-tracker-testuser-', response['Content-Disposition'])
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertNotIn(b'Other', archive.read('categories.ndjson'))
+    
+    def test_restore_command(self):
+        """Test the command restores a file into a newly created user."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'archive.zip'
+            path.write_bytes(self.archive().getvalue())
+            out = io.StringIO()
+            call_command('restore_archive', 'newuser', str(path), '--create-user', stdout=out)
+        self.assertIn('Restored 2 categories, 11 transactions and 1 budgets', out.getvalue())
+        self.assertEqual(Transaction.objects.filter(user__username='newuser').count(), 11)
+
+
+class MonthlyStatementTest(TestCase):
+    def setUp(self):
+        self.statement_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.statement_dir.cleanup)
+        settings_override = override_settings(TRACKER_STATEMENT_DIR=self.statement_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.users = []
+        for index in range(3):
+            user = User.objects.create_user(username=f'user{index}', password='testpass123')
+            food = Category.objects.create(user=user, name='Food', type=Category.TYPE_EXPENSE)
+            salary = Category.objects.create(user=user, name='Salary', type=Category.TYPE_INCOME)
+            for day in (3, 17):
+                Transaction.objects.create(
+                    user=user, category=food, amount=Decimal('10.00') * (index + 1), date=date(2026, 4, day)
+                )
+            Transaction.objects.create(user=user, category=salary, amount=Decimal('900.00'), date=date(2026, 4, 30))
+            self.users.append(user)
+        Budget.objects.create(user=self.users[0], month='2026-04', limit_amount=Decimal('50.00'))
+    
+    def generate(self, *args):
+        out = io.StringIO()
+        call_command('generate_statements', '--month=2026-04', '--workers=0', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_batched_snapshots_match_dashboard(self):
+        """Test a batch of users is loaded with three queries and matches the per-user snapshot."""
+        user_ids = [user.pk for user in self.users]
+        with self.assertNumQueries(3):
+            snapshots = load_statement_snapshots(user_ids, 2026, 4)
+        for user, snapshot in zip(self.users, snapshots):
+            expected = DashboardSnapshot(user, 2026, 4)
+            self.assertEqual(snapshot.summary, expected.summary)
+            self.assertEqual(snapshot.category_breakdown, expected.category_breakdown)
+        self.assertEqual(snapshots[0].summary['budget_remaining'], Decimal('30.00'))
+    
+    def test_generates_one_pdf_per_user(self):
+        """Test every active user gets a statement for the month."""
+        output = self.generate('--batch-size=2')
+        self.assertIn('Generated 3 statements for 2026-04', output)
+        for user in self.users:
+            self.assertTrue(statement_path(user.pk, 2026, 4).read_bytes().startswith(b'%PDF'))
+    
+    def test_resume_skips_finished_users(self):
+        """Test a re-run only renders users without a statement and clears partial files."""
+        finished = statement_path(self.users[0].pk, 2026, 4)
+        finished.parent.mkdir(parents=True)
+        finished.write_bytes(b'%PDF finished')
+        partial = finished.parent / 'abc.tmp'
+        partial.write_bytes(b'%PDF partial')
+        
+        self.assertIn('Generated 2 statements', self.generate())
+        self.assertEqual(finished.read_bytes(), b'%PDF finished')
+        self.assertFalse(partial.exists())
+        self.assertIn('Generated 0 statements', self.generate())
+
+
+@override_settings(TRACKER_SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        self.rows = [
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=Decimal('10.00'), date=date(2026, 2, day), note=f'Lunch {day}'
+            )
+            for day in range(1, 6)
+        ]
+        Budget.objects.create(user=self.user, month='2026-02', limit_amount=Decimal('400.00'))
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        other_food = Category.objects.create(user=self.other, name='Food', type=Category.TYPE_EXPENSE)
+        self.foreign = Transaction.objects.create(
+            user=self.other, category=other_food, amount=Decimal('99.00'), date=date(2026, 2, 1)
+        )
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(reverse('sync-changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+    
+    def sync_all(self):
+        """Sync from scratch in pages of three; return the collected ids and the final cursor."""
+        ids, cursor, pages = {'categories': [], 'transactions': [], 'budgets': []}, None, 0
+        while True:
+            changes = self.sync(cursor, limit=3).json()
+            pages += 1
+            for name in ids:
+                ids[name] += [row['id'] for row in changes[name]]
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                return ids, cursor, pages
+    
+    def upload(self, changes):
+        return self.client.post(reverse('sync-upload'), json.dumps(changes), content_type='application/json')
+    
+    def assertRollupsExact(self):
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+    
+    def test_full_sync_in_pages_then_empty(self):
+        """Test a first sync pages through the user's rows once and a repeat sync is tiny."""
+        ids, cursor, pages = self.sync_all()
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids['categories'], [self.food.pk, self.salary.pk])
+        self.assertEqual(sorted(ids['transactions']), [row.pk for row in self.rows])
+        self.assertEqual(len(ids['budgets']), 1)
+        
+        response = self.sync(cursor)
+        self.assertEqual(
+            {key: value for key, value in response.json().items() if key != 'cursor'},
+            {'categories': [], 'transactions': [], 'budgets': [], 'deleted': [], 'has_more': False},
+        )
+        self.assertLess(len(response.content), 400)
+    
+    def test_changes_and_deletions_since_cursor(self):
+        """Test edits, bulk updates and deletes, including cascades, reach the client."""
+        _, cursor, _ = self.sync_all()
+        self.rows[0].amount = Decimal('11.00')
+        self.rows[0].save()
+        bulk_change_transactions(self.user, Transaction.objects.filter(pk=self.rows[1].pk), 'shift_date', days=1)
+        bulk_change_transactions(self.user, Transaction.objects.filter(pk=self.rows[2].pk), 'delete')
+        budget = Budget.objects.get(user=self.user)
+        Budget.objects.filter(user=self.user).delete()
+        
+        changes = self.sync(cursor).json()
+        self.assertEqual([row['id'] for row in changes['transactions']], [self.rows[0].pk, self.rows[1].pk])
+        self.assertEqual(changes['transactions'][0]['amount'], '11.00')
+        self.assertEqual(
+            sorted((row['kind'], row['id']) for row in changes['deleted']),
+            [('budget', budget.pk), ('transaction', self.rows[2].pk)],
+        )
+        
+        food_id = self.food.pk
+        self.food.delete()
+        changes = self.sync(changes['cursor']).json()
+        self.assertEqual(
+            sorted((row['kind'], row['id']) for row in changes['deleted']),
+            sorted([('category', food_id)] + [('transaction', row.pk) for row in self.rows[:2] + self.rows[3:]]),
+        )
+        self.assertFalse(Tombstone.objects.filter(user=self.other).exists())
+    
+    def test_recent_changes_wait_to_settle(self):
+        """Test rows changed inside the settle window are held back until it passes."""
+        with override_settings(TRACKER_SYNC_SETTLE_SECONDS=60):
+            self.assertEqual(get_changes(self.user)['transactions'], [])
+            with mock.patch('tracker.services.sync.timezone.now', return_value=timezone.now() + timedelta(minutes=2)):
+                self.assertEqual(len(get_changes(self.user)['transactions']), 5)
+    
+    def test_settle_window_must_outlast_busy_timeout(self):
+        """Test the startup check rejects a settle window no longer than the SQLite busy timeout."""
+        with override_settings(TRACKER_SYNC_SETTLE_SECONDS=7):
+            self.assertEqual(check_sync_settle_window(None), [])
+        with override_settings(TRACKER_SYNC_SETTLE_SECONDS=2):
+            self.assertEqual([error.id for error in check_sync_settle_window(None)], ['tracker.E001'])
+    
+    def test_bad_and_expired_cursors(self):
+        """Test garbage cursors are rejected and stale ones ask the client to start over."""
+        response = self.client.get(reverse('sync-changes'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        positions = {key: (None, None) for key in 'ctb'}
+        positions['d'] = (timezone.now() - timedelta(days=365), 0)
+        response = self.client.get(reverse('sync-changes'), {'cursor': encode_sync_cursor(positions)})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['reset'])
+    
+    def test_upload_applies_batch(self):
+        """Test one upload creates, updates and deletes rows and keeps rollups exact."""
+        _, cursor, _ = self.sync_all()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.upload({
+                'categories': [{'ref': 'new-cat', 'name': 'Travel', 'type': 'EXPENSE'}],
+                'transactions': [
+                    {'ref': 'a', 'category_ref': 'new-cat', 'amount': '45.10', 'date': '2026-02-20', 'note': 'Train'},
+                    {'ref': 'b', 'category_id': self.salary.pk, 'amount': 2500, 'date': '2026-02-28'},
+                    {'id': self.rows[0].pk, 'category_ref': 'new-cat', 'amount': '12.00', 'date': '2026-03-01'},
+                ],
+                'budgets': [
+                    {'month': '2026-02', 'limit_amount': '450.00'},
+                    {'month': '2026-03', 'limit_amount': '300'},
+                ],
+                'deleted': [{'kind': 'transaction', 'id': self.rows[1].pk}, {'kind': 'transaction', 'id': 123456}],
+            })
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        travel = Category.objects.get(user=self.user, name='Travel')
+        self.assertEqual(result['categories']['ids'], {'new-cat': travel.pk})
+        self.assertEqual(result['transactions']['created'], 2)
+        self.assertEqual(result['transactions']['updated'], 1)
+        self.assertEqual(result['budgets']['created'], 1)
+        self.assertEqual(result['deleted'], 1)
+        self.assertEqual(
+            len([query for query in queries if query['sql'].startswith('INSERT INTO "tracker_transaction"')]), 1
+        )
+        
+        train = Transaction.objects.get(pk=result['transactions']['ids']['a'])
+        self.assertEqual((train.category, train.type, train.amount), (travel, Category.TYPE_EXPENSE, Decimal('45.10')))
+        self.rows[0].refresh_from_db()
+        self.assertEqual((self.rows[0].category, self.rows[0].date), (travel, date(2026, 3, 1)))
+        self.assertEqual(Budget.objects.get(user=self.user, month='2026-02').limit_amount, Decimal('450.00'))
+        self.assertEqual(get_monthly_summary.uncached(self.user, 2026, 2)['income'], Decimal('2500.00'))
+        self.assertEqual(
+            search_transactions(Transaction.objects.filter(user=self.user), 'train').get(), train
+        )
+        self.assertRollupsExact()
+        
+        changes = self.sync(cursor).json()
+        self.assertEqual(len(changes['transactions']), 3)
+        self.assertEqual(changes['deleted'], [
+            {'kind': 'transaction', 'id': self.rows[1].pk, 'deleted_at': changes['deleted'][0]['deleted_at']}
+        ])
+    
+    def test_invalid_upload_changes_nothing(self):
+        """Test a bad row, or another user's id, rejects the whole batch."""
+        for transactions in (
+            [{'category_id': self.food.pk, 'amount': '1.005', 'date': '2026-02-20'}],
+            [{'category_id': self.food.pk, 'amount': '5.00', 'date': 'yesterday'}],
+            [{'id': self.foreign.pk, 'category_id': self.food.pk, 'amount': '5.00', 'date': '2026-02-20'}],
+            [{'category_id': self.foreign.category_id, 'amount': '5.00', 'date': '2026-02-20'}],
+            [{'category_id': self.food.pk, 'date': '2026-02-20'}],
+        ):
+            response = self.upload({
+                'categories': [{'name': 'Travel', 'type': 'EXPENSE'}],
+                'transactions': transactions,
+            })
+            self.assertEqual(response.status_code, 400, transactions)
+            self.assertIn('error', response.json())
+        self.assertFalse(Category.objects.filter(name='Travel').exists())
+        self.assertEqual(Transaction.objects.count(), 6)
+        response = self.upload({'deleted': [{'kind': 'transaction', 'id': self.foreign.pk}]})
+        self.assertEqual(response.json()['deleted'], 0)
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+
+
+class CurrencyTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        ExchangeRate.objects.create(currency='EUR', date=date(2026, 1, 1), rate=Decimal('1.25'))
+        ExchangeRate.objects.create(currency='EUR', date=date(2026, 2, 1), rate=Decimal('1.5'))
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def add(self, amount, day, currency='USD'):
+        return Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal(amount), currency=currency, date=day
+        )
+    
+    def daily(self):
+        return dict(DailyCategoryRollup.objects.filter(user=self.user).values_list('date', 'total'))
+    
+    def assertRollupsExact(self):
+        daily = sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count'))
+        monthly = sorted(MonthlyTypeRollup.objects.values_list('month', 'type', 'total', 'count'))
+        rebuild_rollups()
+        self.assertEqual(daily, sorted(DailyCategoryRollup.objects.values_list('category_id', 'date', 'total', 'count')))
+        self.assertEqual(monthly, sorted(MonthlyTypeRollup.objects.values_list('month', 'type', 'total', 'count')))
+    
+    def test_rollups_convert_at_the_rate_of_the_date(self):
+        """Test foreign amounts are converted with the latest earlier rate, or the first one."""
+        self.add('10.00', date(2025, 12, 20), 'EUR')
+        self.add('10.00', date(2026, 1, 31), 'EUR')
+        self.add('10.00', date(2026, 2, 10), 'EUR')
+        self.add('5.00', date(2026, 2, 10))
+        self.assertEqual(self.daily(), {
+            date(2025, 12, 20): Decimal('12.50'),
+            date(2026, 1, 31): Decimal('12.50'),
+            date(2026, 2, 10): Decimal('20.00'),
+        })
+        self.assertEqual(
+            MonthlyTypeRollup.objects.get(user=self.user, month='2026-02').total, Decimal('20.00')
+        )
+        self.assertRollupsExact()
+    
+    def test_edits_deletes_and_bulk_shift_keep_rollups_exact(self):
+        """Test signals and bulk actions convert the same way as the SQL rebuild."""
+        txn = self.add('3.33', date(2026, 1, 20), 'EUR')
+        other = self.add('7.77', date(2026, 1, 25), 'EUR')
+        txn.currency = 'USD'
+        txn.save()
+        self.assertRollupsExact()
+        txn.currency = 'EUR'
+        txn.save()
+        other.delete()
+        self.assertRollupsExact()
+        
+        bulk_change_transactions(
+            self.user, Transaction.objects.filter(date__lt=date(2026, 2, 1)), 'shift_date', days=20
+        )
+        self.assertEqual(self.daily(), {date(2026, 2, 9): Decimal('5.00')})
+        self.assertRollupsExact()
+    
+    def test_rate_lookups_are_cached_per_request(self):
+        """Test each currency's rates are read once, and again after a request starts or a rate changes."""
+        with self.assertNumQueries(1):
+            for day in range(1, 29):
+                to_base(Decimal('2.00'), 'EUR', date(2026, 2, day))
+        with self.assertNumQueries(0):
+            self.assertEqual(to_base(Decimal('2.00'), 'EUR', date(2026, 1, 5)), Decimal('2.50'))
+        ExchangeRate.objects.filter(date=date(2026, 2, 1)).update(rate=Decimal('2'))
+        self.client.get(reverse('transaction-list'))
+        self.assertEqual(to_base(Decimal('2.00'), 'EUR', date(2026, 2, 5)), Decimal('4.00'))
+    
+    def test_dashboard_query_count_does_not_grow_with_currencies(self):
+        """Test the dashboard reads converted rollups, whatever the transactions' currencies."""
+        self.add('10.00', date.today())
+        cache.clear()
+        with CaptureQueriesContext(connection) as base_only:
+            self.client.get(reverse('dashboard'))
+        for day in range(1, 6):
+            ExchangeRate.objects.create(currency='GBP', date=date.today() - timedelta(days=day), rate=Decimal('1.3'))
+            self.add('10.00', date.today() - timedelta(days=day % 3), 'EUR' if day % 2 else 'GBP')
+        cache.clear()
+        with CaptureQueriesContext(connection) as mixed:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mixed), len(base_only))
+    
+    def test_form_and_importer_accept_only_currencies_with_rates(self):
+        """Test transactions can be entered in loaded currencies and unknown codes are rejected."""
+        response = self.client.post(reverse('transaction-create'), {
+            'category': self.food.pk, 'amount': '8.00', 'currency': 'EUR', 'date': '2026-02-03',
+        })
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post(reverse('transaction-create'), {
+            'category': self.food.pk, 'amount': '8.00', 'currency': 'XYZ', 'date': '2026-02-03',
+        })
+        self.assertEqual(response.status_code, 200)
+        
+        result = TransactionImporter(self.user).run(io.StringIO(
+            'Date,Category,Type,Amount,Currency,Note\n'
+            '2026-02-03,Food,EXPENSE,4.00,eur,\n'
+            '2026-02-04,Food,EXPENSE,4.00,,\n'
+            '2026-02-05,Food,EXPENSE,4.00,XYZ,\n'
+        ))
+        self.assertEqual((result.created, result.error_count), (2, 1))
+        self.assertEqual(self.daily()[date(2026, 2, 3)], Decimal('18.00'))
+        self.assertRollupsExact()
+    
+    def test_load_command_reconverts_existing_totals(self):
+        """Test loading rates upserts them and rebuilds the totals of affected users."""
+        self.add('10.00', date(2026, 1, 10), 'EUR')
+        version = get_data_version(self.user)[0]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'rates.csv'
+            path.write_text('date,currency,rate\n2026-01-01,EUR,2\n2026-01-01,GBP,1.3\n')
+            out = io.StringIO()
+            call_command('load_exchange_rates', str(path), stdout=out)
+            self.assertIn('Loaded 2 rates for 2 currencies; rebuilt totals for 1 users', out.getvalue())
+            self.assertEqual(self.daily(), {date(2026, 1, 10): Decimal('20.00')})
+            self.assertNotEqual(get_data_version(self.user)[0], version)
+            
+            path.write_text('date,currency,rate\n2026-01-01,EUR,-1\n')
+            with self.assertRaisesMessage(CommandError, 'out of range'):
+                call_command('load_exchange_rates', str(path), stdout=out)
+        self.assertEqual(ExchangeRate.objects.get(currency='EUR', date=date(2026, 1, 1)).rate, Decimal('2'))
+
+
+class TransactionFacetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.TYPE_EXPENSE)
+        self.travel = Category.objects.create(user=self.user, name='Travel', type=Category.TYPE_EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.TYPE_INCOME)
+        for category, day, note in [
+            (self.food, date(2026, 3, 2), 'Lunch'),
+            (self.food, date(2026, 3, 9), 'Lunch with team'),
+            (self.food, date(2026, 4, 1), 'Groceries'),
+            (self.travel, date(2026, 4, 3), 'Train'),
+            (self.salary, date(2026, 4, 30), 'April salary'),
+        ]:
+            Transaction.objects.create(user=self.user, category=category, amount=Decimal('5.00'), date=day, note=note)
+        other = User.objects.create_user(username='other', password='testpass123')
+        other_food = Category.objects.create(user=other, name='Food', type=Category.TYPE_EXPENSE)
+        Transaction.objects.create(user=other, category=other_food, amount=Decimal('9.00'), date=date(2026, 3, 2))
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        cache.clear()
+    
+    def facets(self, **params):
+        response = self.client.get(reverse('transaction-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+    
+    def test_each_facet_ignores_only_its_own_filter(self):
+        """Test category and type counts show what other choices match, and months apply every filter."""
+        context = self.facets(category=self.food.pk, type=Category.TYPE_EXPENSE)
+        facets = context['facets']
+        self.assertEqual(facets['categories'], {self.food.pk: 3, self.travel.pk: 1})
+        self.assertEqual(facets['types'], {Category.TYPE_INCOME: 0, Category.TYPE_EXPENSE: 3})
+        self.assertEqual(facets['months'], [{'month': '2026-04', 'count': 1}, {'month': '2026-03', 'count': 2}])
+        self.assertEqual(facets['total'], context['page_obj'].total)
+        self.assertEqual(
+            {category.name: category.facet_count for category in context['categories']},
+            {'Food': 3, 'Salary': 0, 'Travel': 1},
+        )
+        
+        month = context['month_facets'][1]
+        response = self.client.get(f"{reverse('transaction-list')}?{month['query']}")
+        self.assertEqual(response.context['page_obj'].total, 2)
+        self.assertEqual(response.context['filters']['date_to'], '2026-03-31')
+    
+    def test_search_facets_count_matching_rows(self):
+        """Test a search is faceted over the matching transactions, not the rollups."""
+        facets = self.facets(q='lunch', date_from='2026-03-05')['facets']
+        self.assertEqual(facets['categories'], {self.food.pk: 1})
+        self.assertEqual(facets['months'], [{'month': '2026-03', 'count': 1}])
+        self.assertEqual(facets['total'], 1)
+    
+    def test_facets_are_cached_by_data_version(self):
+        """Test a repeat request reuses the facets until the user's data changes."""
+        self.facets(type=Category.TYPE_EXPENSE)
+        misses = cache_stats()['misses']
+        self.assertEqual(self.facets(type=Category.TYPE_EXPENSE)['facets']['total'], 4)
+        self.assertEqual(cache_stats()['misses'], misses)
+        
+        Transaction.objects.create(
+            user=self.user, category=self.travel, amount=Decimal('5.00'), date=date(2026, 4, 4)
+        )
+        self.assertEqual(self.facets(type=Category.TYPE_EXPENSE)['facets']['total'], 5)
+        self.assertEqual(cache_stats()['misses'], misses + 1)
+    
+    def test_json_variant(self):
+        """Test the facets endpoint returns the same counts as JSON."""
+        response = self.client.get(reverse('transaction-facets'), {'type': Category.TYPE_INCOME})
+        self.assertEqual(response.json(), {
+            'total': 1,
+            'categories': {str(self.salary.pk): 1},
+            'types': {Category.TYPE_INCOME: 1, Category.TYPE_EXPENSE: 4},
+            'months': [{'month': '2026-04', 'count': 1}],
+        })
+    
+    def test_malformed_filters_are_ignored(self):
+        """Test filter values that cannot match anything are dropped instead of failing the request."""
+        bad = {'date_from': 'garbage', 'date_to': '2026-13-40', 'category': 'abc', 'type': 'REFUND'}
+        context = self.facets(**bad)
+        self.assertEqual(context['facets']['total'], 5)
+        self.assertEqual(context['filters']['date_from'], None)
+        self.assertEqual(context['filters']['category'], None)
+        self.assertEqual(context['filters']['type'], None)
+        
+        response = self.client.get(reverse('transaction-facets'), {**bad, 'category': '99999999999999999999999'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 0)
+        
+        context = self.facets(date_from='2026-04-01', category='abc')
+        self.assertEqual(context['facets']['total'], 3)
+
+
+class MigrationReversibilityTest(TransactionTestCase):
+    def tearDown(self):
+        call_command('migrate', 'tracker', verbosity=0)
+    
+    def test_migrate_back_to_search_and_forward_again(self):
+        """Test the migrations after 0006 unapply and reapply around the FTS triggers."""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        food = Category.objects.create(user=user, name='Food', type=Category.TYPE_EXPENSE)
+        txn = Transaction.objects.create(
+            user=user, category=food, amount=Decimal('4.00'), date=date(2026, 1, 2), note='Bagel'
+        )
+        
+        call_command('migrate', 'tracker', '0006', verbosity=0)
+        call_command('migrate', 'tracker', verbosity=0)
+        
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%%fts%%'")
+            self.assertEqual(len(cursor.fetchall()), 4)
+        food.name = 'Breakfast'
+        food.save()
+        self.assertEqual(
+            list(search_transactions(Transaction.objects.filter(user=user), 'breakfast bagel')), [txn]
+        )
+
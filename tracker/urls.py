@@ -9,16 +9,27 @@ urlpatterns = [
     
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('dashboard/async/', views.dashboard_async, name='dashboard-async'),
+    path('dashboard/chart-data/', views.dashboard_chart_data, name='dashboard-chart-data'),
+    path('dashboard/patterns/', views.dashboard_patterns, name='dashboard-patterns'),
+    
+    # Reports
+    path('reports/', views.report, name='report'),
+    path('reports/data/', views.report_data, name='report-data'),
     
     # Categories
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
     path('categories/add/', views.CategoryCreateView.as_view(), name='category-create'),
     path('categories/<int:pk>/edit/', views.CategoryUpdateView.as_view(), name='category-update'),
     path('categories/<int:pk>/delete/', views.CategoryDeleteView.as_view(), name='category-delete'),
+    path('categories/<int:pk>/merge/', views.category_merge, name='category-merge'),
     
     # Transactions
     path('transactions/', views.transaction_list, name='transaction-list'),
+    path('transactions/facets/', views.transaction_facets, name='transaction-facets'),
     path('transactions/add/', views.TransactionCreateView.as_view(), name='transaction-create'),
+    path('transactions/import/', views.transaction_import, name='transaction-import'),
+    path('transactions/bulk/', views.transaction_bulk, name='transaction-bulk'),
     path('transactions/<int:pk>/edit/', views.TransactionUpdateView.as_view(), name='transaction-update'),
     path('transactions/<int:pk>/delete/', views.TransactionDeleteView.as_view(), name='transaction-delete'),
     
@@ -28,4 +39,12 @@ urlpatterns = [
     # Exports
     path('export/csv/', views.export_csv, name='export-csv'),
     path('export/pdf/', views.export_pdf, name='export-pdf'),
+    path('export/archive/', views.export_archive, name='export-archive'),
+    
+    # Delta sync for offline clients
+    path('sync/', views.sync_changes, name='sync-changes'),
+    path('sync/upload/', views.sync_upload, name='sync-upload'),
+    
+    # Metrics
+    path('metrics/cache/', views.cache_metrics, name='cache-metrics'),
 ]
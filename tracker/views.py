@@ -1,5 +1,6 @@
 import csv
-from datetime import datetime, date
+from asgiref.sync import sync_to_async
+from datetime import MAXYEAR, MINYEAR, datetime, date, time, timedelta
 from decimal import Decimal
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
@@ -7,20 +8,46 @@ from django.contrib import messages
 from django.views.generic import CreateView, ListView, UpdateView, DeleteView
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
-from django.urls import reverse_lazy
-from django.db.models import Sum, Q
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse, reverse_lazy
+from django.db import IntegrityError
+from django.db.models import Max, Sum, Q
+from django.db.models.functions import Coalesce
 from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.template.defaultfilters import pluralize
+from django.utils.text import compress_sequence
+import hashlib
 import io
 import json
 
-from .models import Category, Transaction, Budget
-from .forms import CustomUserCreationForm, CategoryForm, TransactionForm, BudgetForm
-from .services.analytics import get_monthly_summary, get_category_breakdown, get_monthly_chart_data
+from .models import Category, Transaction, Budget, base_currency
+from .forms import (
+    CustomUserCreationForm, CategoryForm, CategoryMergeForm, TransactionForm, BudgetForm, TransactionImportForm,
+    TransactionBulkActionForm,
+)
+from .services.analytics import get_monthly_chart_data, get_range_report, quarter_bounds, year_bounds
+from .services.archive import iter_archive
+from .services.bulk import ACTION_CHOICES, ACTION_RECATEGORIZE, ACTION_SHIFT_DATE, bulk_change_transactions
+from .services.cache import cache_stats, get_data_version
+from .services.categories import merge_categories
+from .services.dashboard import DashboardSnapshot
+from .services.facets import get_transaction_facets
+from .services.forecast import aget_forecast, get_forecast
+from .services.importer import TransactionImporter
+from .services.pagination import InvalidCursor, paginate_keyset
+from .services.patterns import get_spending_patterns, patterns_as_of
+from .services.reports import open_monthly_report
+from .services.rollups import month_bounds
+from .services.search import search_transactions
+from .services.sync import (
+    SYNC_MAX_PAGE_SIZE, SYNC_PAGE_SIZE, CursorExpired, SyncError, apply_changes, get_changes,
+)
 
 
 class CustomLoginView(LoginView):
@@ -46,34 +73,47 @@ class RegisterView(CreateView):
         return response
 
 
-@login_required
-def dashboard(request):
+def parse_year_month(request, strict=False):
+    """
+    Read year/month from the query string, falling back to the current month.
+
+    Missing parameters always fall back. With ``strict``, an invalid or
+    out-of-range year or month raises ValueError instead.
+    """
     # Handle empty or invalid month/year parameters
     year_param = request.GET.get('year', '').strip()
     month_param = request.GET.get('month', '').strip()
     
     try:
         year = int(year_param) if year_param else datetime.now().year
+        # The month after December 9999 has no date.
+        if not MINYEAR <= year < MAXYEAR:
+            raise ValueError
     except (ValueError, TypeError):
+        if strict:
+            raise ValueError(f"Invalid year '{year_param}'.")
         year = datetime.now().year
     
     try:
         month = int(month_param) if month_param else datetime.now().month
+        # Ensure month is valid (1-12)
+        if month < 1 or month > 12:
+            raise ValueError
     except (ValueError, TypeError):
+        if strict:
+            raise ValueError(f"Invalid month '{month_param}', expected 1-12.")
         month = datetime.now().month
     
-    # Ensure month is valid (1-12)
-    if month < 1 or month > 12:
-        month = datetime.now().month
-    
-    summary = get_monthly_summary(request.user, year, month)
-    category_breakdown = get_category_breakdown(request.user, year, month)
-    chart_data = get_monthly_chart_data(request.user, year, month)
-    
-    context = {
-        'summary': summary,
-        'category_breakdown': category_breakdown,
-        'chart_data_json': json.dumps(chart_data),
+    return year, month
+
+
+def _dashboard_context(snapshot, patterns, forecast, year, month):
+    return {
+        'summary': snapshot.summary,
+        'category_breakdown': snapshot.category_breakdown,
+        'patterns': patterns,
+        'forecast': forecast,
+        'chart_data_url': f"{reverse('dashboard-chart-data')}?year={year}&month={month}",
         'selected_year': year,
         'selected_month': month,
         'months': [
@@ -92,9 +132,167 @@ def dashboard(request):
         ],
         'years': list(range(2020, datetime.now().year + 2)),
     }
+
+
+@login_required
+def dashboard(request):
+    year, month = parse_year_month(request)
+    
+    snapshot = DashboardSnapshot.for_month(request.user, year, month)
+    patterns = get_spending_patterns(request.user, year, month)
+    forecast = get_forecast(request.user, year, month)
+    
+    context = _dashboard_context(snapshot, patterns, forecast, year, month)
     return render(request, 'tracker/dashboard.html', context)
 
 
+@login_required
+async def dashboard_async(request):
+    """Async dashboard for ASGI deployments; the snapshot queries run concurrently."""
+    year, month = parse_year_month(request)
+    user = await request.auser()
+    
+    snapshot = await DashboardSnapshot.afor_month(user, year, month)
+    patterns = await sync_to_async(get_spending_patterns)(user, year, month)
+    forecast = await aget_forecast(user, year, month)
+    
+    context = _dashboard_context(snapshot, patterns, forecast, year, month)
+    return await sync_to_async(render)(request, 'tracker/dashboard.html', context)
+
+
+def _request_data_version(request):
+    """Data version of the requesting user, looked up once per request."""
+    if not hasattr(request, '_tracker_data_version'):
+        request._tracker_data_version = get_data_version(request.user)
+    return request._tracker_data_version
+
+
+def _chart_data_etag(request):
+    year, month = parse_year_month(request)
+    version, _ = _request_data_version(request)
+    raw = f'{request.user.pk}:{year:04d}-{month:02d}:{version}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _chart_data_last_modified(request):
+    _, updated_at = _request_data_version(request)
+    return updated_at
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_chart_data_etag, last_modified_func=_chart_data_last_modified)
+def dashboard_chart_data(request):
+    year, month = parse_year_month(request)
+    return JsonResponse(get_monthly_chart_data(request.user, year, month))
+
+
+def _patterns_etag(request):
+    # The patterns of an open month move on with the calendar even when
+    # the data does not, so the as-of day is part of the validator.
+    year, month = parse_year_month(request)
+    return hashlib.sha1(
+        f'{_chart_data_etag(request)}:{patterns_as_of(year, month).isoformat()}'.encode('utf-8')
+    ).hexdigest()
+
+
+def _patterns_last_modified(request):
+    year, month = parse_year_month(request)
+    as_of = timezone.make_aware(datetime.combine(patterns_as_of(year, month), time.min))
+    return max(_chart_data_last_modified(request), as_of)
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_patterns_etag, last_modified_func=_patterns_last_modified)
+def dashboard_patterns(request):
+    year, month = parse_year_month(request)
+    return JsonResponse(get_spending_patterns(request.user, year, month))
+
+
+def parse_report_period(request, strict=False):
+    """
+    Resolve the report period from the query string into (start, end, period).
+    
+    An invalid year falls back to the current one; with ``strict`` it
+    raises ValueError instead.
+    """
+    period = request.GET.get('period', 'year')
+    today = date.today()
+    year_param = request.GET.get('year', '').strip()
+    
+    try:
+        year = int(year_param) if year_param else today.year
+        # The quarter after the last one of 9999 has no date.
+        if not MINYEAR <= year < MAXYEAR:
+            raise ValueError
+    except ValueError:
+        if strict:
+            raise ValueError(f"Invalid year '{year_param}'.")
+        year = today.year
+    
+    if period == 'quarter':
+        try:
+            quarter = int(request.GET.get('quarter') or (today.month - 1) // 3 + 1)
+        except ValueError:
+            quarter = (today.month - 1) // 3 + 1
+        if quarter < 1 or quarter > 4:
+            quarter = (today.month - 1) // 3 + 1
+        start_date, end_date = quarter_bounds(year, quarter)
+        return start_date, end_date, period
+    
+    if period == 'custom':
+        try:
+            start_date = date.fromisoformat(request.GET.get('start', ''))
+            end_date = date.fromisoformat(request.GET.get('end', ''))
+        except ValueError:
+            pass
+        else:
+            if start_date > end_date:
+                start_date, end_date = end_date, start_date
+            return start_date, end_date, period
+    
+    start_date, end_date = year_bounds(year)
+    return start_date, end_date, 'year'
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+@login_required
+def report(request):
+    start_date, end_date, period = parse_report_period(request)
+    report_data = get_range_report(request.user, start_date, end_date)
+    
+    context = {
+        'report': report_data,
+        'period': period,
+        'selected_year': start_date.year,
+        'selected_quarter': (start_date.month - 1) // 3 + 1,
+        'years': list(range(2020, datetime.now().year + 2)),
+        'quarters': [1, 2, 3, 4],
+    }
+    return render(request, 'tracker/report.html', context)
+
+
+@login_required
+def report_data(request):
+    try:
+        start_date, end_date, _ = parse_report_period(request, strict=True)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_json_value(get_range_report(request.user, start_date, end_date)))
+
+
 @method_decorator(login_required, name='dispatch')
 class CategoryListView(ListView):
     model = Category
@@ -102,13 +300,19 @@ class CategoryListView(ListView):
     context_object_name = 'categories'
     
     def get_queryset(self):
-        return Category.objects.filter(user=self.request.user).order_by('type', 'name')
+        # Usage comes from the daily rollups in the same query, so the
+        # list costs one query however many transactions there are.
+        return Category.objects.filter(user=self.request.user).annotate(
+            transaction_count=Coalesce(Sum('dailycategoryrollup__count'), 0),
+            transaction_total=Coalesce(Sum('dailycategoryrollup__total'), Decimal('0.00')),
+            last_used=Max('dailycategoryrollup__date'),
+        ).order_by('type', 'name')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         categories = context['categories']
-        context['income_categories'] = categories.filter(type=Category.TYPE_INCOME)
-        context['expense_categories'] = categories.filter(type=Category.TYPE_EXPENSE)
+        context['income_categories'] = [c for c in categories if c.type == Category.TYPE_INCOME]
+        context['expense_categories'] = [c for c in categories if c.type == Category.TYPE_EXPENSE]
         return context
 
 
@@ -143,17 +347,60 @@ class CategoryDeleteView(DeleteView):
     
     def get_queryset(self):
         return Category.objects.filter(user=self.request.user)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['transaction_count'] = self.object.transaction_set.count()
+        return context
 
 
 @login_required
-def transaction_list(request):
-    queryset = Transaction.objects.filter(user=request.user).select_related('category')
+def category_merge(request, pk):
+    """Move every transaction of a category to another one, optionally deleting it."""
+    source = get_object_or_404(Category, pk=pk, user=request.user)
+    
+    if request.method == 'POST':
+        form = CategoryMergeForm(request.user, source, request.POST)
+        if form.is_valid():
+            target = form.cleaned_data['target']
+            moved = merge_categories(source, target, delete_source=form.cleaned_data['delete_source'])
+            messages.success(request, f'Moved {moved} transactions from {source.name} to {target.name}.')
+            return redirect('category-list')
+    else:
+        form = CategoryMergeForm(request.user, source)
     
-    # Filters
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    category_id = request.GET.get('category')
+    context = {
+        'form': form,
+        'object': source,
+        'transaction_count': source.transaction_set.count(),
+    }
+    return render(request, 'tracker/category_merge.html', context)
+
+
+def _date_filter(value):
+    try:
+        return date.fromisoformat(value).isoformat() if value else None
+    except ValueError:
+        return None
+
+
+def apply_transaction_filters(request, queryset):
+    """
+    Apply the transaction list filters from the query string to a queryset.
+    
+    Values that cannot match anything (a malformed date, a non-numeric
+    category, an unknown type) are dropped rather than raising.
+    """
+    date_from = _date_filter(request.GET.get('date_from'))
+    date_to = _date_filter(request.GET.get('date_to'))
+    category_id = request.GET.get('category', '').strip()
+    if not category_id.isdecimal():
+        category_id = None
     transaction_type = request.GET.get('type')
+    if transaction_type not in (Category.TYPE_INCOME, Category.TYPE_EXPENSE):
+        transaction_type = None
+    query = request.GET.get('q', '').strip()
+    sort = request.GET.get('sort')
     
     if date_from:
         queryset = queryset.filter(date__gte=date_from)
@@ -162,31 +409,145 @@ def transaction_list(request):
     if category_id:
         queryset = queryset.filter(category_id=category_id)
     if transaction_type:
-        queryset = queryset.filter(category__type=transaction_type)
-    
-    queryset = queryset.order_by('-date', '-created_at')
+        queryset = queryset.filter(type=transaction_type)
+    
+    filters = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'category': category_id,
+        'type': transaction_type,
+        'q': query,
+        'sort': 'relevance' if query and sort == 'relevance' else None,
+    }
+    queryset = queryset.order_by('-date', '-created_at', '-id')
+    if query:
+        queryset = search_transactions(queryset, query, by_relevance=bool(filters['sort']))
+    return queryset, filters
+
+
+TRANSACTIONS_PER_PAGE = 20
+
+
+def _facets(request, filters):
+    return get_transaction_facets(
+        request.user,
+        date_from=filters['date_from'],
+        date_to=filters['date_to'],
+        category_id=filters['category'],
+        transaction_type=filters['type'],
+        query=filters['q'],
+    )
+
+
+@login_required
+def transaction_list(request):
+    queryset = Transaction.objects.filter(user=request.user).select_related('category')
+    queryset, filters = apply_transaction_filters(request, queryset)
+    facets = _facets(request, filters)
     
-    # Pagination
-    paginator = Paginator(queryset, 20)
+    # Pagination: page numbers are kept for old links, cursors are the default.
+    # Relevance order has no stable keyset, so it always pages by number.
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Get categories for filter
+    if filters['sort'] == 'relevance':
+        page_number = page_number or 1
+    if page_number:
+        paginator = Paginator(queryset, TRANSACTIONS_PER_PAGE)
+        page_obj = paginator.get_page(page_number)
+    else:
+        try:
+            page_obj = paginate_keyset(
+                queryset,
+                cursor=request.GET.get('cursor'),
+                per_page=TRANSACTIONS_PER_PAGE,
+                # The facets already counted every row under the filters.
+                count_func=lambda: facets['total'],
+            )
+        except InvalidCursor:
+            page_obj = paginate_keyset(queryset, per_page=TRANSACTIONS_PER_PAGE)
+    
+    # Query string without pagination parameters, for building page links
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
+    filter_query.pop('cursor', None)
+    
+    # Get categories for filter, with the number of rows each would match
     categories = Category.objects.filter(user=request.user).order_by('name')
+    for category in categories:
+        category.facet_count = facets['categories'].get(category.pk, 0)
+    
+    # Each month facet links to the list narrowed to that month
+    month_facets = []
+    for month in facets['months']:
+        start_date, end_date = month_bounds(*map(int, month['month'].split('-')))
+        month_query = filter_query.copy()
+        month_query['date_from'] = start_date.isoformat()
+        month_query['date_to'] = (end_date - timedelta(days=1)).isoformat()
+        month_facets.append({**month, 'query': month_query.urlencode()})
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': not page_number,
+        'filter_query': filter_query.urlencode(),
         'categories': categories,
-        'filters': {
-            'date_from': date_from,
-            'date_to': date_to,
-            'category': category_id,
-            'type': transaction_type,
-        }
+        'filters': filters,
+        'bulk_actions': ACTION_CHOICES,
+        'base_currency': base_currency(),
+        'facets': facets,
+        'month_facets': month_facets,
     }
     return render(request, 'tracker/transaction_list.html', context)
 
 
+@login_required
+def transaction_facets(request):
+    """Facet counts of the transaction list under the filters in the query string, as JSON."""
+    _, filters = apply_transaction_filters(request, Transaction.objects.none())
+    return JsonResponse(_facets(request, filters))
+
+
+@login_required
+@require_POST
+def transaction_bulk(request):
+    """Apply a bulk action to the selected transactions or to every one matching the list filters."""
+    # The list's filters arrive in the query string, so the redirect keeps them.
+    list_url = f"{reverse('transaction-list')}?{request.GET.urlencode()}"
+    form = TransactionBulkActionForm(request.user, request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect(list_url)
+    
+    data = form.cleaned_data
+    queryset = Transaction.objects.filter(user=request.user)
+    if data['scope'] == TransactionBulkActionForm.SCOPE_FILTERED:
+        queryset, _ = apply_transaction_filters(request, queryset)
+    else:
+        queryset = queryset.filter(pk__in=data['ids'])
+    
+    try:
+        count = bulk_change_transactions(
+            request.user, queryset, data['action'],
+            category=data['category'], days=data['days'] or 0, dry_run=data['dry_run'],
+        )
+    except IntegrityError:
+        messages.error(request, 'Shifting these dates would repeat a recurring transaction on the same day.')
+        return redirect(list_url)
+    
+    if data['action'] == ACTION_RECATEGORIZE:
+        outcome = f"moved to {data['category'].name}"
+    elif data['action'] == ACTION_SHIFT_DATE:
+        outcome = f"shifted by {data['days']} day{pluralize(abs(data['days']))}"
+    else:
+        outcome = 'deleted'
+    noun = f'transaction{pluralize(count)}'
+    if data['dry_run']:
+        messages.info(request, f'{count} {noun} would be {outcome}.')
+    else:
+        messages.success(request, f'{count} {noun} {outcome}.')
+    return redirect(list_url)
+
+
 @method_decorator(login_required, name='dispatch')
 class TransactionCreateView(CreateView):
     model = Transaction
@@ -230,6 +591,34 @@ class TransactionDeleteView(DeleteView):
         return Transaction.objects.filter(user=self.request.user)
 
 
+@login_required
+def transaction_import(request):
+    result = None
+    
+    if request.method == 'POST':
+        form = TransactionImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            result = TransactionImporter(request.user).run(lines)
+            if result.created:
+                messages.success(
+                    request,
+                    f'Imported {result.created} transactions '
+                    f'({result.rows_per_second:.0f} rows/sec).'
+                )
+            if result.error_count:
+                messages.warning(request, f'{result.error_count} rows could not be imported.')
+    else:
+        form = TransactionImportForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'tracker/transaction_import.html', context)
+
+
 @login_required
 def budget_view(request):
     budget = Budget.objects.filter(user=request.user).first()
@@ -256,103 +645,139 @@ def budget_view(request):
     return render(request, 'tracker/budget.html', context)
 
 
-@login_required
-def export_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Date', 'Category', 'Type', 'Amount', 'Note'])
+class Echo:
+    """File-like object whose write() hands the value back, for streaming csv rows."""
     
-    queryset = Transaction.objects.filter(user=request.user).select_related('category')
+    def write(self, value):
+        return value
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _csv_rows(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(['Date', 'Category', 'Type', 'Amount', 'Currency', 'Note'])
     
-    # Apply same filters as transaction list
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    category_id = request.GET.get('category')
-    transaction_type = request.GET.get('type')
+    rows = queryset.values_list(
+        'date', 'category__name', 'type', 'amount', 'currency', 'note'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
     
-    if date_from:
-        queryset = queryset.filter(date__gte=date_from)
-    if date_to:
-        queryset = queryset.filter(date__lte=date_to)
-    if category_id:
-        queryset = queryset.filter(category_id=category_id)
-    if transaction_type:
-        queryset = queryset.filter(category__type=transaction_type)
+    for txn_date, category_name, category_type, amount, currency, note in rows:
+        yield writer.writerow([txn_date, category_name, category_type, amount, currency, note or ''])
+
+
+def accepts_gzip(request):
+    """
+    Whether the Accept-Encoding header allows a gzip response.
+
+    Each coding's q-value is honoured: ``gzip;q=0`` refuses gzip, and a
+    ``*`` wildcard covers gzip unless gzip is listed on its own.
+    """
+    qualities = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+
+@login_required
+def export_csv(request):
+    queryset = Transaction.objects.filter(user=request.user)
     
-    queryset = queryset.order_by('-date', '-created_at')
+    # Apply same filters as transaction list
+    queryset, _ = apply_transaction_filters(request, queryset)
     
-    for transaction in queryset:
-        writer.writerow([
-            transaction.date,
-            transaction.category.name,
-            transaction.category.type,
-            transaction.amount,
-            transaction.note or '',
-        ])
+    content = (row.encode('utf-8') for row in _csv_rows(queryset))
+    gzip_requested = accepts_gzip(request)
+    if gzip_requested:
+        content = compress_sequence(content)
     
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
+    if gzip_requested:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
     return response
 
 
 @login_required
-def export_pdf(request):
-    year = int(request.GET.get('year', datetime.now().year))
-    month = int(request.GET.get('month', datetime.now().month))
-    
-    # Create PDF
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Title
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, f"Monthly Report - {year:04d}-{month:02d}")
-    
-    # Get data
-    summary = get_monthly_summary(request.user, year, month)
-    category_breakdown = get_category_breakdown(request.user, year, month)
-    
-    # Summary section
-    y_position = height - 100
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, y_position, "Summary:")
-    y_position -= 20
-    
-    p.setFont("Helvetica", 10)
-    p.drawString(50, y_position, f"Total Income: ${summary['income']}")
-    y_position -= 15
-    p.drawString(50, y_position, f"Total Expense: ${summary['expense']}")
-    y_position -= 15
-    p.drawString(50, y_position, f"Net: ${summary['net']}")
-    y_position -= 15
-    
-    if summary['budget_limit']:
-        p.drawString(50, y_position, f"Budget: ${summary['budget_limit']}")
-        y_position -= 15
-        p.drawString(50, y_position, f"Budget Remaining: ${summary['budget_remaining']}")
-        y_position -= 15
-        if summary['budget_used_percentage']:
-            p.drawString(50, y_position, f"Budget Used: {summary['budget_used_percentage']:.1f}%")
-            y_position -= 15
-    
-    # Category breakdown
-    y_position -= 20
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, y_position, "Expense Breakdown by Category:")
-    y_position -= 20
-    
-    p.setFont("Helvetica", 10)
-    for category in category_breakdown:
-        p.drawString(50, y_position, f"{category['name']}: ${category['amount']}")
-        y_position -= 15
-        if y_position < 50:
-            p.showPage()
-            y_position = height - 50
-    
-    p.save()
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="monthly_report_{year:04d}_{month:02d}.pdf"'
+def export_archive(request):
+    """Stream a ZIP of the user's categories, transactions and budgets as NDJSON."""
+    response = StreamingHttpResponse(iter_archive(request.user), content_type='application/zip')
+    filename = f"expense-tracker-{request.user.username}-{date.today():%Y-%m-%d}.zip"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
+
+
+@login_required
+def sync_changes(request):
+    """Changes to the user's categories, transactions and budgets since ``cursor``, as JSON."""
+    try:
+        limit = min(max(int(request.GET.get('limit') or SYNC_PAGE_SIZE), 1), SYNC_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = SYNC_PAGE_SIZE
+    try:
+        changes = get_changes(request.user, request.GET.get('cursor'), limit)
+    except CursorExpired as exc:
+        return JsonResponse({'error': str(exc), 'reset': True}, status=410)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    return JsonResponse(changes)
+
+
+@login_required
+@require_POST
+def sync_upload(request):
+    """Apply a JSON batch of client changes atomically; see ``apply_changes``."""
+    try:
+        changes = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'The request body is not valid JSON.'}, status=400)
+    if not isinstance(changes, dict):
+        return JsonResponse({'error': 'The request body must be a JSON object.'}, status=400)
+    try:
+        result = apply_changes(request.user, changes)
+    except SyncError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(result)
+
+
+@login_required
+def export_pdf(request):
+    try:
+        year, month = parse_year_month(request, strict=True)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    return FileResponse(
+        open_monthly_report(request.user, year, month),
+        as_attachment=True,
+        filename=f"monthly_report_{year:04d}_{month:02d}.pdf",
+        content_type='application/pdf',
+    )
+
+
+@staff_member_required
+def cache_metrics(request):
+    """Analytics cache counters in the Prometheus text exposition format."""
+    stats = cache_stats()
+    lines = [
+        '# HELP tracker_analytics_cache_hits_total Analytics cache hits.',
+        '# TYPE tracker_analytics_cache_hits_total counter',
+        f"tracker_analytics_cache_hits_total {stats['hits']}",
+        '# HELP tracker_analytics_cache_misses_total Analytics cache misses.',
+        '# TYPE tracker_analytics_cache_misses_total counter',
+        f"tracker_analytics_cache_misses_total {stats['misses']}",
+    ]
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')